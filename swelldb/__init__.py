@@ -12,6 +12,7 @@ from swelldb.table_plan.planner import TableGenPlanner
 from swelldb.llm.openai_llm import OpenAILLM
 from swelldb.table_plan.swelldb_schema import SwellDBSchemaBuilder, SwellDBSchema
 from swelldb.catalog import Catalog
+from swelldb.common.cassette import Cassette
 
 __version__ = "0.1.0"
 __all__ = [
@@ -20,4 +21,5 @@ __all__ = [
     "SwellDBSchemaBuilder",
     "SwellDBSchema",
     "Catalog",
+    "Cassette",
 ]
@@ -0,0 +1,184 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from collections import defaultdict
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+_active_cassette: Optional["Cassette"] = None
+_active_lock = threading.Lock()
+
+
+class Cassette:
+    """
+    Records the external exchanges of a table build (LLM calls, search queries and crawled
+    pages) into a compressed SQLite file, and serves them back in replay mode.
+
+    Examples:
+        >>> with Cassette("run.cassette", mode=Cassette.RECORD):
+        ...     table = tbl.materialize()
+
+        >>> with Cassette("run.cassette", mode=Cassette.REPLAY, simulate_latency=True):
+        ...     table = tbl.materialize()
+    """
+
+    RECORD = "record"
+    REPLAY = "replay"
+
+    def __init__(self, path: str, mode: str = RECORD, simulate_latency: bool = False):
+        """
+        Args:
+            path: The cassette file. In record mode, any existing content is discarded.
+            mode: Cassette.RECORD or Cassette.REPLAY.
+            simulate_latency: In replay mode, sleep for the recorded latency of every exchange.
+        """
+        if mode not in (Cassette.RECORD, Cassette.REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+
+        self._path: str = path
+        self._mode: str = mode
+        self._simulate_latency: bool = simulate_latency
+        self._lock = threading.Lock()
+
+        # Identical requests are stored and served in the order they were issued
+        self._seq: Dict[Tuple[str, str], int] = defaultdict(int)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS exchanges (
+                kind TEXT NOT NULL,
+                request_hash TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                request BLOB,
+                response BLOB,
+                latency REAL,
+                PRIMARY KEY (kind, request_hash, seq)
+            )
+            """
+        )
+
+        if mode == Cassette.RECORD:
+            self._conn.execute("DELETE FROM exchanges")
+
+        self._conn.commit()
+
+    def get_mode(self) -> str:
+        return self._mode
+
+    def intercept(self, kind: str, request: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run an exchange through the cassette.
+
+        Args:
+            kind: The exchange type, e.g. "llm", "search" or "crawl".
+            request: The request payload that identifies the exchange.
+            fn: Performs the live exchange. Only invoked in record mode.
+
+        Returns:
+            The (JSON-serializable) response of the exchange.
+        """
+        request_hash: str = hashlib.sha256(request.encode("utf-8")).hexdigest()
+
+        with self._lock:
+            seq: int = self._seq[(kind, request_hash)]
+            self._seq[(kind, request_hash)] += 1
+
+        if self._mode == Cassette.REPLAY:
+            return self._replay(kind, request_hash, seq)
+
+        start: float = time.perf_counter()
+        response = fn()
+        latency: float = time.perf_counter() - start
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO exchanges VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    kind,
+                    request_hash,
+                    seq,
+                    zlib.compress(request.encode("utf-8")),
+                    zlib.compress(json.dumps(response).encode("utf-8")),
+                    latency,
+                ),
+            )
+            self._conn.commit()
+
+        return response
+
+    def _replay(self, kind: str, request_hash: str, seq: int) -> Any:
+        with self._lock:
+            # Requests issued more times than recorded reuse the last recorded response
+            row = self._conn.execute(
+                """
+                SELECT response, latency FROM exchanges
+                WHERE kind = ? AND request_hash = ? AND seq <= ?
+                ORDER BY seq DESC LIMIT 1
+                """,
+                (kind, request_hash, seq),
+            ).fetchone()
+
+        if row is None:
+            raise KeyError(
+                f"No recorded {kind} exchange for request {request_hash[:12]} in cassette {self._path}"
+            )
+
+        response, latency = row
+
+        if self._simulate_latency and latency:
+            time.sleep(latency)
+
+        return json.loads(zlib.decompress(response).decode("utf-8"))
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "Cassette":
+        global _active_cassette
+
+        with _active_lock:
+            if _active_cassette is not None:
+                raise RuntimeError("Another cassette is already active")
+            _active_cassette = self
+
+        logging.info(f"Using cassette {self._path} in {self._mode} mode")
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        global _active_cassette
+
+        with _active_lock:
+            _active_cassette = None
+
+        self.close()
+
+
+def get_active_cassette() -> Optional[Cassette]:
+    return _active_cassette
+
+
+def intercept(kind: str, request: Union[str, Callable[[], str]], fn: Callable[[], Any]) -> Any:
+    """
+    Route an exchange through the active cassette, if any. Otherwise the exchange runs live.
+
+    The request may be a callable, e.g. when it is costly to build, which is only invoked if a cassette
+    is active.
+    """
+    cassette: Optional[Cassette] = _active_cassette
+
+    if cassette is None:
+        return fn()
+
+    if callable(request):
+        request = request()
+
+    return cassette.intercept(kind, request, fn)
@@ -0,0 +1,277 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import pyarrow as pa
+
+_HASH_BLOCK_SIZE: int = 1 << 20
+
+
+class DocumentCache:
+    """
+    An on-disk cache of extracted document pages and split chunks.
+
+    Entries are keyed by the SHA-256 of the file content, so renamed or copied documents share them,
+    and are stored as Arrow IPC files that are read through a memory map. The content hash of a path is
+    only recomputed when its size or modification time changes. When the cache grows beyond max_bytes,
+    the least recently used entries are evicted.
+
+    Examples:
+        >>> cache = DocumentCache("/tmp/swelldb_documents", max_bytes=512 * 1024 * 1024)
+        >>> loader = DocumentLoader(cache=cache)
+    """
+
+    def __init__(self, directory: str, max_bytes: Optional[int] = 1 << 30):
+        """
+        Args:
+            directory: The cache directory.
+            max_bytes: The maximum size of the cached entries. None means that entries are never evicted.
+        """
+        self._directory: str = directory
+        self._max_bytes: Optional[int] = max_bytes
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0}
+
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(
+            os.path.join(directory, "index.sqlite"), check_same_thread=False
+        )
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                hash TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                name TEXT PRIMARY KEY,
+                bytes INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+
+    def content_hash(self, path: str) -> str:
+        """
+        Returns the SHA-256 of the file content. Unchanged files (same size and modification time) are
+        not read again.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT hash FROM files WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (path, stat.st_size, stat.st_mtime_ns),
+            ).fetchone()
+
+        if row is not None:
+            return row[0]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(_HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+
+        content_hash: str = digest.hexdigest()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, content_hash),
+            )
+            self._conn.commit()
+
+        return content_hash
+
+    def get_pages(self, path: str) -> Optional[List[str]]:
+        """
+        Returns the cached text of each page of the document, or None if the document is not cached.
+        """
+        table: Optional[pa.Table] = self._read(f"{self.content_hash(path)}.pages")
+        return None if table is None else table.column("text").to_pylist()
+
+    def put_pages(self, path: str, pages: List[str]) -> None:
+        table = pa.table(
+            {
+                "page_no": pa.array(range(1, len(pages) + 1), pa.int32()),
+                "text": pa.array(pages, pa.string()),
+            }
+        )
+        self._write(f"{self.content_hash(path)}.pages", table)
+
+    def get_page_tables(self, path: str) -> Optional[List[Tuple[str, List[Any]]]]:
+        """
+        Returns the cached (text outside the tables, tables) pairs of each page of the document, or
+        None if the document is not cached.
+        """
+        table: Optional[pa.Table] = self._read(f"{self.content_hash(path)}.page_tables")
+
+        if table is None:
+            return None
+
+        return [
+            (text, json.loads(tables))
+            for text, tables in zip(
+                table.column("text").to_pylist(), table.column("tables").to_pylist()
+            )
+        ]
+
+    def put_page_tables(self, path: str, pages: List[Tuple[str, List[Any]]]) -> None:
+        table = pa.table(
+            {
+                "page_no": pa.array(range(1, len(pages) + 1), pa.int32()),
+                "text": pa.array([text for text, _ in pages], pa.string()),
+                "tables": pa.array([json.dumps(tables) for _, tables in pages], pa.string()),
+            }
+        )
+        self._write(f"{self.content_hash(path)}.page_tables", table)
+
+    def get_table(self, path: str, kind: str) -> Optional[pa.Table]:
+        """
+        Returns an Arrow table derived from the document, e.g. the rows extracted for a schema, or None
+        if it is not cached.
+        """
+        return self._read(f"{self.content_hash(path)}.{kind}")
+
+    def put_table(self, path: str, kind: str, table: pa.Table) -> None:
+        self._write(f"{self.content_hash(path)}.{kind}", table)
+
+    def get_chunks(
+        self, path: str, chunk_size: int, chunk_overlap: int, variant: str = ""
+    ) -> Optional[List[Tuple[int, str]]]:
+        """
+        Returns the cached (page number, chunk) pairs of the document for the given splitter
+        configuration, or None if they are not cached. The variant distinguishes chunks of the same
+        document that were derived differently, e.g. for a different target schema.
+        """
+        table: Optional[pa.Table] = self._read(
+            self._chunks_name(path, chunk_size, chunk_overlap, variant)
+        )
+
+        if table is None:
+            return None
+
+        return list(
+            zip(table.column("page_no").to_pylist(), table.column("chunk").to_pylist())
+        )
+
+    def put_chunks(
+        self,
+        path: str,
+        chunk_size: int,
+        chunk_overlap: int,
+        chunks: List[Tuple[int, str]],
+        variant: str = "",
+    ) -> None:
+        table = pa.table(
+            {
+                "page_no": pa.array([page_no for page_no, _ in chunks], pa.int32()),
+                "chunk": pa.array([chunk for _, chunk in chunks], pa.string()),
+            }
+        )
+        self._write(self._chunks_name(path, chunk_size, chunk_overlap, variant), table)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats: Dict[str, int] = dict(self._stats)
+            stats["bytes"] = self._conn.execute(
+                "SELECT COALESCE(SUM(bytes), 0) FROM entries"
+            ).fetchone()[0]
+        return stats
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _chunks_name(
+        self, path: str, chunk_size: int, chunk_overlap: int, variant: str
+    ) -> str:
+        name: str = f"{self.content_hash(path)}.chunks-{chunk_size}-{chunk_overlap}"
+        return f"{name}-{variant}" if variant else name
+
+    def _entry_path(self, name: str) -> str:
+        return os.path.join(self._directory, f"{name}.arrow")
+
+    def _read(self, name: str) -> Optional[pa.Table]:
+        try:
+            # The table references the mapped pages, which stay mapped after the file is closed
+            with pa.memory_map(self._entry_path(name), "r") as source:
+                table: pa.Table = pa.ipc.open_file(source).read_all()
+        except (FileNotFoundError, pa.ArrowInvalid):
+            with self._lock:
+                self._conn.execute("DELETE FROM entries WHERE name = ?", (name,))
+                self._conn.commit()
+                self._stats["misses"] += 1
+            return None
+
+        with self._lock:
+            self._conn.execute(
+                "UPDATE entries SET last_access = ? WHERE name = ?", (time.time(), name)
+            )
+            self._conn.commit()
+            self._stats["hits"] += 1
+
+        return table
+
+    def _write(self, name: str, table: pa.Table) -> None:
+        path: str = self._entry_path(name)
+        tmp_path: str = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?)",
+                (name, os.path.getsize(path), time.time()),
+            )
+            self._conn.commit()
+
+        self._evict()
+
+    def _evict(self) -> None:
+        if self._max_bytes is None:
+            return
+
+        with self._lock:
+            total: int = self._conn.execute(
+                "SELECT COALESCE(SUM(bytes), 0) FROM entries"
+            ).fetchone()[0]
+
+            if total <= self._max_bytes:
+                return
+
+            for name, size in self._conn.execute(
+                "SELECT name, bytes FROM entries ORDER BY last_access"
+            ).fetchall():
+                if total <= self._max_bytes:
+                    break
+
+                try:
+                    os.remove(self._entry_path(name))
+                except FileNotFoundError:
+                    pass
+
+                self._conn.execute("DELETE FROM entries WHERE name = ?", (name,))
+                self._stats["evictions"] += 1
+                total -= size
+
+            self._conn.commit()
+
+        logging.info(f"Document cache evicted entries down to {total} bytes")
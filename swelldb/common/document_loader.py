@@ -3,11 +3,16 @@
 # This file is part of SwellDB and is licensed under the MIT License.
 # See the LICENSE file in the project root for more information.
 
+import itertools
 import os
-from typing import List, Dict, Optional
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import List, Dict, Optional, Iterable, Iterator, Set, Tuple
 from pathlib import Path
 import logging
 
+from swelldb.common.document_cache import DocumentCache
+
 try:
     import PyPDF2
     import pdfplumber
@@ -19,12 +24,82 @@ except ImportError as e:
     DocxDocument = None
 
 
+# The number of PDF pages extracted by a single worker task
+PAGES_PER_TASK = 8
+
+# A page record: (document path, page number starting from 1, page text)
+PageRecord = Tuple[str, int, str]
+
+# A table extracted from a page, as a list of rows of cell texts. The first row holds the headers.
+ExtractedTable = List[List[str]]
+
+# A page record with the tables of the page: (document path, page number, text outside the tables, tables)
+PageTablesRecord = Tuple[str, int, str, List[ExtractedTable]]
+
+
+def _extract_pdf_pages(file_path: str, start: int, end: int, method: str) -> List[str]:
+    """Extract the text of pages [start, end) of a PDF. Runs in a worker process."""
+    texts = []
+    if method == "pypdf2":
+        with open(file_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            for page_num in range(start, end):
+                texts.append(pdf_reader.pages[page_num].extract_text() or "")
+    else:
+        with pdfplumber.open(file_path) as pdf:
+            for page_num in range(start, end):
+                texts.append(pdf.pages[page_num].extract_text() or "")
+    return texts
+
+
+def _extract_pdf_page_tables(
+    file_path: str, start: int, end: int
+) -> List[Tuple[str, List[ExtractedTable]]]:
+    """
+    Extract the tables of pages [start, end) of a PDF, and the text outside of them. Runs in a
+    worker process.
+    """
+    results = []
+    with pdfplumber.open(file_path) as pdf:
+        for page_num in range(start, end):
+            page = pdf.pages[page_num]
+            outside = page
+            tables = []
+
+            for table in page.find_tables():
+                rows = [
+                    [" ".join((cell or "").split()) for cell in row]
+                    for row in table.extract()
+                ]
+                rows = [row for row in rows if any(row)]
+
+                # Single-row "tables" are usually boxed text, which stays in the page text
+                if len(rows) > 1:
+                    tables.append(rows)
+                    outside = outside.outside_bbox(table.bbox)
+
+            results.append((outside.extract_text() or "", tables))
+    return results
+
+
+def _extract_document(file_path: str, tables: bool = False) -> List:
+    """Extract a non-PDF document as a single page. Runs in a worker process."""
+    text = DocumentLoader().load_document(file_path)
+    return [(text, [])] if tables else [text]
+
+
 class DocumentLoader:
     """Loads and extracts text from various document formats."""
     
-    def __init__(self, chunk_size: int = 4000, chunk_overlap: int = 200):
+    def __init__(
+        self,
+        chunk_size: int = 4000,
+        chunk_overlap: int = 200,
+        cache: Optional[DocumentCache] = None,
+    ):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.cache = cache
         
     def load_pdf(self, file_path: str, method: str = "pdfplumber") -> str:
         """
@@ -49,23 +124,33 @@ class DocumentLoader:
     
     def _load_pdf_pypdf2(self, file_path: str) -> str:
         """Load PDF using PyPDF2."""
-        text = ""
+        pages = []
         with open(file_path, 'rb') as file:
             pdf_reader = PyPDF2.PdfReader(file)
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                text += page.extract_text() + "\n"
-        return text
+            for page in pdf_reader.pages:
+                pages.append((page.extract_text() or "") + "\n")
+        return "".join(pages)
     
     def _load_pdf_pdfplumber(self, file_path: str) -> str:
         """Load PDF using pdfplumber (better for tables and complex layouts)."""
-        text = ""
+        pages = []
         with pdfplumber.open(file_path) as pdf:
             for page in pdf.pages:
                 page_text = page.extract_text()
                 if page_text:
-                    text += page_text + "\n"
-        return text
+                    pages.append(page_text + "\n")
+        return "".join(pages)
+
+    def count_pdf_pages(self, file_path: str, method: str = "pdfplumber") -> int:
+        """Return the number of pages of a PDF file."""
+        if method == "pypdf2" and PyPDF2:
+            with open(file_path, 'rb') as file:
+                return len(PyPDF2.PdfReader(file).pages)
+        elif method == "pdfplumber" and pdfplumber:
+            with pdfplumber.open(file_path) as pdf:
+                return len(pdf.pages)
+        else:
+            raise ImportError(f"PDF processing library not available for method: {method}")
     
     def load_docx(self, file_path: str) -> str:
         """Load and extract text from a DOCX file."""
@@ -76,10 +161,7 @@ class DocumentLoader:
             raise FileNotFoundError(f"DOCX file not found: {file_path}")
             
         doc = DocxDocument(file_path)
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        return text
+        return "".join(paragraph.text + "\n" for paragraph in doc.paragraphs)
     
     def load_txt(self, file_path: str, encoding: str = "utf-8") -> str:
         """Load text from a plain text file."""
@@ -112,6 +194,211 @@ class DocumentLoader:
         else:
             raise ValueError(f"Unsupported document type: {extension}")
     
+    def iter_pages(
+        self,
+        file_paths: List[str],
+        max_workers: Optional[int] = None,
+        method: str = "pdfplumber",
+        failed: Optional[Set[str]] = None,
+    ) -> Iterator[PageRecord]:
+        """
+        Extract the pages of the given documents in a process pool.
+
+        PDFs are split into tasks of PAGES_PER_TASK pages; other documents are a single page.
+        Only a bounded number of tasks is in flight at any time, so memory stays bounded
+        regardless of the size of the corpus. With a cache, unchanged documents are read from it
+        and newly extracted documents are added to it.
+
+        Args:
+            file_paths: Paths to the documents
+            max_workers: Number of worker processes (default: number of CPUs, 1 runs inline)
+            method: PDF extraction method, 'pypdf2' or 'pdfplumber'
+            failed: If given, the documents whose pages could not all be extracted are added to it
+
+        Yields:
+            (document path, page number, page text) records, in document and page order
+        """
+        yield from self._iter_pages(file_paths, max_workers, method, tables=False, failed=failed)
+
+    def iter_page_tables(
+        self,
+        file_paths: List[str],
+        max_workers: Optional[int] = None,
+        failed: Optional[Set[str]] = None,
+    ) -> Iterator[PageTablesRecord]:
+        """
+        Like iter_pages, but the tables of PDF pages are extracted separately with pdfplumber.
+        The text of each page only covers the regions outside of its tables.
+
+        Yields:
+            (document path, page number, text outside the tables, tables) records, in document and page order
+        """
+        if not pdfplumber:
+            for file_path, page_no, text in self.iter_pages(
+                file_paths, max_workers, method="pypdf2", failed=failed
+            ):
+                yield file_path, page_no, text, []
+            return
+
+        for file_path, page_no, (text, tables) in self._iter_pages(
+            file_paths, max_workers, "pdfplumber", tables=True, failed=failed
+        ):
+            yield file_path, page_no, text, tables
+
+    def _iter_pages(
+        self,
+        file_paths: List[str],
+        max_workers: Optional[int],
+        method: str,
+        tables: bool,
+        failed: Optional[Set[str]] = None,
+    ) -> Iterator[Tuple]:
+        doc_path: Optional[str] = None
+        doc_pages: Optional[List] = None
+        failed = failed if failed is not None else set()
+
+        for file_path, start, pages, cached in self._iter_batches(
+            file_paths, max_workers, method, tables, failed
+        ):
+            # A new document starts: store the pages of the previous one
+            if start == 0:
+                self._store_pages(doc_path, doc_pages, tables)
+                doc_path = file_path
+                doc_pages = [] if self.cache is not None and not cached else None
+
+            if pages is None:
+                doc_pages = None
+                failed.add(file_path)
+                continue
+
+            if doc_pages is not None:
+                doc_pages.extend(pages)
+
+            for offset, page in enumerate(pages):
+                yield file_path, start + offset + 1, page
+
+        self._store_pages(doc_path, doc_pages, tables)
+
+    def _store_pages(self, file_path: Optional[str], pages: Optional[List], tables: bool) -> None:
+        if file_path is None or pages is None:
+            return
+        try:
+            if tables:
+                self.cache.put_page_tables(file_path, pages)
+            else:
+                self.cache.put_pages(file_path, pages)
+        except Exception as e:
+            logging.warning(f"Failed to cache pages of document {file_path}: {e}")
+
+    def _iter_batches(
+        self,
+        file_paths: List[str],
+        max_workers: Optional[int],
+        method: str,
+        tables: bool,
+        failed: Set[str],
+    ) -> Iterator[Tuple[str, int, Optional[List], bool]]:
+        """
+        Yield (document path, first page index, pages, cached) batches in order. The pages are None
+        if the extraction of the batch failed.
+        """
+        tasks = self._page_tasks(file_paths, method, tables, failed)
+
+        # Starting the worker processes costs more than a single extraction task, e.g. a single
+        # document that is not a PDF. The tasks are counted up to the second one
+        head: List[Tuple] = []
+        n_extractions: int = 0
+        for task in tasks:
+            head.append(task)
+            n_extractions += task[2] is not None
+            if n_extractions > 1:
+                break
+        tasks = itertools.chain(head, tasks)
+
+        if max_workers == 1 or n_extractions <= 1:
+            for file_path, start, fn, args in tasks:
+                if fn is None:
+                    yield file_path, start, args, True
+                    continue
+                try:
+                    yield file_path, start, fn(*args), False
+                except Exception as e:
+                    logging.error(f"Failed to load pages of document {file_path}: {e}")
+                    yield file_path, start, None, False
+            return
+
+        max_in_flight = 2 * (max_workers or os.cpu_count() or 1)
+
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            in_flight: deque = deque()
+
+            for file_path, start, fn, args in tasks:
+                if fn is None:
+                    future = Future()
+                    future.set_result(args)
+                else:
+                    future = pool.submit(fn, *args)
+
+                in_flight.append((file_path, start, future, fn is None))
+
+                if len(in_flight) >= max_in_flight:
+                    yield self._drain(in_flight.popleft())
+
+            while in_flight:
+                yield self._drain(in_flight.popleft())
+
+    def _page_tasks(
+        self, file_paths: Iterable[str], method: str, tables: bool, failed: Set[str]
+    ) -> Iterator[Tuple]:
+        """
+        Yield (document path, first page index, function, arguments) extraction tasks. Documents found
+        in the cache are yielded as a single task without a function, whose arguments are the pages.
+        Documents that cannot be opened are added to failed.
+        """
+        for file_path in file_paths:
+            if not os.path.exists(file_path):
+                logging.error(f"Document not found: {file_path}")
+                failed.add(file_path)
+                continue
+
+            if self.cache is not None:
+                if tables:
+                    pages = self.cache.get_page_tables(file_path)
+                else:
+                    pages = self.cache.get_pages(file_path)
+                if pages is not None:
+                    yield file_path, 0, None, pages
+                    continue
+
+            if Path(file_path).suffix.lower() != '.pdf':
+                yield file_path, 0, _extract_document, (file_path, tables)
+                continue
+
+            try:
+                n_pages = self.count_pdf_pages(file_path, method=method)
+            except Exception as e:
+                logging.error(f"Failed to load document {file_path}: {e}")
+                failed.add(file_path)
+                continue
+
+            for start in range(0, n_pages, PAGES_PER_TASK):
+                end = min(start + PAGES_PER_TASK, n_pages)
+                if tables:
+                    yield file_path, start, _extract_pdf_page_tables, (file_path, start, end)
+                else:
+                    yield file_path, start, _extract_pdf_pages, (file_path, start, end, method)
+
+    @staticmethod
+    def _drain(
+        task: Tuple[str, int, Future, bool]
+    ) -> Tuple[str, int, Optional[List], bool]:
+        file_path, start, future, cached = task
+        try:
+            return file_path, start, future.result(), cached
+        except Exception as e:
+            logging.error(f"Failed to load pages of document {file_path}: {e}")
+            return file_path, start, None, cached
+
     def extract_tables_from_pdf(self, file_path: str) -> List[Dict]:
         """
         Extract tables from PDF using pdfplumber.
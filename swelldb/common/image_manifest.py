@@ -0,0 +1,272 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional
+
+try:
+    from PIL import Image
+except ImportError as e:
+    logging.warning(f"Pillow not installed, near-duplicate images will not be detected: {e}")
+    Image = None
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff", ".webp"}
+
+_DHASH_SIZE: int = 8
+_DHASH_BITS: int = _DHASH_SIZE * _DHASH_SIZE
+
+
+class ImageFile(NamedTuple):
+    path: str
+    size: int
+    mtime_ns: int
+
+
+def scan_images(paths: List[str]) -> List[ImageFile]:
+    """
+    Lists the image files of the given files and directories in a single pass over each directory,
+    matching the extensions case-insensitively. The files of each directory are sorted by name.
+    """
+    images: List[ImageFile] = []
+
+    for path in paths:
+        if os.path.isdir(path):
+            with os.scandir(path) as entries:
+                found: List[ImageFile] = [
+                    ImageFile(entry.path, stat.st_size, stat.st_mtime_ns)
+                    for entry in entries
+                    if entry.is_file()
+                    and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+                    for stat in (entry.stat(),)
+                ]
+            images.extend(sorted(found))
+        elif os.path.isfile(path):
+            stat = os.stat(path)
+            images.append(ImageFile(path, stat.st_size, stat.st_mtime_ns))
+        else:
+            logging.warning(f"Image file not found: {path}")
+
+    return images
+
+
+def dhash(path: str) -> int:
+    """
+    The 64-bit difference hash of an image: the image is shrunk to 9x8 grayscale pixels, and each bit
+    tells whether a pixel is brighter than its right neighbour. Resized copies and re-encodings of an
+    image have hashes with a small Hamming distance. Runs in a worker process.
+    """
+    with Image.open(path) as image:
+        # JPEG images can be decoded at a fraction of their size, which is all the hash needs
+        image.draft("L", (_DHASH_SIZE * 8, _DHASH_SIZE * 8))
+        pixels: bytes = (
+            image.convert("L")
+            .resize((_DHASH_SIZE + 1, _DHASH_SIZE), Image.Resampling.LANCZOS)
+            .tobytes()
+        )
+
+    value: int = 0
+    for row in range(_DHASH_SIZE):
+        for col in range(_DHASH_SIZE):
+            left: int = pixels[row * (_DHASH_SIZE + 1) + col]
+            right: int = pixels[row * (_DHASH_SIZE + 1) + col + 1]
+            value = value << 1 | (left > right)
+
+    return value
+
+
+def _safe_dhash(path: str) -> Optional[int]:
+    try:
+        return dhash(path)
+    except Exception as e:
+        logging.error(f"Failed to hash image {path}: {e}")
+        return None
+
+
+def group_near_duplicates(hashes: Dict[str, Optional[int]], max_distance: int) -> List[List[str]]:
+    """
+    Groups the paths whose hashes are within max_distance bits of the first path of a group. Paths
+    without a hash form their own groups. The groups keep the order of the paths.
+
+    The hashes are split into max_distance + 1 bands, so that two hashes within the distance share at
+    least one band and only the hashes sharing a band are compared.
+    """
+    n_bands: int = max_distance + 1
+    band_bits: int = -(-_DHASH_BITS // n_bands)
+    band_mask: int = (1 << band_bits) - 1
+
+    bands: List[Dict[int, List[int]]] = [defaultdict(list) for _ in range(n_bands)]
+    groups: List[List[str]] = []
+    group_hashes: List[int] = []
+
+    for path, value in hashes.items():
+        if value is None:
+            groups.append([path])
+            group_hashes.append(None)
+            continue
+
+        keys: List[int] = [value >> (band * band_bits) & band_mask for band in range(n_bands)]
+
+        group: Optional[int] = None
+        for band, key in enumerate(keys):
+            for candidate in bands[band].get(key, []):
+                if bin(value ^ group_hashes[candidate]).count("1") <= max_distance:
+                    group = candidate
+                    break
+            if group is not None:
+                break
+
+        if group is not None:
+            groups[group].append(path)
+            continue
+
+        groups.append([path])
+        group_hashes.append(value)
+        for band, key in enumerate(keys):
+            bands[band][key].append(len(groups) - 1)
+
+    return groups
+
+
+class ImageManifest:
+    """
+    A persistent record of the images of previous runs: the size, modification time and perceptual hash
+    of each file, and the rows extracted from it for each table. Unchanged images are not hashed again,
+    and reuse their rows instead of being sent to the LLM.
+
+    Examples:
+        >>> manifest = ImageManifest("/data/photos.manifest.sqlite", max_distance=4)
+        >>> builder.set_image_manifest(manifest)
+    """
+
+    def __init__(self, path: str, max_distance: int = 4, max_workers: int = None):
+        """
+        Args:
+            path: The SQLite file of the manifest.
+            max_distance: The maximum Hamming distance of the hashes of near-duplicate images. Negative
+                values disable near-duplicate detection.
+            max_workers: The number of processes that hash the images. Defaults to the number of CPUs.
+        """
+        self._max_distance: int = max_distance
+        self._max_workers: int = max_workers
+        self._lock = threading.Lock()
+
+        directory: str = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS images (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                dhash TEXT
+            );
+            CREATE TABLE IF NOT EXISTS rows (
+                table_key TEXT NOT NULL,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                rows TEXT NOT NULL,
+                PRIMARY KEY (table_key, path)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def get_hashes(self, images: List[ImageFile]) -> Dict[str, Optional[int]]:
+        """
+        Returns the perceptual hash of each image, or None for images that cannot be decoded. Only new
+        and changed images are hashed.
+        """
+        hashes: Dict[str, Optional[int]] = dict()
+        pending: List[ImageFile] = []
+
+        with self._lock:
+            for image in images:
+                row = self._conn.execute(
+                    "SELECT dhash FROM images WHERE path = ? AND size = ? AND mtime_ns = ?",
+                    (os.path.abspath(image.path), image.size, image.mtime_ns),
+                ).fetchone()
+
+                if row is None:
+                    pending.append(image)
+                else:
+                    hashes[image.path] = None if row[0] is None else int(row[0], 16)
+
+        if pending and Image is not None:
+            paths: List[str] = [image.path for image in pending]
+
+            if len(paths) == 1 or self._max_workers == 1:
+                values: List[Optional[int]] = [_safe_dhash(path) for path in paths]
+            else:
+                with ProcessPoolExecutor(max_workers=self._max_workers) as pool:
+                    values = list(pool.map(_safe_dhash, paths))
+
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?)",
+                    [
+                        (
+                            os.path.abspath(image.path),
+                            image.size,
+                            image.mtime_ns,
+                            None if value is None else f"{value:016x}",
+                        )
+                        for image, value in zip(pending, values)
+                    ],
+                )
+                self._conn.commit()
+
+            hashes.update(zip(paths, values))
+
+        logging.info(f"Hashed {len(pending)} new or changed images of {len(images)}")
+
+        # Keep the order of the images
+        return {image.path: hashes.get(image.path) for image in images}
+
+    def group_near_duplicates(self, hashes: Dict[str, Optional[int]]) -> List[List[str]]:
+        if self._max_distance < 0:
+            return [[path] for path in hashes]
+
+        return group_near_duplicates(hashes, self._max_distance)
+
+    def get_rows(self, table_key: str, images: List[ImageFile]) -> Dict[str, List[List[Any]]]:
+        """
+        Returns the rows previously extracted from the unchanged images for the given table.
+        """
+        rows: Dict[str, List[List[Any]]] = dict()
+
+        with self._lock:
+            for image in images:
+                row = self._conn.execute(
+                    "SELECT rows FROM rows WHERE table_key = ? AND path = ? AND size = ? AND mtime_ns = ?",
+                    (table_key, os.path.abspath(image.path), image.size, image.mtime_ns),
+                ).fetchone()
+
+                if row is not None:
+                    rows[image.path] = json.loads(row[0])
+
+        return rows
+
+    def put_rows(self, table_key: str, rows: Dict[ImageFile, List[List[Any]]]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO rows VALUES (?, ?, ?, ?, ?)",
+                [
+                    (table_key, os.path.abspath(image.path), image.size, image.mtime_ns, json.dumps(values))
+                    for image, values in rows.items()
+                ],
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,292 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import hashlib
+import io
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Set
+
+from swelldb.prompt.multimodal_prompt import ImageRef
+
+try:
+    from PIL import Image, ImageOps
+except ImportError as e:
+    logging.warning(f"Pillow not installed, images will be sent without preprocessing: {e}")
+    Image = None
+    ImageOps = None
+
+_HASH_BLOCK_SIZE: int = 1 << 20
+
+# Output format -> MIME type
+_FORMATS: Dict[str, str] = {
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+}
+
+# The formats of the originals that can be sent unchanged. Others, e.g. TIFF or BMP, are re-encoded
+_SENDABLE_FORMATS: Set[str] = {"JPEG", "PNG", "GIF", "WEBP"}
+
+_TEMP_CACHE_DIR: Optional[tempfile.TemporaryDirectory] = None
+_TEMP_CACHE_DIR_LOCK: threading.Lock = threading.Lock()
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    """
+    Estimates the input tokens of an image for a vision model, using the tiling scheme of OpenAI models:
+    the image is fit into 2048x2048, scaled so that its shortest side is at most 768, and costs 170
+    tokens per 512x512 tile plus 85.
+    """
+    scale: float = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+def _temp_cache_dir() -> str:
+    """
+    The directory of the preprocessed images when no cache directory is given. It is shared by all
+    preprocessors, since the file names are content hashes, and outlives them, since the returned
+    references may be read after their preprocessor is gone.
+    """
+    global _TEMP_CACHE_DIR
+
+    with _TEMP_CACHE_DIR_LOCK:
+        if _TEMP_CACHE_DIR is None:
+            _TEMP_CACHE_DIR = tempfile.TemporaryDirectory(prefix="swelldb_images_")
+        return _TEMP_CACHE_DIR.name
+
+
+def _preprocess(path: str, max_edge: Optional[int], image_format: str, quality: int) -> bytes:
+    """
+    Decodes an image, downscales it so that its longest edge is at most max_edge, and re-encodes it.
+    Runs in a worker process.
+    """
+    with open(path, "rb") as f:
+        original: bytes = f.read()
+
+    with Image.open(io.BytesIO(original)) as image:
+        sendable: bool = image.format in _SENDABLE_FORMATS
+
+        # Camera images are often stored sideways, with the rotation in their EXIF data
+        image = ImageOps.exif_transpose(image)
+        resized: bool = bool(max_edge) and max(image.size) > max_edge
+
+        if resized:
+            image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+        if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+            # JPEG has no alpha channel: transparent areas become white
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode not in ("RGB", "RGBA", "L"):
+            image = image.convert("RGBA")
+
+        output = io.BytesIO()
+        image.save(output, format=image_format, quality=quality)
+
+    # Re-encoding a small, already compressed image can make it larger
+    if sendable and not resized and len(original) <= output.tell():
+        return original
+
+    return output.getvalue()
+
+
+class ImagePreprocessor:
+    """
+    Shrinks images before they are sent to a vision model: each image is downscaled to a maximum edge
+    and re-encoded as JPEG or WebP, in a process pool. Vision models downscale large images anyway and
+    bill by resolution, so this mostly saves upload bytes and tokens.
+
+    The results are written to disk as they are encoded, and the returned references point to the
+    files, so the images are only read when their prompts are sent. With a cache directory, the files
+    are kept, keyed by the content hash of the image and the preprocessing parameters, so that
+    unchanged and duplicate images are processed only once. Otherwise they go to a temporary directory
+    that is removed when the process exits.
+
+    Examples:
+        >>> preprocessor = ImagePreprocessor(max_edge=1024, image_format="WEBP", quality=80, cache_dir="/tmp/images")
+        >>> refs = preprocessor.process(["photos/1.jpg", "photos/2.jpg"])
+    """
+
+    def __init__(
+        self,
+        max_edge: Optional[int] = 1536,
+        image_format: str = "JPEG",
+        quality: int = 85,
+        cache_dir: str = None,
+        max_workers: int = None,
+    ):
+        """
+        Args:
+            max_edge: The maximum width and height in pixels. None keeps the original size.
+            image_format: "JPEG" or "WEBP".
+            quality: The encoder quality, from 1 to 100.
+            cache_dir: The directory of the preprocessed images. None uses a temporary directory.
+            max_workers: The number of worker processes. Defaults to the number of CPUs.
+        """
+        image_format = image_format.upper()
+
+        if image_format not in _FORMATS:
+            raise ValueError(f"Unsupported image format: {image_format}. Use one of {list(_FORMATS)}")
+
+        self._max_edge: Optional[int] = max_edge
+        self._image_format: str = image_format
+        self._quality: int = quality
+        self._max_workers: int = max_workers
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        else:
+            cache_dir = _temp_cache_dir()
+
+        self._cache_dir: str = cache_dir
+
+    def get_max_edge(self) -> Optional[int]:
+        return self._max_edge
+
+    def get_mime_type(self) -> str:
+        return _FORMATS[self._image_format]
+
+    def process(self, paths: List[str]) -> List[Optional[ImageRef]]:
+        """
+        Preprocesses the images. The results follow the order of the paths; images that cannot be read
+        or decoded are None.
+        """
+        if Image is None:
+            return [ImageRef(path=path) if os.path.isfile(path) else None for path in paths]
+
+        start: float = time.perf_counter()
+
+        digests: List[Optional[str]] = []
+        for path in paths:
+            try:
+                digests.append(file_digest(path))
+            except OSError as e:
+                logging.error(f"Failed to read image {path}: {e}")
+                digests.append(None)
+
+        # Each distinct image is processed once, unless its result is already cached
+        pending: Dict[str, str] = dict()
+        for path, digest in zip(paths, digests):
+            if digest and digest not in pending and not self._is_cached(digest):
+                pending[digest] = path
+
+        processed: Set[str] = self._run(pending)
+
+        results: List[Optional[ImageRef]] = []
+        original_bytes: int = 0
+        output_bytes: int = 0
+
+        for path, digest in zip(paths, digests):
+            if digest is None or (digest in pending and digest not in processed):
+                results.append(None)
+                continue
+
+            ref = ImageRef(
+                path=self._cache_path(digest),
+                mime_type=self._mime_type(digest),
+                name=os.path.basename(path),
+            )
+
+            output_bytes += os.path.getsize(ref.get_path())
+            original_bytes += os.path.getsize(path)
+            results.append(ref)
+
+        logging.info(
+            f"Preprocessed {len(paths)} images ({len(pending)} encoded, the rest cached or duplicates) "
+            f"in {time.perf_counter() - start:.2f}s: {original_bytes} to {output_bytes} bytes"
+        )
+
+        return results
+
+    def _run(self, pending: Dict[str, str]) -> Set[str]:
+        """
+        Preprocesses the pending images, by digest, and returns the digests of the written ones. Each
+        output is written as soon as it arrives, so the encoded images are not held in memory together.
+        """
+        args = [(path, self._max_edge, self._image_format, self._quality) for path in pending.values()]
+        processed: Set[str] = set()
+
+        if len(args) <= 1 or self._max_workers == 1:
+            for digest, arg in zip(pending, args):
+                output: Optional[bytes] = self._safe_preprocess(*arg)
+                if output is not None:
+                    self._write(digest, output)
+                    processed.add(digest)
+            return processed
+
+        with ProcessPoolExecutor(max_workers=self._max_workers) as pool:
+            futures = {pool.submit(_preprocess, *arg): digest for digest, arg in zip(pending, args)}
+
+            for future in as_completed(futures):
+                digest: str = futures[future]
+                try:
+                    self._write(digest, future.result())
+                    processed.add(digest)
+                except Exception as e:
+                    logging.error(f"Failed to preprocess image {pending[digest]}: {e}")
+
+        return processed
+
+    @staticmethod
+    def _safe_preprocess(*args) -> Optional[bytes]:
+        try:
+            return _preprocess(*args)
+        except Exception as e:
+            logging.error(f"Failed to preprocess image {args[0]}: {e}")
+            return None
+
+    def _cache_key(self, digest: str) -> str:
+        return f"{digest}-{self._max_edge}-{self._image_format.lower()}-{self._quality}"
+
+    def _cache_path(self, digest: str) -> str:
+        return os.path.join(self._cache_dir, f"{self._cache_key(digest)}.img")
+
+    def _is_cached(self, digest: str) -> bool:
+        return os.path.exists(self._cache_path(digest))
+
+    def _mime_type(self, digest: str) -> str:
+        with open(self._cache_path(digest), "rb") as f:
+            return self._detect_mime_type(f.read(16))
+
+    def _detect_mime_type(self, data: bytes) -> str:
+        """Originals that were kept because re-encoding would enlarge them keep their own format."""
+        if data.startswith(b"\xff\xd8"):
+            return "image/jpeg"
+        if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+            return "image/webp"
+        if data.startswith(b"\x89PNG"):
+            return "image/png"
+        if data.startswith(b"GIF8"):
+            return "image/gif"
+        return self.get_mime_type()
+
+    def _write(self, digest: str, data: bytes) -> None:
+        path: str = self._cache_path(digest)
+        tmp_path: str = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+
+        os.replace(tmp_path, path)
@@ -0,0 +1,98 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    An in-memory BM25 index over a list of passages.
+
+    Examples:
+        >>> index = BM25Index(["Apple is based in Cupertino", "Microsoft is based in Redmond"])
+        >>> index.top_passages("microsoft", top_k=1)
+        ['Microsoft is based in Redmond']
+    """
+
+    def __init__(self, passages: List[str], k1: float = 1.5, b: float = 0.75):
+        self._passages: List[str] = passages
+        self._k1: float = k1
+        self._b: float = b
+
+        # term -> [(passage id, term frequency)]
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._lengths: List[int] = []
+
+        for passage_id, passage in enumerate(passages):
+            terms: List[str] = tokenize(passage)
+            self._lengths.append(len(terms))
+
+            for term, tf in Counter(terms).items():
+                self._postings[term].append((passage_id, tf))
+
+        self._avg_length: float = (
+            sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+        )
+
+    def __len__(self) -> int:
+        return len(self._passages)
+
+    def get_passage(self, passage_id: int) -> str:
+        return self._passages[passage_id]
+
+    def search(
+        self, query: str, top_k: int = 10, require_all_terms: bool = False
+    ) -> List[Tuple[int, float]]:
+        """
+        Returns up to top_k (passage id, score) pairs, best first. Passages that share no term with
+        the query are never returned. With require_all_terms, only the passages that contain every term
+        of the query are returned, e.g. the passages that mention an entity name.
+        """
+        n: int = len(self._passages)
+        scores: Dict[int, float] = defaultdict(float)
+        terms: set = set(tokenize(query))
+
+        if require_all_terms:
+            candidates: set = None
+            for term in terms:
+                ids = {passage_id for passage_id, _ in self._postings.get(term, [])}
+                candidates = ids if candidates is None else candidates & ids
+                if not candidates:
+                    return []
+
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+
+            idf: float = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+
+            for passage_id, tf in postings:
+                if require_all_terms and passage_id not in candidates:
+                    continue
+
+                norm: float = self._k1 * (
+                    1 - self._b + self._b * self._lengths[passage_id] / self._avg_length
+                )
+                scores[passage_id] += idf * tf * (self._k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:top_k]
+
+    def top_passages(self, query: str, top_k: int = 10) -> List[str]:
+        """
+        Returns the top_k passages for the query, in their original order.
+        """
+        ids: List[int] = sorted(passage_id for passage_id, _ in self.search(query, top_k))
+        return [self._passages[passage_id] for passage_id in ids]
@@ -0,0 +1,194 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import re
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional
+
+import pyarrow as pa
+
+from swelldb.table_plan.swelldb_schema import SwellDBSchema
+
+_NON_ALNUM_PATTERN = re.compile(r"[^0-9a-z]+")
+_NUMBER_PATTERN = re.compile(r"^[-+]?\d*\.?\d+(e[-+]?\d+)?$", re.IGNORECASE)
+_NUMBER_NOISE_PATTERN = re.compile(r"[,\s$€£¥%]|\[\d+\]")
+
+_TRUE_VALUES = {"true", "yes", "y", "1"}
+_FALSE_VALUES = {"false", "no", "n", "0"}
+
+
+def normalize_header(name: str) -> str:
+    return _NON_ALNUM_PATTERN.sub("_", str(name or "").lower()).strip("_")
+
+
+def header_similarity(header: str, attribute: str) -> float:
+    """
+    Similarity of a table header and a schema attribute name, in [0, 1].
+    """
+    header, attribute = normalize_header(header), normalize_header(attribute)
+
+    if not header or not attribute:
+        return 0.0
+
+    if header == attribute:
+        return 1.0
+
+    ratio: float = SequenceMatcher(None, header, attribute).ratio()
+
+    header_tokens, attribute_tokens = set(header.split("_")), set(attribute.split("_"))
+    overlap: float = len(header_tokens & attribute_tokens) / len(
+        header_tokens | attribute_tokens
+    )
+
+    # "Company" for "company_name", or "GDP (USD)" for "gdp"
+    if header_tokens <= attribute_tokens or attribute_tokens <= header_tokens:
+        overlap = max(overlap, 0.8)
+
+    return max(ratio, overlap)
+
+
+def coerce_value(value: Any, dtype: pa.DataType) -> Any:
+    """
+    Converts a cell value to the given Arrow type. Returns None if the value cannot be converted.
+    """
+    if value is None:
+        return None
+
+    text: str = str(value).strip()
+
+    if not text or text in ("-", "—", "–", "n/a", "N/A"):
+        return None
+
+    if pa.types.is_string(dtype) or pa.types.is_large_string(dtype):
+        return text
+
+    if pa.types.is_boolean(dtype):
+        lowered: str = text.lower()
+        if lowered in _TRUE_VALUES:
+            return True
+        if lowered in _FALSE_VALUES:
+            return False
+        return None
+
+    if pa.types.is_integer(dtype) or pa.types.is_floating(dtype):
+        number: str = _NUMBER_NOISE_PATTERN.sub("", text)
+
+        if not _NUMBER_PATTERN.match(number):
+            return None
+
+        if pa.types.is_integer(dtype):
+            parsed: float = float(number)
+            return int(parsed) if parsed.is_integer() else None
+
+        return float(number)
+
+    return text
+
+
+def _type_compatibility(values: List[Any], dtype: pa.DataType) -> float:
+    """
+    The fraction of the non-empty values that can be converted to the given type.
+    """
+    non_empty: List[Any] = [v for v in values if v is not None and str(v).strip()]
+
+    if not non_empty:
+        return 0.0
+
+    return sum(coerce_value(v, dtype) is not None for v in non_empty) / len(non_empty)
+
+
+def match_columns(
+    header: List[str],
+    rows: List[List[Any]],
+    schema: SwellDBSchema,
+    threshold: float = 0.75,
+) -> Dict[str, int]:
+    """
+    Maps the attributes of the schema onto the columns of a table, by header name similarity and by
+    how well the values of each column convert to the attribute type. Each table column is mapped to
+    at most one attribute.
+
+    Returns:
+        A dictionary from attribute name to table column index, for the matched attributes only.
+    """
+    candidates: List = []
+
+    for attribute in schema.get_attributes():
+        for idx, name in enumerate(header):
+            similarity: float = header_similarity(name, attribute.get_name())
+
+            if similarity < threshold:
+                continue
+
+            values: List[Any] = [row[idx] for row in rows if idx < len(row)]
+            compatibility: float = _type_compatibility(values, attribute.get_data_type())
+
+            # Values that mostly fail to convert mean that the header matched by accident
+            if values and compatibility < 0.5:
+                continue
+
+            candidates.append((similarity + 0.5 * compatibility, attribute.get_name(), idx))
+
+    mapping: Dict[str, int] = dict()
+    used_columns: set = set()
+
+    for _, attribute_name, idx in sorted(candidates, reverse=True):
+        if attribute_name in mapping or idx in used_columns:
+            continue
+
+        mapping[attribute_name] = idx
+        used_columns.add(idx)
+
+    return mapping
+
+
+def rows_to_arrow(
+    rows: List[List[Any]], mapping: Dict[str, int], schema: SwellDBSchema
+) -> pa.Table:
+    """
+    Converts the rows of a table to an Arrow table with the given schema, using a mapping created by
+    match_columns. Attributes that are not in the mapping are null.
+    """
+    columns: Dict[str, List[Any]] = dict()
+
+    for attribute in schema.get_attributes():
+        idx: Optional[int] = mapping.get(attribute.get_name())
+        dtype: pa.DataType = attribute.get_data_type()
+
+        if idx is None:
+            columns[attribute.get_name()] = [None] * len(rows)
+        else:
+            columns[attribute.get_name()] = [
+                coerce_value(row[idx], dtype) if idx < len(row) else None
+                for row in rows
+            ]
+
+    return pa.table(columns, schema=schema.to_arrow_schema())
+
+
+def match_table(
+    table: List[List[Any]],
+    schema: SwellDBSchema,
+    base_columns: List[str] = None,
+    min_coverage: float = 0.5,
+) -> Optional[pa.Table]:
+    """
+    Converts an extracted table, whose first row holds the headers, to an Arrow table with the given
+    schema. The table is rejected (None) unless it maps all the base columns and at least min_coverage
+    of the schema attributes.
+    """
+    if len(table) < 2:
+        return None
+
+    header, rows = table[0], table[1:]
+    mapping: Dict[str, int] = match_columns(header, rows, schema)
+
+    if base_columns and any(column not in mapping for column in base_columns):
+        return None
+
+    if len(mapping) < min_coverage * len(schema.get_attributes()):
+        return None
+
+    return rows_to_arrow(rows, mapping, schema)
@@ -1,16 +1,172 @@
-from typing import List
+import functools
+import logging
+from typing import Iterable, Iterator, List, Tuple
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+@functools.lru_cache(maxsize=None)
+def _get_encoding(encoding_name: str):
+    if tiktoken is None:
+        return None
+
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        logging.warning(f"Tokenizer {encoding_name} not available, estimating token counts: {e}")
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def encoding_for_model(model_name: str) -> str:
+    """
+    The name of the tiktoken encoding of the model. Models unknown to tiktoken, e.g. open-weight
+    models served by Ollama, are approximated with cl100k_base.
+    """
+    if tiktoken is not None and model_name:
+        try:
+            return tiktoken.encoding_for_model(model_name).name
+        except Exception:
+            pass
+
+    return "cl100k_base"
+
+
+def count_tokens(text: str, encoding_name: str = "cl100k_base") -> int:
+    """
+    Counts the tokens of the text with the given tiktoken encoding. Falls back to an estimate of
+    four characters per token if tiktoken is not available.
+    """
+    encoding = _get_encoding(encoding_name)
+
+    if encoding is None:
+        return (len(text) + 3) // 4
+
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+# Page breaks first, then section headings, paragraphs, lines, sentences and words
+SEPARATORS: List[str] = ["\f", "\n#", "\n\n", "\n", ". ", " ", ""]
+
+# Page texts are joined with a form feed, so that chunks preferably end at a page break
+PAGE_SEPARATOR: str = "\f"
+
+
 class Splitter:
-    def __init__(self, chunk_size: int = 4000, chunk_overlap: int = 50):
+    """
+    Splits text into overlapping chunks. By default chunks are measured in characters; with an encoding
+    name they are measured in tokens of that tiktoken encoding. The underlying splitter is built once
+    and reused across calls.
+    """
+
+    def __init__(
+        self, chunk_size: int = 4000, chunk_overlap: int = 50, encoding_name: str = None
+    ):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.encoding_name = encoding_name
 
-    def split(self, text: str) -> List[str]:
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap
+        self._splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            separators=SEPARATORS,
+            length_function=self.length,
         )
-        return splitter.split_text(text)
\ No newline at end of file
+
+    @staticmethod
+    def for_model(
+        model_name: str = None,
+        context_window: int = 8192,
+        context_fraction: float = 0.5,
+        prompt_tokens: int = 0,
+        output_tokens: int = 4096,
+        overlap_tokens: int = 100,
+        max_chunk_tokens: int = 32000,
+    ) -> "Splitter":
+        """
+        A token-based splitter whose chunks fill a fraction of the context window of the model, after
+        reserving room for the prompt template and the expected output.
+
+        Args:
+            model_name: The model, which determines the tokenizer.
+            context_window: The context window of the model, in tokens.
+            context_fraction: The fraction of the remaining context filled by a chunk.
+            prompt_tokens: The tokens of the prompt template the chunk is embedded in.
+            output_tokens: The tokens reserved for the response.
+            overlap_tokens: The overlap between consecutive chunks.
+            max_chunk_tokens: An upper bound for models with very long contexts, where extraction
+                quality drops long before the context is full.
+        """
+        available: int = context_window - prompt_tokens - output_tokens
+        chunk_size: int = min(max_chunk_tokens, max(256, int(available * context_fraction)))
+
+        return Splitter(
+            chunk_size=chunk_size,
+            chunk_overlap=min(overlap_tokens, chunk_size // 4),
+            encoding_name=encoding_for_model(model_name),
+        )
+
+    def length(self, text: str) -> int:
+        """The length of the text in the unit of the splitter, characters or tokens."""
+        if self.encoding_name is None:
+            return len(text)
+
+        return count_tokens(text, self.encoding_name)
+
+    def get_signature(self) -> str:
+        """Identifies the chunks this splitter produces, e.g. for caching them."""
+        unit: str = self.encoding_name or "chars"
+        return f"{unit}-{self.chunk_size}-{self.chunk_overlap}"
+
+    def split(self, text: str) -> List[str]:
+        return self._splitter.split_text(text)
+
+    def split_pages(
+        self, pages: Iterable[Tuple[str, int, str]]
+    ) -> Iterator[Tuple[str, int, str]]:
+        """
+        Splits a stream of (document, page number, text) records into chunks, without materializing
+        the documents. At most a couple of chunks worth of text is buffered at any time, chunks never
+        span two documents, and page breaks are the preferred chunk boundaries.
+
+        Yields:
+            (document, page number, chunk) records, where the page number is the page the chunk starts in
+        """
+        doc = None
+        first_page: int = 0
+        buffer: List[str] = []
+        buffered: int = 0
+
+        for page_doc, page_no, text in pages:
+            if page_doc != doc:
+                if buffer:
+                    for chunk in self.split(PAGE_SEPARATOR.join(buffer)):
+                        yield doc, first_page, chunk
+                doc, first_page, buffer, buffered = page_doc, page_no, [], 0
+
+            if not buffer:
+                first_page = page_no
+
+            buffer.append(text)
+            buffered += self.length(text)
+
+            if buffered >= 2 * self.chunk_size:
+                chunks: List[str] = self.split(PAGE_SEPARATOR.join(buffer))
+
+                for chunk in chunks[:-1]:
+                    yield doc, first_page, chunk
+
+                # The last chunk may continue on the next page
+                buffer = chunks[-1:]
+                buffered = sum(self.length(chunk) for chunk in buffer)
+                first_page = page_no
+
+        if buffer:
+            for chunk in self.split(PAGE_SEPARATOR.join(buffer)):
+                yield doc, first_page, chunk
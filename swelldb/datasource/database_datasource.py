@@ -3,7 +3,7 @@
 # This file is part of SwellDB and is licensed under the MIT License.
 # See the LICENSE file in the project root for more information.
 
-from typing import Dict
+from typing import Any, Dict, List
 
 from swelldb.datasource.datasource import Datasource
 
@@ -14,5 +14,39 @@ class DatabaseDatasource(Datasource):
     def sql(self, query: str) -> pa.Table:
         raise NotImplementedError()
 
-    def schema(self) -> Dict[str, str]:
+    def sql_stream(self, query: str, parameters: List[Any] = None) -> pa.RecordBatchReader:
         raise NotImplementedError()
+
+    def scan(
+        self,
+        table: str,
+        columns: Dict[str, str],
+        filters: List[str] = None,
+        parameters: List[Any] = None,
+    ) -> pa.RecordBatchReader:
+        raise NotImplementedError()
+
+    def validate(self, query: str) -> None:
+        raise NotImplementedError()
+
+    def quote_identifier(self, name: str) -> str:
+        raise NotImplementedError()
+
+    def schema(self) -> Dict[str, List[str]]:
+        raise NotImplementedError()
+
+    def get_arrow_schema(self, table: str) -> pa.Schema:
+        raise NotImplementedError()
+
+    def get_tables(self) -> Dict[str, str]:
+        raise NotImplementedError()
+
+    def close(self) -> None:
+        """Closes the connections to the database."""
+        pass
+
+    def __enter__(self) -> "DatabaseDatasource":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
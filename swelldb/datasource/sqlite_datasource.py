@@ -3,35 +3,397 @@
 # This file is part of SwellDB and is licensed under the MIT License.
 # See the LICENSE file in the project root for more information.
 
-from typing import Dict, List
+import itertools
+import logging
+import pathlib
+import queue
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import pyarrow as pa
-import sqlite3
-import pandas as pd
 
 from swelldb.datasource.database_datasource import DatabaseDatasource
+from swelldb.engine.schema_catalog import TableInfo
+
+
+def declared_type(decl_type: str) -> Optional[pa.DataType]:
+    """
+    The Arrow type of a column with the given declared SQLite type, following the type affinity rules
+    of SQLite. Columns with NUMERIC or BLOB affinity, which may hold values of any type, return None.
+    """
+    decl_type = (decl_type or "").upper()
+
+    if "INT" in decl_type:
+        return pa.int64()
+    if "CHAR" in decl_type or "CLOB" in decl_type or "TEXT" in decl_type:
+        return pa.string()
+    if "REAL" in decl_type or "FLOA" in decl_type or "DOUB" in decl_type:
+        return pa.float64()
+
+    return None
+
+
+def widen_type(data_type: pa.DataType, has_text: bool, has_real: bool) -> pa.DataType:
+    """
+    The type of a column that may also hold text or real values, which SQLite allows in columns of any
+    declared type: integers are widened to float64 for real values, and any type to string for text.
+    """
+    if has_text:
+        return pa.string()
+    if has_real and pa.types.is_integer(data_type):
+        return pa.float64()
+
+    return data_type
 
 
 class SQLiteDatasource(DatabaseDatasource):
-    def __init__(self, path: str):
+    """
+    A SQLite database. Query results are fetched in batches straight into Arrow arrays, and
+    concurrent queries run on a small pool of connections.
+
+    Examples:
+        >>> db = SQLiteDatasource("/data/cities.sqlite", read_only=True)
+        >>> reader = db.scan("cities", {"city": "name"}, filters=["country = 'Greece'"])
+    """
+
+    def __init__(
+        self,
+        path: str,
+        pool_size: int = 4,
+        batch_size: int = 65536,
+        timeout: float = 60.0,
+        read_only: bool = False,
+    ):
+        """
+        Args:
+            path: The SQLite database file, which is created if it does not exist, or ":memory:" for an
+                in-memory database that the connections of the pool share.
+            pool_size: The maximum number of open connections, i.e. of concurrent queries. A stream
+                holds its connection until it is read to the end or closed.
+            batch_size: The number of rows fetched into each record batch.
+            timeout: The number of seconds a query waits for a connection when all of them are in use.
+            read_only: Whether to open an existing database file without write access.
+        """
         self.path = path
-        self.cursor = sqlite3.connect(path)
+
+        if path == ":memory:":
+            # A named in-memory database lives as long as one of its connections is open
+            self._uri: str = f"file:swelldb_{uuid.uuid4().hex}?mode=memory&cache=shared"
+        else:
+            self._uri = pathlib.Path(path).absolute().as_uri() + ("?mode=ro" if read_only else "")
+
+        self._batch_size: int = batch_size
+        self._timeout: float = timeout
+        self._pool: queue.LifoQueue = queue.LifoQueue(maxsize=pool_size)
+        self._pool_size: int = pool_size
+        self._n_connections: int = 0
+        self._closed: bool = False
+        self._lock = threading.Lock()
+
+        # Fail early if the database cannot be opened
+        with self._connection() as conn:
+            conn.execute("SELECT 1 FROM sqlite_master LIMIT 1")
+
+    def _acquire(self) -> sqlite3.Connection:
+        if self._closed:
+            raise ValueError(f"The database {self.path} is closed")
+
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._n_connections < self._pool_size:
+                self._n_connections += 1
+                return sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+
+        # Wait for a running query to finish
+        try:
+            return self._pool.get(timeout=self._timeout)
+        except queue.Empty:
+            raise TimeoutError(
+                f"All {self._pool_size} connections to {self.path} have been in use for "
+                f"{self._timeout} seconds. Streams that are not read to the end must be closed."
+            )
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            if not self._closed:
+                self._pool.put(conn)
+                return
+
+            self._n_connections -= 1
+
+        # A stream that outlived the datasource
+        conn.close()
+
+    def close(self) -> None:
+        """
+        Closes the connections of the pool. The connections of open streams are closed once the streams
+        are read to the end or closed.
+        """
+        with self._lock:
+            self._closed = True
+
+            while True:
+                try:
+                    conn: sqlite3.Connection = self._pool.get_nowait()
+                except queue.Empty:
+                    break
+
+                conn.close()
+                self._n_connections -= 1
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        conn: sqlite3.Connection = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def quote_identifier(self, name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
 
     def schema(self) -> Dict[str, List[str]]:
-        res = self.cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = [row[0] for row in res.fetchall()]
+        """The column names of each table."""
+        return {
+            table: [name for name, _ in columns] for table, columns in self._get_columns().items()
+        }
+
+    def get_arrow_schema(self, table: str) -> pa.Schema:
+        """
+        The Arrow schema of a table. The types of columns without a definite declared type are
+        inferred from a sample of their values.
+        """
+        columns: List[Tuple[str, str]] = self._get_columns()[table]
+        reader: pa.RecordBatchReader = self.scan(
+            table, {name: name for name, _ in columns}, limit=1000
+        )
+        reader.close()
+
+        return reader.schema
 
-        # Fetch column names for each table
-        table_columns = {}
-        for table in tables:
-            res = self.cursor.execute(f"PRAGMA table_info({table})")
-            columns = [
-                row[1] for row in res.fetchall()
-            ]  # Column names are in the second field
-            table_columns[table] = columns
+    def get_tables(self) -> Dict[str, str]:
+        """The compact rendering of each table, e.g. for planning prompts."""
+        return {
+            table: TableInfo(table, self.get_arrow_schema(table)).render()
+            for table in self._get_columns()
+        }
 
-        return table_columns
+    def validate(self, query: str) -> None:
+        """
+        Plans the query without running it.
+
+        Raises:
+            sqlite3.Error: If the query is invalid.
+        """
+        with self._connection() as conn:
+            conn.execute(f"EXPLAIN QUERY PLAN {query}").fetchall()
 
     def sql(self, query: str) -> pa.Table:
-        df = pd.read_sql_query(query, self.cursor)
-        return pa.table(df)
+        with self.sql_stream(query) as reader:
+            return reader.read_all()
+
+    def scan(
+        self,
+        table: str,
+        columns: Dict[str, str],
+        filters: List[str] = None,
+        parameters: List[Any] = None,
+        limit: int = None,
+    ) -> pa.RecordBatchReader:
+        """
+        Reads the given columns of a table, with the projection and the filters evaluated by SQLite, so
+        that only the needed values are fetched.
+
+        Args:
+            table: The table name.
+            columns: The source column of each output column.
+            filters: SQL conditions over the columns of the table, combined with AND.
+            parameters: The values of the ? placeholders of the filters.
+            limit: The maximum number of rows.
+        """
+        declared: Dict[str, str] = dict(self._get_columns()[table])
+
+        projection: str = ", ".join(
+            f"{self.quote_identifier(source)} AS {self.quote_identifier(name)}"
+            for name, source in columns.items()
+        )
+        query: str = f"SELECT {projection} FROM {self.quote_identifier(table)}"
+
+        if filters:
+            query += " WHERE " + " AND ".join(f"({f})" for f in filters)
+
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+
+        types: Dict[str, Optional[pa.DataType]] = {
+            name: declared_type(declared.get(source)) for name, source in columns.items()
+        }
+
+        return self.sql_stream(query, parameters, types)
+
+    def sql_stream(
+        self,
+        query: str,
+        parameters: List[Any] = None,
+        types: Dict[str, Optional[pa.DataType]] = None,
+    ) -> pa.RecordBatchReader:
+        """
+        Runs a query and streams its rows in record batches. Column types are taken from the given
+        types, or inferred from the first batch; columns without values in the first batch are strings.
+        Numeric columns that also hold real or text values are widened to float64 or string.
+        """
+        types = types or dict()
+        conn: sqlite3.Connection = self._acquire()
+
+        try:
+            cursor: sqlite3.Cursor = conn.execute(query, parameters or [])
+            names: List[str] = [column[0] for column in cursor.description]
+            rows: List[tuple] = cursor.fetchmany(self._batch_size)
+            schema: pa.Schema = self._infer_schema(names, rows, types)
+
+            # Values of other types may follow in later batches
+            if len(rows) == self._batch_size:
+                schema = self._widen_schema(conn, schema, query, parameters)
+        except BaseException:
+            self._release(conn)
+            raise
+
+        def batches() -> Iterator[pa.RecordBatch]:
+            nonlocal rows
+
+            # The connection returns to the pool once the stream is consumed or closed
+            try:
+                while rows:
+                    yield self._to_batch(rows, schema)
+                    rows = cursor.fetchmany(self._batch_size)
+            finally:
+                cursor.close()
+                self._release(conn)
+
+        stream: Iterator[pa.RecordBatch] = batches()
+
+        # Start the stream, so that closing it releases the connection even before it is read
+        first: Optional[pa.RecordBatch] = next(stream, None)
+
+        reader: pa.RecordBatchReader = pa.RecordBatchReader.from_batches(
+            schema, itertools.chain([first] if first is not None else [], stream)
+        )
+
+        # A reader over a Python iterator only drops the iterator once it is garbage collected. Through
+        # the C stream interface, closing the reader drops it, which releases the connection
+        return pa.RecordBatchReader.from_stream(reader)
+
+    def _get_columns(self) -> Dict[str, List[Tuple[str, str]]]:
+        """The name and declared type of the columns of each table."""
+        with self._connection() as conn:
+            tables: List[str] = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') "
+                    "AND name NOT LIKE 'sqlite_%' ORDER BY name"
+                )
+            ]
+
+            return {
+                table: [
+                    (row[1], row[2])
+                    for row in conn.execute(
+                        f"PRAGMA table_info({self.quote_identifier(table)})"
+                    )
+                ]
+                for table in tables
+            }
+
+    def _widen_schema(
+        self, conn: sqlite3.Connection, schema: pa.Schema, query: str, parameters: List[Any]
+    ) -> pa.Schema:
+        """
+        Widens the numeric columns that hold text or real values anywhere in the query result. The
+        storage types are aggregated by SQLite, without fetching the rows.
+        """
+        numeric: List[int] = [
+            idx
+            for idx, field in enumerate(schema)
+            if pa.types.is_integer(field.type) or pa.types.is_floating(field.type)
+        ]
+
+        if not numeric:
+            return schema
+
+        checks: List[str] = []
+        for idx in numeric:
+            column: str = self.quote_identifier(schema.field(idx).name)
+            checks.append(f"MAX(typeof({column}) IN ('text', 'blob'))")
+            checks.append(f"MAX(typeof({column}) = 'real')")
+
+        row: tuple = conn.execute(
+            f"SELECT {', '.join(checks)} FROM ({query})", parameters or []
+        ).fetchone()
+
+        for pos, idx in enumerate(numeric):
+            field: pa.Field = schema.field(idx)
+            data_type: pa.DataType = widen_type(
+                field.type, bool(row[2 * pos]), bool(row[2 * pos + 1])
+            )
+            schema = schema.set(idx, field.with_type(data_type))
+
+        return schema
+
+    @staticmethod
+    def _infer_schema(
+        names: List[str], rows: List[tuple], types: Dict[str, Optional[pa.DataType]]
+    ) -> pa.Schema:
+        fields: List[pa.Field] = []
+
+        for idx, name in enumerate(names):
+            data_type: Optional[pa.DataType] = types.get(name)
+
+            if data_type is None:
+                try:
+                    data_type = pa.array([row[idx] for row in rows]).type
+                except (pa.ArrowInvalid, pa.ArrowTypeError):
+                    # Values of mixed types
+                    data_type = pa.string()
+
+                if pa.types.is_null(data_type):
+                    data_type = pa.string()
+            else:
+                # Declared types do not restrict the stored values
+                values: List[Any] = [row[idx] for row in rows]
+                data_type = widen_type(
+                    data_type,
+                    has_text=any(isinstance(v, (str, bytes)) for v in values),
+                    has_real=any(isinstance(v, float) for v in values),
+                )
+
+            fields.append(pa.field(name, data_type))
+
+        return pa.schema(fields)
+
+    @staticmethod
+    def _to_batch(rows: List[tuple], schema: pa.Schema) -> pa.RecordBatch:
+        arrays: List[pa.Array] = []
+
+        for field, values in zip(schema, zip(*rows)):
+            try:
+                arrays.append(pa.array(values, type=field.type))
+            except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                # SQLite columns may hold values of any type
+                if not pa.types.is_string(field.type):
+                    raise ValueError(
+                        f"Column {field.name} holds values that are not {field.type}: {e}"
+                    )
+
+                logging.debug(f"Converting the values of column {field.name} to strings")
+                arrays.append(
+                    pa.array([None if v is None else str(v) for v in values], type=field.type)
+                )
+
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
@@ -5,52 +5,399 @@
 
 from swelldb.table_plan.table.logical.logical_table import LogicalTable
 from swelldb.engine.execution_engine import ExecutionEngine
+from swelldb.engine.schema_catalog import ColumnStats, SchemaCatalog, TableInfo
+from swelldb.engine.sql_cache import SQLCache
 
+import glob
+import hashlib
+import logging
+import os
+import re
+from typing import Dict, List, Optional, Set, Tuple, Union
 
 import pyarrow as pa
 import pyarrow.dataset as ds
+import pyarrow.fs
 
 from pandas import DataFrame
-from datafusion import SessionContext, Catalog
+from datafusion import RuntimeEnvBuilder, SessionConfig, SessionContext, SQLOptions, Catalog
+
+PARQUET_EXTENSIONS = (".parquet", ".parq")
+IPC_EXTENSIONS = (".arrow", ".feather", ".ipc")
+CSV_EXTENSIONS = (".csv",)
+
+# The maximum rows of the batches that in-memory tables are split into
+_MAX_BATCH_ROWS: int = 64 * 1024
+
+_PARTITION_PATTERN = re.compile(r"^([^=/]+)=(.*)$")
+_INT32_MAX: int = 2**31 - 1
+
+
+def discover_partitions(path: str) -> List[Tuple[str, str]]:
+    """
+    Returns the hive partition columns of a directory, e.g. [("year", "int"), ("region", "string")] for
+    files under "year=2024/region=eu/". Columns whose values are all 32-bit integers are "int", the only
+    types DataFusion accepts for partition columns being "int" and "string".
+    """
+    partitions: List[Tuple[str, str]] = []
+    directory: str = path
+
+    while True:
+        subdirectories: List[str] = sorted(
+            entry.name for entry in os.scandir(directory) if entry.is_dir()
+        )
+        matches = [_PARTITION_PATTERN.match(name) for name in subdirectories]
+
+        if not matches or not all(matches) or len({m.group(1) for m in matches}) != 1:
+            return partitions
+
+        values: List[str] = [m.group(2) for m in matches]
+        is_int: bool = all(
+            re.fullmatch(r"-?\d+", value) and abs(int(value)) <= _INT32_MAX for value in values
+        )
+
+        partitions.append((matches[0].group(1), "int" if is_int else "string"))
+        directory = os.path.join(directory, subdirectories[0])
+
+
+def _file_extension(path: str) -> str:
+    """The extension of a file, or of the first file found under a directory."""
+    if os.path.isdir(path):
+        for root, _, files in os.walk(path):
+            for file in sorted(files):
+                if not file.startswith((".", "_")):
+                    return os.path.splitext(file)[1].lower()
+        return ""
+
+    return os.path.splitext(path)[1].lower()
 
 
 class DataFusionEngine(ExecutionEngine):
-    def __init__(self):
-        self._sc: SessionContext = SessionContext()
+    """
+    Runs the SQL queries of SwellDB with DataFusion.
+
+    Parquet and CSV inputs are registered with the native DataFusion readers, which push projections and
+    filters into the scan and prune Parquet row groups by their statistics. Directories with hive-style
+    partitions ("year=2024/") expose the partition values as columns and are pruned by them.
+
+    The schemas of the registered tables are kept in a catalog, which is updated when tables are
+    registered or deregistered, so that listing the tables does not resolve each of them again.
+
+    The session can be tuned for large local datasets: the number of partitions that queries run with,
+    the batch size, and a memory limit, beyond which joins, sorts and aggregations spill to disk.
+
+    Examples:
+        >>> engine = DataFusionEngine(target_partitions=8, memory_limit=4 << 30, spill_dir="/tmp/spill")
+        >>> engine = DataFusionEngine(csv_parquet_dir="/tmp/swelldb_parquet")
+        >>> engine.register_csv("sales", "sales.csv")  # Converted to Parquet once, then scanned as Parquet
+        >>> engine.register_parquet("events", "events/")  # e.g. events/year=2024/month=1/part-0.parquet
+    """
+
+    def __init__(
+        self,
+        csv_parquet_dir: str = None,
+        collect_statistics: bool = False,
+        sample_rows: int = 1000,
+        sql_cache: SQLCache = None,
+        target_partitions: int = None,
+        batch_size: int = None,
+        memory_limit: int = None,
+        memory_pool: str = "fair",
+        spill_dir: str = None,
+        config: Dict[str, str] = None,
+    ):
+        """
+        Args:
+            csv_parquet_dir: If set, registered CSV files are converted to Parquet files in this
+                directory, once per file version, and the Parquet files are queried instead.
+            collect_statistics: Whether to count the rows of each registered table and sample its
+                columns for example values, which are included in the table descriptions.
+            sample_rows: The number of rows sampled for the column statistics.
+            sql_cache: The cache of validated LLM-generated queries over the tables of the engine.
+                Defaults to an in-memory cache.
+            target_partitions: The number of partitions that queries run with. Defaults to the number
+                of CPUs.
+            batch_size: The number of rows of the record batches. Defaults to 8192.
+            memory_limit: The maximum bytes of memory that queries use. None means no limit.
+            memory_pool: "fair", which shares the limit evenly between the operators that can spill,
+                or "greedy", which serves memory first come, first served.
+            spill_dir: The directory of the files that operators spill to. Defaults to the OS temporary
+                directory.
+            config: Any other DataFusion settings, e.g. {"datafusion.optimizer.max_passes": "5"}.
+        """
+        if memory_pool not in ("fair", "greedy"):
+            raise ValueError(f"Unsupported memory pool: {memory_pool}. Use 'fair' or 'greedy'")
+
+        session_config: SessionConfig = (
+            SessionConfig()
+            .with_information_schema(True)
+            # Evaluate filters while decoding Parquet pages, and skip the rows they reject
+            .set("datafusion.execution.parquet.pushdown_filters", "true")
+            .set("datafusion.execution.parquet.reorder_filters", "true")
+            # Results keep the plain string type of the SwellDB schemas
+            .set("datafusion.execution.parquet.schema_force_view_types", "false")
+        )
+
+        if target_partitions:
+            session_config = session_config.with_target_partitions(target_partitions)
+
+        if batch_size:
+            session_config = session_config.with_batch_size(batch_size)
+
+        for key, value in (config or dict()).items():
+            session_config = session_config.set(key, str(value))
+
+        runtime: RuntimeEnvBuilder = RuntimeEnvBuilder()
+
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            runtime = runtime.with_disk_manager_specified(spill_dir)
+
+        if memory_limit and memory_pool == "fair":
+            runtime = runtime.with_fair_spill_pool(memory_limit)
+        elif memory_limit:
+            runtime = runtime.with_greedy_memory_pool(memory_limit)
+
+        self._sc: SessionContext = SessionContext(session_config, runtime)
+        self._target_partitions: int = target_partitions or os.cpu_count() or 1
         self._materialized_tables: dict[str, LogicalTable] = dict()
+        self._csv_parquet_dir: str = csv_parquet_dir
+        self._collect_statistics: bool = collect_statistics
+        self._sample_rows: int = sample_rows
+        self._catalog: SchemaCatalog = SchemaCatalog()
+        self._sql_cache: SQLCache = sql_cache or SQLCache()
+
+        if csv_parquet_dir:
+            os.makedirs(csv_parquet_dir, exist_ok=True)
 
     def refresh(self) -> None:
         for table in self._materialized_tables.keys():
-            self._sc.deregister_table(table)
+            self.deregister_table(table)
         self._materialized_tables = dict()
 
-    def get_tables(self):
+    def get_tables(self) -> Dict[str, str]:
         """
-        Returns the table names and schemata
-        :return:
+        Returns the table names and a compact description of their schemata, e.g.
+        {"cities": "city: string, population: int64"}
         """
-        tables = self._sc.tables()
-        table_schemas = {}
-        for table in tables:
-            table_schemas[table] = (
-                self._sc.table(table).schema().to_string().split("\n")
-            )
-        return table_schemas
+        return self.get_catalog().render()
 
-    def register_csv(self, name: str, path: str):
-        table_ds: ds.Dataset = ds.dataset(path, format="csv")
+    def get_catalog(self) -> SchemaCatalog:
+        """
+        Returns the catalog of the registered tables. Tables created through SQL statements, e.g.
+        CREATE VIEW, are added to the catalog when they are first seen.
+        """
+        names: Set[str] = self._sc.catalog().database().names()
 
-        if not self._sc.table_exist(name):
-            self._sc.register_dataset(name, table_ds)
+        for name in self._catalog.get_names():
+            if name not in names:
+                self._catalog.remove(name)
 
-    def register_table(self, name: str, df: DataFrame):
-        table_ds = ds.dataset(pa.Table.from_pandas(df))
+        for name in names:
+            if name not in self._catalog:
+                self._add_to_catalog(name)
+
+        return self._catalog
+
+    def register_file(self, name: str, path: str):
+        """
+        Registers a CSV, Parquet or Arrow IPC file, or a (partitioned) directory of them, by extension.
+        """
+        extension: str = _file_extension(path)
+
+        if extension in PARQUET_EXTENSIONS:
+            self.register_parquet(name, path)
+        elif extension in IPC_EXTENSIONS:
+            self.register_ipc(name, path)
+        elif extension in CSV_EXTENSIONS:
+            self.register_csv(name, path)
+        else:
+            raise ValueError(f"Unsupported file format for table {name}: {path}")
+
+    def register_csv(self, name: str, path: str, to_parquet: bool = None):
+        """
+        Args:
+            name: The table name.
+            path: A CSV file, or a directory of CSV files.
+            to_parquet: Whether to convert the file to Parquet first. Defaults to converting when the
+                engine has a csv_parquet_dir.
+        """
+        if self._sc.table_exist(name):
+            return
 
-        if not self._sc.table_exist(name):
-            self._sc.register_dataset(name, table_ds)
+        if to_parquet is None:
+            to_parquet = self._csv_parquet_dir is not None
+
+        if to_parquet and os.path.isfile(path):
+            self.register_parquet(name, self._convert_to_parquet(path))
+            return
+
+        self._sc.register_csv(name, path)
+        self._add_to_catalog(name)
+
+    def register_parquet(self, name: str, path: str, partition_cols: List[Tuple[str, str]] = None):
+        """
+        Args:
+            name: The table name.
+            path: A Parquet file, or a directory of Parquet files.
+            partition_cols: The (name, "int" or "string") hive partition columns of a directory.
+                Discovered from the directory names if not given.
+        """
+        if self._sc.table_exist(name):
+            return
+
+        if partition_cols is None and os.path.isdir(path):
+            partition_cols = discover_partitions(path)
+
+        self._sc.register_parquet(
+            name,
+            path,
+            table_partition_cols=partition_cols or None,
+            parquet_pruning=True,
+            file_extension=_file_extension(path) or ".parquet",
+        )
+        self._add_to_catalog(name)
+
+    def register_ipc(self, name: str, path: str):
+        """
+        Registers an Arrow IPC (Feather v2) file, or a directory of them, optionally hive-partitioned.
+        DataFusion has no native IPC reader in Python, so the files are scanned as an Arrow dataset, which
+        memory-maps them and still receives the projections and filters of the queries.
+        """
+        if self._sc.table_exist(name):
+            return
+
+        partitioning: Optional[str] = (
+            "hive" if os.path.isdir(path) and discover_partitions(path) else None
+        )
+
+        self._sc.register_dataset(
+            name,
+            ds.dataset(
+                path,
+                format="ipc",
+                partitioning=partitioning,
+                filesystem=pa.fs.LocalFileSystem(use_mmap=True),
+            ),
+        )
+        self._add_to_catalog(name)
+
+    def register_arrow(
+        self,
+        name: str,
+        data: Union[pa.Table, pa.RecordBatchReader, List[pa.RecordBatch]],
+        schema: pa.Schema = None,
+        replace: bool = False,
+    ):
+        """
+        Registers in-memory Arrow data as a table, without copying it: the table references the buffers
+        of the given batches.
+
+        Args:
+            name: The table name.
+            data: A table, a stream of record batches, or a list of record batches. A stream can only be
+                read once, so its batches are collected before they are registered.
+            schema: The schema of an empty list of batches.
+            replace: Whether to replace a table with the same name.
+        """
+        if self._sc.table_exist(name):
+            if not replace:
+                return
+            self.deregister_table(name)
+
+        if isinstance(data, pa.Table):
+            schema = data.schema
+            # Slicing into batches is zero-copy, and lets the scan run in parallel
+            batches: List[pa.RecordBatch] = data.to_batches(max_chunksize=_MAX_BATCH_ROWS)
+        elif isinstance(data, pa.RecordBatchReader):
+            schema = data.schema
+            batches = list(data)
+        else:
+            batches = list(data)
+            schema = batches[0].schema if batches else schema
+
+        if schema is None:
+            raise ValueError(f"The schema of table {name} is required when it has no batches")
+
+        if not batches:
+            batches = [pa.RecordBatch.from_pylist([], schema=schema)]
+
+        # Round-robin partitions, which DataFusion scans concurrently
+        n_partitions: int = min(len(batches), self._target_partitions)
+        partitions: List[List[pa.RecordBatch]] = [
+            batches[i::n_partitions] for i in range(n_partitions)
+        ]
+
+        self._sc.register_record_batches(name, partitions)
+        self._add_to_catalog(name)
+
+    def register_table(self, name: str, df: DataFrame):
+        self.register_arrow(name, pa.Table.from_pandas(df))
 
     def deregister_table(self, name: str):
         self._sc.deregister_table(name)
+        self._catalog.remove(name)
 
     def sql(self, query: str) -> DataFrame:
         return self._sc.sql(query)
+
+    def validate_sql(self, query: str) -> pa.Schema:
+        """
+        Parses and plans a read-only query without executing it, and returns the schema of its result.
+        Raises an exception with the planner error if the query is invalid or is not a query.
+        """
+        options: SQLOptions = (
+            SQLOptions().with_allow_ddl(False).with_allow_dml(False).with_allow_statements(False)
+        )
+        return self._sc.sql_with_options(query, options).schema()
+
+    def get_sql_cache(self) -> SQLCache:
+        return self._sql_cache
+
+    def _add_to_catalog(self, name: str) -> None:
+        df = self._sc.table(name)
+        num_rows: Optional[int] = None
+        column_stats: Dict[str, ColumnStats] = dict()
+
+        if self._collect_statistics:
+            # Parquet row counts come from the file footers, without a scan
+            num_rows = df.count()
+            sample: pa.Table = df.limit(self._sample_rows).to_arrow_table()
+            column_stats = {
+                column: ColumnStats.from_array(sample.column(column))
+                for column in sample.column_names
+            }
+
+        self._catalog.put(TableInfo(name, df.schema(), num_rows, column_stats))
+
+    def _convert_to_parquet(self, path: str) -> str:
+        """
+        Converts a CSV file to Parquet with DataFusion, unless this version of the file (same path, size
+        and modification time) was converted before. Returns the Parquet file.
+        """
+        stat = os.stat(path)
+        prefix: str = "{}-{}".format(
+            os.path.splitext(os.path.basename(path))[0],
+            hashlib.sha256(os.path.abspath(path).encode("utf-8")).hexdigest()[:16],
+        )
+        parquet_path: str = os.path.join(
+            self._csv_parquet_dir, f"{prefix}-{stat.st_size}-{stat.st_mtime_ns}.parquet"
+        )
+
+        if os.path.exists(parquet_path):
+            return parquet_path
+
+        # Conversions of older versions of the file are no longer needed
+        stale_pattern: str = os.path.join(
+            glob.escape(self._csv_parquet_dir), f"{glob.escape(prefix)}-*.parquet"
+        )
+        for stale in glob.glob(stale_pattern):
+            os.remove(stale)
+
+        tmp_path: str = f"{parquet_path}.{os.getpid()}.tmp.parquet"
+        self._sc.read_csv(path).write_parquet(tmp_path)
+        os.replace(tmp_path, parquet_path)
+
+        logging.info(f"Converted {path} to Parquet: {parquet_path}")
+
+        return parquet_path
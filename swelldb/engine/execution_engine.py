@@ -13,14 +13,35 @@ class ExecutionEngine:
     def sql(self, query: str) -> DataFrame:
         pass
 
+    def validate_sql(self, query: str):
+        pass
+
+    def get_sql_cache(self):
+        pass
+
     def get_tables(self):
         pass
 
+    def get_catalog(self):
+        pass
+
     def register_csv(self, name: str, path: str):
         pass
 
+    def register_parquet(self, name: str, path: str):
+        pass
+
+    def register_ipc(self, name: str, path: str):
+        pass
+
+    def register_file(self, name: str, path: str):
+        pass
+
     def register_table(self, name: str, df: DataFrame):
         pass
 
+    def register_arrow(self, name: str, data, schema=None, replace: bool = False):
+        pass
+
     def deregister_table(self, name: str):
         pass
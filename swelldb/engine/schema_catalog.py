@@ -0,0 +1,150 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import threading
+from typing import Any, Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+_MAX_EXAMPLE_LENGTH: int = 40
+
+
+class ColumnStats:
+    """Statistics of a column, computed on a sample of its rows."""
+
+    def __init__(self, null_fraction: float, distinct_count: int, examples: List[Any]):
+        self._null_fraction: float = null_fraction
+        self._distinct_count: int = distinct_count
+        self._examples: List[Any] = examples
+
+    def get_null_fraction(self) -> float:
+        return self._null_fraction
+
+    def get_distinct_count(self) -> int:
+        """The number of distinct values in the sample."""
+        return self._distinct_count
+
+    def get_examples(self) -> List[Any]:
+        return self._examples
+
+    @staticmethod
+    def from_array(column: pa.ChunkedArray, n_examples: int = 3) -> "ColumnStats":
+        n_rows: int = len(column)
+        null_fraction: float = column.null_count / n_rows if n_rows else 0.0
+
+        try:
+            unique: pa.Array = pc.unique(column.drop_null())
+            distinct_count: int = len(unique)
+            examples: List[Any] = unique.slice(0, n_examples).to_pylist()
+        except (pa.ArrowNotImplementedError, pa.ArrowTypeError):
+            # Nested types cannot be hashed
+            distinct_count = 0
+            examples = []
+
+        return ColumnStats(null_fraction, distinct_count, examples)
+
+
+class TableInfo:
+    """The schema of a registered table, with its row count and column statistics if collected."""
+
+    def __init__(
+        self,
+        name: str,
+        schema: pa.Schema,
+        num_rows: Optional[int] = None,
+        column_stats: Dict[str, ColumnStats] = None,
+    ):
+        self._name: str = name
+        self._schema: pa.Schema = schema
+        self._num_rows: Optional[int] = num_rows
+        self._column_stats: Dict[str, ColumnStats] = column_stats or dict()
+        self._rendering: Optional[str] = None
+
+    def get_name(self) -> str:
+        return self._name
+
+    def get_schema(self) -> pa.Schema:
+        return self._schema
+
+    def get_num_rows(self) -> Optional[int]:
+        return self._num_rows
+
+    def get_column_stats(self) -> Dict[str, ColumnStats]:
+        return self._column_stats
+
+    def render(self) -> str:
+        """
+        A compact description of the table for prompts, e.g.
+        "city: string (e.g. 'Athens', 'Paris'), population: int64; 120 rows".
+        """
+        if self._rendering is not None:
+            return self._rendering
+
+        columns: List[str] = []
+
+        for field in self._schema:
+            column: str = f"{field.name}: {field.type}"
+            stats: Optional[ColumnStats] = self._column_stats.get(field.name)
+
+            if stats is not None and stats.get_examples():
+                examples: str = ", ".join(
+                    repr(example)[:_MAX_EXAMPLE_LENGTH] for example in stats.get_examples()
+                )
+                column += f" (e.g. {examples})"
+
+            columns.append(column)
+
+        self._rendering = ", ".join(columns)
+
+        if self._num_rows is not None:
+            self._rendering += f"; {self._num_rows} rows"
+
+        return self._rendering
+
+
+class SchemaCatalog:
+    """
+    The schemas of the tables registered in an execution engine. Each table is resolved once, when it
+    is registered, instead of on every lookup.
+    """
+
+    def __init__(self):
+        self._tables: Dict[str, TableInfo] = dict()
+        self._lock = threading.Lock()
+
+    def put(self, table_info: TableInfo) -> None:
+        with self._lock:
+            self._tables[table_info.get_name()] = table_info
+
+    def remove(self, name: str) -> None:
+        with self._lock:
+            self._tables.pop(name, None)
+
+    def get(self, name: str) -> Optional[TableInfo]:
+        return self._tables.get(name)
+
+    def get_names(self) -> List[str]:
+        return list(self._tables)
+
+    def get_tables(self) -> Dict[str, TableInfo]:
+        with self._lock:
+            return dict(self._tables)
+
+    def render(self, names: List[str] = None) -> Dict[str, str]:
+        """The compact rendering of each table, by name."""
+        tables: Dict[str, TableInfo] = self.get_tables()
+
+        return {
+            name: info.render()
+            for name, info in tables.items()
+            if names is None or name in names
+        }
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tables
+
+    def __len__(self) -> int:
+        return len(self._tables)
@@ -0,0 +1,58 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+
+class SQLCache:
+    """
+    A cache of validated, LLM-generated SQL queries, stored in a SQLite file, or in memory if no path is
+    given. The keys identify the target schema and the schemas of the queried tables, so queries are
+    generated again when any of them changes.
+    """
+
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path: The cache file. None keeps the cache in memory, for the lifetime of the process.
+        """
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+        self._conn = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS queries (
+                key TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT query FROM queries WHERE key = ?", (key,)).fetchone()
+            self._stats["hits" if row else "misses"] += 1
+
+        return row[0] if row else None
+
+    def put(self, key: str, query: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO queries VALUES (?, ?, ?)", (key, query, time.time())
+            )
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self) -> None:
+        self._conn.close()
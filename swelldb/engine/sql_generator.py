@@ -0,0 +1,195 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import hashlib
+import json
+import logging
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+from swelldb.engine.execution_engine import ExecutionEngine
+from swelldb.engine.sql_cache import SQLCache
+from swelldb.llm.abstract_llm import AbstractLLM
+
+_FENCE_PATTERN = re.compile(r"```[ \t]*(?:sql)?[ \t]*\n?(.*?)```", re.DOTALL | re.IGNORECASE)
+_STATEMENT_PATTERN = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE | re.MULTILINE)
+
+_REPAIR_PROMPT: str = """{prompt}
+
+The following query:
+{query}
+
+is invalid:
+{error}
+
+Return only the corrected SQL query."""
+
+
+def extract_sql(response: str) -> str:
+    """
+    Extracts the SQL query from an LLM response: the content of the first ``` fence if there is one,
+    starting at the first line that starts with SELECT or WITH, without a trailing semicolon.
+    """
+    match = _FENCE_PATTERN.search(response)
+    query: str = match.group(1) if match else response
+
+    statement = _STATEMENT_PATTERN.search(query)
+    if statement:
+        query = query[statement.start() :]
+
+    return query.strip().rstrip(";").strip()
+
+
+class SQLGenerator:
+    """
+    Generates SQL queries with an LLM, and plans each query with the execution engine before it runs.
+    Invalid queries are sent back to the LLM with the planner error, for a bounded number of repairs.
+    Validated queries are cached by the prompt, the target columns and the schemas of the registered
+    tables.
+
+    Examples:
+        >>> generator = SQLGenerator(llm, engine, cache=SQLCache("/tmp/swelldb_sql.sqlite"))
+        >>> query = generator.generate(prompt, target_columns=["city", "population"])
+    """
+
+    def __init__(
+        self,
+        llm: AbstractLLM,
+        execution_engine: ExecutionEngine,
+        cache: SQLCache = None,
+        max_repairs: int = 2,
+    ):
+        self._llm: AbstractLLM = llm
+        self._execution_engine: ExecutionEngine = execution_engine
+        self._cache: Optional[SQLCache] = cache
+        self._max_repairs: int = max_repairs
+
+    def generate(self, prompt: str, target_columns: List[str]) -> str:
+        """
+        Returns a validated query for the prompt, from the cache or from the LLM.
+
+        Raises:
+            ValueError: If the query is still invalid after the repair attempts.
+        """
+        key: str = self._get_key(prompt, target_columns)
+
+        if self._cache:
+            cached: Optional[str] = self._cache.get(key)
+            if cached is not None:
+                logging.info("Using a cached SQL query")
+                return cached
+
+        query: str = extract_sql(self._llm.call(prompt))
+        query = self._repair(query, prompt, target_columns)
+
+        if self._cache:
+            self._cache.put(key, query)
+
+        return query
+
+    def generate_columns(
+        self, prompt: str, target_columns: List[str]
+    ) -> Tuple[List[str], Optional[str]]:
+        """
+        For a prompt that asks which of the target columns the registered tables provide, and for a
+        query that returns them, as a JSON object with "columns" and "query". The query is validated
+        for the returned columns, and repaired if needed. The answer is cached by the prompt, the target
+        columns and the schemas of the tables, so a repeated prompt makes no LLM call.
+
+        Returns:
+            The columns, and the query, or None if no column is provided.
+        """
+        key: str = self._get_key(prompt, target_columns, kind="columns")
+
+        if self._cache:
+            cached: Optional[str] = self._cache.get(key)
+            if cached is not None:
+                logging.info("Using a cached SQL query")
+                answer: Dict = json.loads(cached)
+                return answer["columns"], answer["query"]
+
+        answer = json.loads(self._llm.call(prompt))
+        columns: List[str] = answer["columns"] or []
+        query: Optional[str] = answer["query"] if columns else None
+
+        if query:
+            query = self._repair(extract_sql(query), prompt, columns)
+
+        if self._cache:
+            self._cache.put(key, json.dumps({"columns": columns, "query": query}))
+
+        return columns, query
+
+    def _repair(self, query: str, prompt: str, target_columns: List[str]) -> str:
+        for attempt in range(self._max_repairs + 1):
+            error: Optional[str] = self._check(query, target_columns)
+
+            if error is None:
+                return self._restore_case(query, target_columns)
+
+            if attempt == self._max_repairs:
+                break
+
+            logging.warning(f"Repairing the generated SQL query (attempt {attempt + 1}): {error}")
+            query = extract_sql(
+                self._llm.call(_REPAIR_PROMPT.format(prompt=prompt, query=query, error=error))
+            )
+
+        raise ValueError(
+            f"The generated SQL query is invalid after {self._max_repairs} repairs: {error}\n{query}"
+        )
+
+    def _check(self, query: str, target_columns: List[str]) -> Optional[str]:
+        """Returns the error of the query, or None if it is valid."""
+        try:
+            schema = self._execution_engine.validate_sql(query)
+        except Exception as e:
+            return str(e)
+
+        # Unquoted aliases are lowercased, and renamed once the query is valid
+        names: Set[str] = {name.lower() for name in schema.names}
+        missing: List[str] = [column for column in target_columns if column.lower() not in names]
+
+        if missing:
+            return f"The query does not return the columns {missing}. It returns {schema.names}."
+
+        return None
+
+    def _restore_case(self, query: str, target_columns: List[str]) -> str:
+        """
+        Renames the columns that the engine lowercased, e.g. the unquoted alias of a mixed-case target
+        column, to the target column names.
+        """
+        names: List[str] = self._execution_engine.validate_sql(query).names
+        targets: Dict[str, str] = {column.lower(): column for column in target_columns}
+        renamed: Dict[str, str] = {
+            name: targets[name.lower()]
+            for name in names
+            if name not in target_columns and name.lower() in targets
+        }
+
+        if not renamed:
+            return query
+
+        def quote(name: str) -> str:
+            return '"' + name.replace('"', '""') + '"'
+
+        projection: str = ", ".join(
+            f"{quote(name)} AS {quote(renamed[name])}" if name in renamed else quote(name)
+            for name in names
+        )
+        return f"SELECT {projection} FROM ({query}) AS generated"
+
+    def _get_key(self, prompt: str, target_columns: List[str], kind: str = "query") -> str:
+        tables: Dict[str, str] = self._execution_engine.get_tables()
+        key: str = json.dumps(
+            {
+                "kind": kind,
+                "prompt": prompt,
+                "target": list(target_columns),
+                "tables": sorted(tables.items()),
+            }
+        )
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
@@ -4,8 +4,54 @@
 # See the LICENSE file in the project root for more information.
 
 import json
+import logging
+import threading
+from typing import Callable, Dict, Union
 
 from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import HumanMessage
+
+from swelldb.common.cassette import intercept
+from swelldb.prompt.multimodal_prompt import MultimodalPrompt
+
+
+# Context windows of known models in tokens, matched by the longest model name prefix
+CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-4.1": 1047576,
+    "gpt-4o": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+    "o1": 200000,
+    "o3": 200000,
+    "o4": 200000,
+    "deepseek": 65536,
+    "llama3": 8192,
+    "llama3.1": 131072,
+    "llama3.2": 131072,
+    "llama3.3": 131072,
+    "qwen2.5": 32768,
+    "mistral": 32768,
+    "gemma3": 131072,
+}
+
+DEFAULT_CONTEXT_WINDOW: int = 8192
+
+# The maximum number of images in a single call, matched by the longest model name prefix
+MAX_IMAGES_PER_CALL: Dict[str, int] = {
+    "gpt-4.1": 50,
+    "gpt-4o": 50,
+    "gpt-4-turbo": 50,
+    "o1": 50,
+    "o3": 50,
+    "o4": 50,
+    "llava": 1,
+    "llama3.2-vision": 1,
+    "gemma3": 8,
+    "qwen2.5vl": 8,
+}
+
+DEFAULT_MAX_IMAGES_PER_CALL: int = 10
 
 
 def _contains_image_data(prompt: str) -> bool:
@@ -14,38 +60,102 @@ def _contains_image_data(prompt: str) -> bool:
 
 
 class AbstractLLM:
-    def __init__(self, llm: BaseChatModel):
+    def __init__(
+        self, llm: BaseChatModel, context_window: int = None, max_images_per_call: int = None
+    ):
         self.llm: BaseChatModel = llm
+        self._context_window: int = context_window
+        self._max_images_per_call: int = max_images_per_call
 
         # Stats
         self.input_tokens = 0
         self.output_tokens = 0
+        # Tables may issue concurrent calls, which update the token counts together
+        self._tokens_lock = threading.Lock()
+
+    def get_model_name(self) -> str:
+        return getattr(self.llm, "model_name", None) or getattr(self.llm, "model", None)
+
+    def get_context_window(self) -> int:
+        """
+        The context window of the model in tokens: the one given to the constructor, or else the
+        window of the longest matching known model name prefix.
+        """
+        if self._context_window:
+            return self._context_window
+
+        return self._lookup(CONTEXT_WINDOWS, DEFAULT_CONTEXT_WINDOW)
+
+    def get_max_images_per_call(self) -> int:
+        """
+        The maximum number of images in a single call: the one given to the constructor, or else the
+        limit of the longest matching known model name prefix.
+        """
+        if self._max_images_per_call:
+            return self._max_images_per_call
+
+        return self._lookup(MAX_IMAGES_PER_CALL, DEFAULT_MAX_IMAGES_PER_CALL)
 
-    def call(self, prompt: str) -> str:
-        # Check if this is a multimodal prompt with image data
-        if _contains_image_data(prompt):
+    def _lookup(self, values: Dict[str, int], default: int) -> int:
+        model_name: str = (self.get_model_name() or "").lower()
+        prefixes = [prefix for prefix in values if model_name.startswith(prefix)]
+
+        if not prefixes:
+            return default
+
+        return values[max(prefixes, key=len)]
+
+    def call(self, prompt: Union[str, MultimodalPrompt]) -> str:
+        # Prompts with embedded base64 images are converted once to structured prompts
+        if isinstance(prompt, str) and _contains_image_data(prompt):
+            prompt = MultimodalPrompt.from_string(prompt)
+
+        # The key of a multimodal prompt hashes its images, so it is only built for an active cassette
+        request: Union[str, Callable[[], str]] = (
+            prompt.get_cache_key if isinstance(prompt, MultimodalPrompt) else prompt
+        )
+
+        # Served from the active cassette when recording or replaying
+        return intercept("llm", request, lambda: self._call(prompt))
+
+    def _call(self, prompt: Union[str, MultimodalPrompt]) -> str:
+        if isinstance(prompt, MultimodalPrompt):
             return self._call_multimodal(prompt)
-        
+
+        return self._call_text(prompt)
+
+    def _call_text(self, prompt: str) -> str:
         # Regular text-only prompt
-        r = self.llm.invoke(prompt)
-        stats = r.usage_metadata
+        return self._parse_response(self.llm.invoke(prompt))
+
+    def _call_multimodal(self, prompt: MultimodalPrompt) -> str:
+        """
+        Sends the text and the images of the prompt as the parts of a single message. The images are
+        encoded only here, directly into the message content.
+        """
+        try:
+            message = HumanMessage(content=prompt.to_content())
+            return self._parse_response(self.llm.invoke([message]))
+        except Exception as e:
+            # Fallback to text-only if multimodal fails
+            logging.warning(f"Multimodal processing failed, falling back to text-only: {e}")
+            return self._call_text(prompt.get_text())
 
-        self.input_tokens += stats["input_tokens"]
-        self.output_tokens += stats["output_tokens"]
+    def _parse_response(self, response) -> str:
+        stats = response.usage_metadata
 
-        r = r.content
+        if stats:
+            with self._tokens_lock:
+                self.input_tokens += stats.get("input_tokens", 0)
+                self.output_tokens += stats.get("output_tokens", 0)
+
+        r = response.content
 
         if "```json" in r:
             r = r.split("```json")[1].split("```")[0]
-        else:
-            r = r
 
         # For Deepseek responses
         if "</think>" in r:
             r = r.split("</think>")[1]
 
         return r
-
-    def _call_multimodal(self, prompt: str) -> str:
-        """Handle multimodal prompts with images. Override in subclasses."""
-        raise NotImplementedError("Multimodal prompts not supported by this LLM implementation")
\ No newline at end of file
@@ -0,0 +1,137 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import base64
+import hashlib
+import json
+import mimetypes
+import os
+import re
+from typing import Dict, List, Optional
+
+_DATA_URL_PATTERN = re.compile(r"Image data: data:(image/[\w.+-]+);base64,([A-Za-z0-9+/=]+)")
+
+
+class ImageRef:
+    """
+    An image attached to a prompt, either by path or by its encoded bytes. Images given by path are only
+    read when the message is sent, so prompts stay small until then.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        data: bytes = None,
+        mime_type: str = None,
+        name: str = None,
+    ):
+        if path is None and data is None:
+            raise ValueError("An image needs either a path or data")
+
+        self._path: Optional[str] = path
+        self._data: Optional[bytes] = data
+        self._mime_type: str = mime_type or _guess_mime_type(path)
+        self._name: str = name or (os.path.basename(path) if path else "image")
+        self._digest: Optional[str] = None
+
+    def get_path(self) -> Optional[str]:
+        return self._path
+
+    def get_name(self) -> str:
+        return self._name
+
+    def get_mime_type(self) -> str:
+        return self._mime_type
+
+    def get_bytes(self) -> bytes:
+        if self._data is not None:
+            return self._data
+
+        with open(self._path, "rb") as f:
+            return f.read()
+
+    def get_digest(self) -> str:
+        """The SHA-256 of the image bytes, which identifies the image without its payload."""
+        if self._digest is None:
+            self._digest = hashlib.sha256(self.get_bytes()).hexdigest()
+        return self._digest
+
+    def to_data_url(self) -> str:
+        encoded: str = base64.b64encode(self.get_bytes()).decode("ascii")
+        return f"data:{self._mime_type};base64,{encoded}"
+
+    def __repr__(self):
+        return f"ImageRef[name={self._name}, mime_type={self._mime_type}]"
+
+
+class MultimodalPrompt:
+    """
+    A prompt made of text and images. The images are passed to the chat model as separate message parts,
+    instead of being embedded into the prompt text.
+    """
+
+    def __init__(self, text: str, images: List[ImageRef] = None, label_images: bool = False):
+        """
+        Args:
+            text: The prompt text.
+            images: The attached images.
+            label_images: Precede each image with its name, so that the model can refer to the images
+                of a batch by name.
+        """
+        self._text: str = text
+        self._images: List[ImageRef] = images or []
+        self._label_images: bool = label_images
+
+    def get_text(self) -> str:
+        return self._text
+
+    def get_images(self) -> List[ImageRef]:
+        return self._images
+
+    def get_cache_key(self) -> str:
+        """Identifies the prompt by its text and the digests of its images, e.g. for cassettes."""
+        return json.dumps(
+            {
+                "text": self._text,
+                "images": [image.get_digest() for image in self._images],
+                "labels": [image.get_name() for image in self._images] if self._label_images else None,
+            }
+        )
+
+    def to_content(self) -> List[Dict]:
+        """The content parts of a chat message: the text, followed by one part per image."""
+        content: List[Dict] = []
+
+        if self._text.strip():
+            content.append({"type": "text", "text": self._text})
+
+        for image in self._images:
+            if self._label_images:
+                content.append({"type": "text", "text": f"Image file: {image.get_name()}"})
+            content.append({"type": "image_url", "image_url": {"url": image.to_data_url()}})
+
+        return content
+
+    @staticmethod
+    def from_string(prompt: str) -> "MultimodalPrompt":
+        """
+        Converts a prompt with embedded "Image data: data:image/...;base64,..." entries, the format used
+        before structured prompts, into a MultimodalPrompt.
+        """
+        images: List[ImageRef] = [
+            ImageRef(data=base64.b64decode(match.group(2)), mime_type=match.group(1))
+            for match in _DATA_URL_PATTERN.finditer(prompt)
+        ]
+
+        return MultimodalPrompt(_DATA_URL_PATTERN.sub("", prompt), images)
+
+    def __str__(self):
+        names: str = ", ".join(image.get_name() for image in self._images)
+        return f"{self._text}\n[{len(self._images)} images: {names}]"
+
+
+def _guess_mime_type(path: Optional[str]) -> str:
+    mime_type: Optional[str] = mimetypes.guess_type(path)[0] if path else None
+    return mime_type if mime_type and mime_type.startswith("image/") else "image/jpeg"
@@ -0,0 +1,220 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional, Tuple
+
+from swelldb.search.urls import canonical_url
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a search query so that queries differing only in case or whitespace share a cache entry.
+    """
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+class CachedPage:
+    def __init__(
+        self, body: str, etag: str, last_modified: str, fetched_at: float, fresh: bool
+    ):
+        self.body: str = body
+        self.etag: str = etag
+        self.last_modified: str = last_modified
+        self.fetched_at: float = fetched_at
+        self.fresh: bool = fresh
+
+
+class SearchCache:
+    """
+    A local cache for search engine results and crawled pages, stored in a SQLite file.
+
+    Entries are keyed by the normalized query or URL. Bodies are zlib-compressed and stored once per
+    content hash, so mirrors and repeated fetches of the same content share storage. Entries older than
+    the TTL are stale: search results are fetched again, while pages are revalidated with a conditional
+    request (ETag/Last-Modified) when the server provided validators.
+    """
+
+    SEARCH = "search"
+    PAGE = "page"
+
+    def __init__(self, path: str, ttl: Optional[float] = 24 * 3600):
+        """
+        Args:
+            path: The cache file.
+            ttl: Seconds after which an entry becomes stale. None means that entries never expire.
+        """
+        self._path: str = path
+        self._ttl: Optional[float] = ttl
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {
+            "search_hits": 0,
+            "search_misses": 0,
+            "page_hits": 0,
+            "page_misses": 0,
+            "page_revalidations": 0,
+        }
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                body BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (kind, key)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def get_search(self, query: str) -> Optional[dict]:
+        """
+        Returns the cached results of a query, or None if they are missing or stale.
+        """
+        entry = self._get(SearchCache.SEARCH, normalize_query(query))
+
+        if entry is None or not entry[4]:
+            self._count("search_misses")
+            return None
+
+        self._count("search_hits")
+        return json.loads(entry[0])
+
+    def put_search(self, query: str, results: dict) -> None:
+        self._put(SearchCache.SEARCH, normalize_query(query), json.dumps(results))
+
+    def get_page(self, url: str) -> Optional[CachedPage]:
+        """
+        Returns the cached page, or None if the page was never fetched. Stale pages are returned with
+        fresh=False, so that the caller can revalidate them.
+        """
+        entry = self._get(SearchCache.PAGE, canonical_url(url))
+
+        if entry is None:
+            self._count("page_misses")
+            return None
+
+        body, etag, last_modified, fetched_at, fresh = entry
+
+        if fresh:
+            self._count("page_hits")
+
+        return CachedPage(body, etag, last_modified, fetched_at, fresh)
+
+    def put_page(
+        self, url: str, body: str, etag: str = None, last_modified: str = None
+    ) -> None:
+        self._put(SearchCache.PAGE, canonical_url(url), body, etag, last_modified)
+
+    def revalidated(self, url: str) -> None:
+        """
+        Marks a stale page as fresh again, after the server answered a conditional request with 304.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE entries SET fetched_at = ? WHERE kind = ? AND key = ?",
+                (time.time(), SearchCache.PAGE, canonical_url(url)),
+            )
+            self._conn.commit()
+            self._stats["page_revalidations"] += 1
+
+    def page_miss(self) -> None:
+        """
+        Records a stale page that had to be fetched again.
+        """
+        self._count("page_misses")
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Returns the hit/miss counters and the hit rates of the cache.
+        """
+        with self._lock:
+            stats: Dict[str, float] = dict(self._stats)
+
+        searches: int = stats["search_hits"] + stats["search_misses"]
+        pages: int = (
+            stats["page_hits"] + stats["page_misses"] + stats["page_revalidations"]
+        )
+
+        stats["search_hit_rate"] = stats["search_hits"] / searches if searches else 0.0
+        stats["page_hit_rate"] = (
+            (stats["page_hits"] + stats["page_revalidations"]) / pages if pages else 0.0
+        )
+
+        return stats
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _get(self, kind: str, key: str) -> Optional[Tuple[str, str, str, float, bool]]:
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT blobs.body, entries.etag, entries.last_modified, entries.fetched_at
+                FROM entries JOIN blobs ON entries.hash = blobs.hash
+                WHERE entries.kind = ? AND entries.key = ?
+                """,
+                (kind, key),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        body, etag, last_modified, fetched_at = row
+        fresh: bool = self._ttl is None or time.time() - fetched_at <= self._ttl
+
+        return zlib.decompress(body).decode("utf-8"), etag, last_modified, fetched_at, fresh
+
+    def _put(
+        self,
+        kind: str,
+        key: str,
+        body: str,
+        etag: str = None,
+        last_modified: str = None,
+    ) -> None:
+        data: bytes = body.encode("utf-8")
+        content_hash: str = hashlib.sha256(data).hexdigest()
+
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT hash FROM entries WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+
+            self._conn.execute(
+                "INSERT OR IGNORE INTO blobs VALUES (?, ?)",
+                (content_hash, zlib.compress(data)),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, key, content_hash, etag, last_modified, time.time()),
+            )
+
+            # Drop the previous body if no other entry shares it
+            if previous and previous[0] != content_hash:
+                self._conn.execute(
+                    "DELETE FROM blobs WHERE hash = ? AND NOT EXISTS (SELECT 1 FROM entries WHERE hash = ?)",
+                    (previous[0], previous[0]),
+                )
+
+            self._conn.commit()
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
@@ -0,0 +1,115 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from swelldb.common.cassette import intercept
+from swelldb.search.cache import CachedPage, SearchCache
+
+
+class Crawler:
+    """
+    Fetches pages concurrently over a pooled HTTP session. The total number of in-flight requests
+    is bounded by max_workers, and the requests to a single domain by max_per_domain. If a cache is
+    given, fresh pages are served from it and stale ones are revalidated with conditional requests.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 16,
+        max_per_domain: int = 4,
+        timeout: float = 10.0,
+        cache: SearchCache = None,
+    ):
+        self._cache: SearchCache = cache
+        self._max_workers: int = max_workers
+        self._max_per_domain: int = max_per_domain
+        self._timeout: float = timeout
+
+        self._session: requests.Session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        self._domain_lock = threading.Lock()
+        self._domain_semaphores = defaultdict(
+            lambda: threading.BoundedSemaphore(self._max_per_domain)
+        )
+
+    def fetch(self, link: str) -> Optional[str]:
+        """
+        Fetches a single page. Returns None if the page could not be fetched.
+        """
+        return intercept("crawl", link, lambda: self._get(link))
+
+    def fetch_all(self, links: List[str]) -> List[Optional[str]]:
+        """
+        Fetches the given pages concurrently. The results follow the order of the links.
+        """
+        if not links:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(self._max_workers, len(links))) as pool:
+            return list(pool.map(self.fetch, links))
+
+    def _get(self, link: str) -> Optional[str]:
+        cached: Optional[CachedPage] = self._cache.get_page(link) if self._cache else None
+
+        if cached and cached.fresh:
+            return cached.body
+
+        headers: dict = {}
+        if cached and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+        domain: str = urlparse(link).netloc.lower()
+
+        with self._domain_lock:
+            semaphore = self._domain_semaphores[domain]
+
+        with semaphore:
+            try:
+                response = self._session.get(
+                    link, headers=headers, timeout=self._timeout
+                )
+            except requests.RequestException as e:
+                logging.error(f"Failed to fetch content from {link}: {e}")
+                return None
+
+        if response.status_code == 304 and cached:
+            self._cache.revalidated(link)
+            return cached.body
+
+        if response.status_code == 200:
+            if self._cache:
+                if cached:
+                    self._cache.page_miss()
+
+                self._cache.put_page(
+                    link,
+                    response.text,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                )
+
+            return response.text
+
+        logging.error(
+            f"Failed to fetch content from {link}, status code: {response.status_code}"
+        )
+        return None
+
+    def close(self) -> None:
+        self._session.close()
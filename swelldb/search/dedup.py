@@ -0,0 +1,138 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import hashlib
+from collections import defaultdict
+from typing import Dict, List, Set
+
+from swelldb.common.retrieval import tokenize
+from swelldb.common.text import count_tokens
+from swelldb.search.urls import canonical_url
+
+_SIMHASH_BITS: int = 64
+_SIMHASH_BANDS: int = 8
+_SHINGLE_SIZE: int = 3
+
+
+def _hash64(feature: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big"
+    )
+
+
+def simhash(text: str) -> int:
+    """
+    The 64-bit SimHash of the word shingles of the text. Near-identical texts have fingerprints with a
+    small Hamming distance.
+    """
+    tokens: List[str] = tokenize(text)
+
+    if len(tokens) < _SHINGLE_SIZE:
+        features: List[str] = [" ".join(tokens)]
+    else:
+        features = [
+            " ".join(tokens[i : i + _SHINGLE_SIZE])
+            for i in range(len(tokens) - _SHINGLE_SIZE + 1)
+        ]
+
+    weights: List[int] = [0] * _SIMHASH_BITS
+
+    for feature in features:
+        h: int = _hash64(feature)
+        for bit in range(_SIMHASH_BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+
+    fingerprint: int = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+
+    return fingerprint
+
+
+class DedupStats:
+    def __init__(self):
+        self.kept: int = 0
+        self.dropped_links: int = 0
+        self.dropped_texts: int = 0
+        self.dropped_bytes: int = 0
+        self.dropped_tokens: int = 0
+
+    def update(self, other: "DedupStats") -> None:
+        self.kept += other.kept
+        self.dropped_links += other.dropped_links
+        self.dropped_texts += other.dropped_texts
+        self.dropped_bytes += other.dropped_bytes
+        self.dropped_tokens += other.dropped_tokens
+
+    def __str__(self):
+        return (
+            f"DedupStats[kept={self.kept}, dropped_links={self.dropped_links}, "
+            f"dropped_texts={self.dropped_texts}, dropped_bytes={self.dropped_bytes}, "
+            f"dropped_tokens={self.dropped_tokens}]"
+        )
+
+
+class Deduplicator:
+    """
+    Detects repeated links and near-duplicate texts (mirrors, syndicated copies, the same snippet
+    returned by several queries), so that each of them reaches the prompt only once.
+
+    Texts are compared by SimHash. The fingerprints are split into bands, so that only texts sharing
+    a band are compared; with 8 bands of 8 bits every pair within a Hamming distance of 7 shares one.
+    """
+
+    def __init__(self, max_distance: int = 6):
+        self._max_distance: int = max_distance
+        self._links: Set[str] = set()
+        self._bands: List[Dict[int, List[int]]] = [
+            defaultdict(list) for _ in range(_SIMHASH_BANDS)
+        ]
+        self._stats: DedupStats = DedupStats()
+
+    def get_stats(self) -> DedupStats:
+        return self._stats
+
+    def add_link(self, link: str) -> bool:
+        """
+        Returns True if the link was not seen before.
+        """
+        canonical: str = canonical_url(link)
+
+        if canonical in self._links:
+            self._stats.dropped_links += 1
+            return False
+
+        self._links.add(canonical)
+        return True
+
+    def add_text(self, text: str) -> bool:
+        """
+        Returns True if the text is not a near-duplicate of a text seen before.
+        """
+        fingerprint: int = simhash(text)
+        band_bits: int = _SIMHASH_BITS // _SIMHASH_BANDS
+        band_mask: int = (1 << band_bits) - 1
+
+        bands: List[int] = [
+            fingerprint >> (band * band_bits) & band_mask for band in range(_SIMHASH_BANDS)
+        ]
+
+        for band, value in enumerate(bands):
+            for candidate in self._bands[band].get(value, []):
+                if bin(fingerprint ^ candidate).count("1") <= self._max_distance:
+                    self._stats.dropped_texts += 1
+                    self._stats.dropped_bytes += len(text.encode("utf-8"))
+                    self._stats.dropped_tokens += count_tokens(text)
+                    return False
+
+        for band, value in enumerate(bands):
+            self._bands[band][value].append(fingerprint)
+
+        self._stats.kept += 1
+        return True
+
+    def filter_texts(self, texts: List[str]) -> List[str]:
+        return [text for text in texts if self.add_text(text)]
@@ -0,0 +1,263 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import logging
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from swelldb.common.text import count_tokens
+
+try:
+    import lxml.html
+except ImportError as e:
+    logging.warning(f"lxml not installed, falling back to html.parser for HTML extraction: {e}")
+    lxml = None
+
+# Elements that never carry page content
+_REMOVED_TAGS: List[str] = [
+    "script",
+    "style",
+    "noscript",
+    "head",
+    "meta",
+    "link",
+    "template",
+    "svg",
+    "canvas",
+    "iframe",
+    "nav",
+    "header",
+    "footer",
+    "aside",
+    "form",
+    "input",
+    "button",
+    "select",
+]
+
+# Elements whose text ends a line
+_BLOCK_TAGS: List[str] = [
+    "p",
+    "div",
+    "section",
+    "article",
+    "main",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "li",
+    "ul",
+    "ol",
+    "dl",
+    "dt",
+    "dd",
+    "br",
+    "hr",
+    "pre",
+    "blockquote",
+    "figcaption",
+    "caption",
+]
+
+# class/id values of navigation and other boilerplate containers
+_BOILERPLATE_PATTERN = re.compile(
+    r"(^|[\s_-])(nav|navbar|navigation|menu|footer|sidebar|cookies?|banner|breadcrumbs?|"
+    r"advert|ads|social|share|subscribe|newsletter|popup|modal|related)($|[\s_-])",
+    re.IGNORECASE,
+)
+_BOILERPLATE_ROLES = {"navigation", "banner", "contentinfo", "complementary", "search"}
+_PROTECTED_TAGS = {"html", "body", "main", "article"}
+
+_SPACES_PATTERN = re.compile(r"[ \t\r\f\v\xa0]+")
+
+
+class PageExtraction:
+    def __init__(
+        self,
+        text: str,
+        raw_chars: int,
+        tokens: int,
+        seconds: float,
+        tables: List[List[List[str]]] = None,
+    ):
+        self.text: str = text
+        self.raw_chars: int = raw_chars
+        self.tokens: int = tokens
+        self.seconds: float = seconds
+        # The <table> elements of the page, as lists of rows of cell texts
+        self.tables: List[List[List[str]]] = tables or []
+
+
+def extract_text(raw_html: str) -> str:
+    """
+    Extracts the readable text of an HTML page. Scripts, styles, navigation and other boilerplate are
+    removed, and tables are kept as one line per row, with the cells delimited by " | ".
+    Args:
+        raw_html (str): The raw HTML content.
+    """
+    return _extract(raw_html)[0]
+
+
+def extract_tables(raw_html: str) -> List[List[List[str]]]:
+    """
+    Extracts the tables of an HTML page, as lists of rows of cell texts. The first row holds the headers.
+    Args:
+        raw_html (str): The raw HTML content.
+    """
+    return _extract(raw_html)[1]
+
+
+def _parse(raw_html: str):
+    try:
+        return lxml.html.fromstring(raw_html)
+    except ValueError:
+        pass
+    except lxml.etree.ParserError:
+        return None
+
+    # Strings with an XML encoding declaration must be parsed as bytes
+    try:
+        return lxml.html.fromstring(raw_html.encode("utf-8"))
+    except (ValueError, lxml.etree.ParserError):
+        return None
+
+
+def _extract(raw_html: str) -> Tuple[str, List[List[List[str]]]]:
+    if not raw_html or not raw_html.strip():
+        return "", []
+
+    if lxml is None:
+        return _extract_text_bs4(raw_html), []
+
+    root = _parse(raw_html)
+
+    if root is None:
+        return "", []
+
+    tables: List[List[List[str]]] = []
+
+    for element in root.xpath("|".join(f"//{tag}" for tag in _REMOVED_TAGS)):
+        element.drop_tree()
+
+    for element in root.xpath("//*[@class or @id or @role]"):
+        if element.tag in _PROTECTED_TAGS:
+            continue
+
+        attributes: str = f"{element.get('class', '')} {element.get('id', '')}"
+        if (
+            element.get("role") in _BOILERPLATE_ROLES
+            or _BOILERPLATE_PATTERN.search(attributes)
+        ):
+            element.drop_tree()
+
+    for table in root.xpath("//table[not(ancestor::table)]"):
+        rows: List[str] = []
+        table_rows: List[List[str]] = []
+        for row in table.iter("tr"):
+            cells: List[str] = [
+                _normalize_spaces(cell.text_content())
+                for cell in row
+                if cell.tag in ("td", "th")
+            ]
+            if any(cells):
+                rows.append(" | ".join(cells))
+                table_rows.append(cells)
+
+        if len(table_rows) > 1:
+            tables.append(table_rows)
+
+        replacement = lxml.html.Element("pre")
+        replacement.text = "\n" + "\n".join(rows) + "\n"
+        replacement.tail = table.tail
+        table.getparent().replace(table, replacement)
+
+    for element in root.iter(*_BLOCK_TAGS):
+        element.tail = "\n" + (element.tail or "")
+
+    return _normalize_lines(root.text_content()), tables
+
+
+def _extract_text_bs4(raw_html: str) -> str:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(raw_html, "html.parser")
+
+    for tag in soup(_REMOVED_TAGS):
+        tag.decompose()
+
+    return _normalize_lines(soup.get_text("\n"))
+
+
+def _normalize_spaces(text: str) -> str:
+    return _SPACES_PATTERN.sub(" ", text).strip()
+
+
+def _normalize_lines(text: str) -> str:
+    lines = (_normalize_spaces(line) for line in text.split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def _extract_page(raw_html: str) -> PageExtraction:
+    start: float = time.perf_counter()
+    text, tables = _extract(raw_html)
+    seconds: float = time.perf_counter() - start
+
+    return PageExtraction(
+        text=text,
+        raw_chars=len(raw_html),
+        tokens=count_tokens(text),
+        seconds=seconds,
+        tables=tables,
+    )
+
+
+def extract_pages(
+    pages: List[Optional[str]], max_workers: int = None
+) -> List[Optional[PageExtraction]]:
+    """
+    Extracts the text of the given pages in a process pool. The results follow the order of the pages;
+    missing pages (None) stay None.
+    Args:
+        pages (List[str]): The raw HTML of each page.
+        max_workers (int): The number of worker processes. Defaults to the number of CPUs.
+    """
+    indices: List[int] = [idx for idx, page in enumerate(pages) if page]
+    results: List[Optional[PageExtraction]] = [None] * len(pages)
+
+    if not indices:
+        return results
+
+    start: float = time.perf_counter()
+
+    if len(indices) == 1 or max_workers == 1:
+        extractions = [_extract_page(pages[idx]) for idx in indices]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            extractions = list(
+                pool.map(_extract_page, [pages[idx] for idx in indices], chunksize=4)
+            )
+
+    for idx, extraction in zip(indices, extractions):
+        results[idx] = extraction
+
+    raw_chars: int = sum(extraction.raw_chars for extraction in extractions)
+    tokens: int = sum(extraction.tokens for extraction in extractions)
+
+    logging.info(
+        f"Extracted {len(extractions)} pages in {time.perf_counter() - start:.2f}s: "
+        f"{raw_chars} HTML characters to {tokens} tokens"
+    )
+
+    for idx, extraction in zip(indices, extractions):
+        logging.debug(
+            f"Page {idx}: {extraction.tokens} tokens, extracted in {extraction.seconds * 1000:.1f}ms"
+        )
+
+    return results
@@ -0,0 +1,36 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track clicks and campaigns. Generic names, e.g. "ref" or "source", are
+# kept, as some sites select the content of a page with them
+_TRACKING_PARAMS_PATTERN = re.compile(
+    r"^(utm_.*|gclid|dclid|gbraid|wbraid|fbclid|msclkid|yclid|igshid|mc_cid|mc_eid|ref_src)$",
+    re.IGNORECASE,
+)
+
+
+def canonical_url(url: str) -> str:
+    """
+    A canonical form of a URL, shared by the page cache and the duplicate link detection: no scheme, no
+    "www." prefix, no fragment, no tracking parameters, sorted query parameters and no trailing slash.
+    """
+    parts = urlsplit(url.strip())
+
+    host: str = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+
+    query: str = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not _TRACKING_PARAMS_PATTERN.match(key)
+        )
+    )
+
+    return urlunsplit(("", host, parts.path.rstrip("/"), query, ""))
@@ -1,39 +1,75 @@
-import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 
-from bs4 import BeautifulSoup
+from swelldb.common.cassette import intercept
+from swelldb.search.cache import SearchCache
+from swelldb.search.crawler import Crawler
+from swelldb.search.extraction import extract_text
 
+_default_crawler: Crawler = None
 
-def clean_html(raw_html):
+
+def clean_html(raw_html: str) -> str:
     """
-    Cleans the raw HTML content by removing scripts, styles, and other non-essential elements.
+    Cleans the raw HTML content by removing scripts, styles, and other non-essential elements,
+    and returns the remaining text.
     Args:
         raw_html (str): The raw HTML content to clean.
     """
-    soup = BeautifulSoup(raw_html, "html.parser")
+    return extract_text(raw_html)
 
-    # Remove scripts, styles, and hidden elements
-    for tag in soup(["script", "style", "noscript", "meta", "head"]):
-        tag.decompose()
 
-    # Optional: remove elements with low value
-    for tag in soup.find_all(['nav', 'footer', 'aside', 'form', 'input']):
-        tag.decompose()
+def search_query(search_engine, query: str, cache: SearchCache = None) -> dict:
+    """
+    Issues a query to the search engine and returns the raw results.
+    Args:
+        search_engine (GoogleSerperAPIWrapper): The search engine wrapper.
+        query (str): The search query.
+        cache (SearchCache): Optional cache, consulted before issuing the query.
+    """
+    if cache:
+        results = cache.get_search(query)
+        if results is not None:
+            return results
 
-    return soup
+    results = intercept("search", query, lambda: search_engine.results(query))
 
+    if cache:
+        cache.put_search(query, results)
 
-def crawl(link: str):
+    return results
+
+
+def search_all(
+    search_engine, queries: List[str], max_workers: int = 8, cache: SearchCache = None
+) -> List[dict]:
     """
-    Crawls the given link and returns the cleaned HTML content.
+    Issues the queries to the search engine concurrently and returns their raw results.
+    Args:
+        search_engine (GoogleSerperAPIWrapper): The search engine wrapper.
+        queries (List[str]): The search queries.
+        max_workers (int): The maximum number of in-flight queries.
+        cache (SearchCache): Optional cache, consulted before issuing each query.
+    """
+    if not queries:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(queries))) as pool:
+        return list(
+            pool.map(lambda query: search_query(search_engine, query, cache), queries)
+        )
+
+
+def crawl(link: str) -> Optional[str]:
+    """
+    Crawls the given link and returns its raw HTML content, or None if it could not be fetched.
+    Use clean_html to extract the text.
     Args:
         link (str): The URL to crawl.
     """
-    import requests
+    global _default_crawler
+
+    if _default_crawler is None:
+        _default_crawler = Crawler()
 
-    response = requests.get(link)
-    if response.status_code == 200:
-        # Assuming the content is text/html, you can parse it as needed
-        return response.text
-    else:
-        logging.error(f"Failed to fetch content from {link}, status code: {response.status_code}")
-        return None
\ No newline at end of file
+    return _default_crawler.fetch(link)
@@ -3,10 +3,11 @@
 # This file is part of SwellDB and is licensed under the MIT License.
 # See the LICENSE file in the project root for more information.
 
-from typing import Union, List, Dict
+from typing import Union, List, Dict, Set
 
 import pyarrow as pa
 
+from swelldb.datasource.database_datasource import DatabaseDatasource
 from swelldb.engine.datafusion_processor import DataFusionEngine
 from swelldb.table_plan.planner import TableGenPlanner
 from swelldb.table_plan.swelldb_schema import SwellDBSchema
@@ -17,9 +18,14 @@ from swelldb.table_plan.table.physical.llm_table import LLMTable
 from swelldb.table_plan.table.physical.physical_table import PhysicalTable
 from swelldb.table_plan.table.physical.search_engine_table import SearchEngineTable
 from swelldb.table_plan.table.physical.image_table import ImageTable
+from swelldb.table_plan.table.physical.document_table import DocumentTable
 from swelldb.engine.execution_engine import ExecutionEngine
 from swelldb.llm.openai_llm import OpenAILLM
 from swelldb.table_plan.meta import SwellDBMeta
+from swelldb.search.cache import SearchCache
+from swelldb.common.document_cache import DocumentCache
+from swelldb.common.image_manifest import ImageManifest
+from swelldb.common.image_processing import ImagePreprocessor
 from swelldb.table_plan.mode import Mode
 from swelldb.util.config import Config
 
@@ -30,6 +36,8 @@ class TableBuilder:
         self.swelldb_ctx = swelldb_ctx
         self.csv_files: List[(str, str)] = []
         self.parquet_files: List[(str, str)] = []
+        self.ipc_files: List[(str, str)] = []
+        self.databases: Dict[str, DatabaseDatasource] = dict()
 
     def set_table_name(self, name: str) -> "TableBuilder":
         self._meta.set_table_name(name)
@@ -55,12 +63,18 @@ class TableBuilder:
         self._meta.set_operators(operators)
         return self
 
-    def set_data(self, data: pa.Table) -> "TableBuilder":
+    def set_data(self, data: pa.Table, name: str = "data") -> "TableBuilder":
+        """
+        Sets the input rows of the table. The data is also registered, without copying, as a table with
+        the given name, which SQL queries over the registered tables can read. The name must not be
+        taken by a table registered otherwise, e.g. from a CSV file.
+        """
         if self._child_table:
             raise ValueError(
                 "Cannot set data when child table is already set. Please use either data or child_table."
             )
         self._meta.set_data(data)
+        self._meta.set_data_name(name)
         return self
 
     def set_child_table(self, table: PhysicalTable) -> "TableBuilder":
@@ -72,21 +86,123 @@ class TableBuilder:
         return self
 
     def set_chunk_size(self, chunk_size: int) -> "TableBuilder":
+        """
+        The number of input rows per prompt. Operators with input rows, e.g. an LLM table over a
+        dataset, issue one prompt per chunk of rows.
+        """
         self._meta.set_chunk_size(chunk_size)
         return self
 
+    def set_crawl_pages(self, crawl_pages: bool) -> "TableBuilder":
+        self._meta.set_crawl_pages(crawl_pages)
+        return self
+
+    def set_search_concurrency(self, search_concurrency: int) -> "TableBuilder":
+        self._meta.set_search_concurrency(search_concurrency)
+        return self
+
+    def set_search_cache(self, search_cache: SearchCache) -> "TableBuilder":
+        self._meta.set_search_cache(search_cache)
+        return self
+
+    def set_context_top_k(self, context_top_k: int) -> "TableBuilder":
+        self._meta.set_context_top_k(context_top_k)
+        return self
+
+    def set_search_query_template(self, search_query_template: str) -> "TableBuilder":
+        """
+        Search once per input row, with queries created from a template over the base columns,
+        e.g. "{company} headquarters", instead of LLM-generated queries for the whole table.
+        """
+        self._meta.set_search_query_template(search_query_template)
+        return self
+
+    def set_document_cache(self, document_cache: DocumentCache) -> "TableBuilder":
+        self._meta.set_document_cache(document_cache)
+        return self
+
+    def set_max_concurrency(self, max_concurrency: int) -> "TableBuilder":
+        """
+        The maximum number of LLM calls issued concurrently while the table is materialized. Defaults
+        to 4; set it to 1 to issue the calls one at a time, e.g. under a strict rate limit.
+        """
+        self._meta.set_max_concurrency(max_concurrency)
+        return self
+
+    def set_context_fraction(self, context_fraction: float) -> "TableBuilder":
+        """
+        The fraction of the model context, after the prompt and the expected output, that each document
+        chunk fills.
+        """
+        self._meta.set_context_fraction(context_fraction)
+        return self
+
+    def set_image_preprocessor(self, image_preprocessor: ImagePreprocessor) -> "TableBuilder":
+        """
+        How images are resized and re-encoded before they are sent to the LLM. None sends the original
+        files.
+        """
+        self._meta.set_image_preprocessor(image_preprocessor)
+        return self
+
+    def set_image_batch_size(self, image_batch_size: int) -> "TableBuilder":
+        """
+        The number of images sent in a single LLM call, each of them producing one row. The batches are
+        further bounded by the image and context limits of the model.
+        """
+        self._meta.set_image_batch_size(image_batch_size)
+        return self
+
+    def set_image_manifest(self, image_manifest: ImageManifest) -> "TableBuilder":
+        """
+        A record of the images of previous runs. Images that were processed before reuse their rows, and
+        near-duplicate images are sent to the LLM only once.
+        """
+        self._meta.set_image_manifest(image_manifest)
+        return self
+
     def add_csv_file(self, name: str, path: str) -> "TableBuilder":
         self.csv_files.append((name, path))
         return self
 
     def add_parquet_file(self, name: str, path: str) -> "TableBuilder":
+        """
+        Adds a Parquet file, or a directory of Parquet files that may be hive-partitioned
+        ("year=2024/..."), as a table.
+        """
         self.parquet_files.append((name, path))
         return self
 
+    def add_ipc_file(self, name: str, path: str) -> "TableBuilder":
+        """
+        Adds an Arrow IPC (Feather) file, or a directory of them, as a table.
+        """
+        self.ipc_files.append((name, path))
+        return self
+
+    def add_database(self, name: str, database: DatabaseDatasource) -> "TableBuilder":
+        """
+        Adds a database, e.g. a SQLiteDatasource, that the planner can read columns from. Its tables are
+        read in the database, with the needed columns and rows only.
+        """
+        self.databases[name] = database
+        return self
+
     def add_images(self, image_path: str):
         self._meta.add_image(image_path)
         return self
 
+    def add_documents(self, document_paths: Union[str, List[str]]) -> "TableBuilder":
+        """
+        Adds PDF, DOCX, TXT or Markdown documents to extract the table from, in document mode.
+        """
+        if isinstance(document_paths, str):
+            document_paths = [document_paths]
+
+        for document_path in document_paths:
+            self._meta.add_document(document_path)
+        return self
+
     def build(self):
         """
         Build the table using the provided parameters.
@@ -101,12 +217,24 @@ class TableBuilder:
             name, path = csv_file
             self.swelldb_ctx._execution_engine.register_csv(name=name, path=path)
 
+        for parquet_file in self.parquet_files:
+            name, path = parquet_file
+            self.swelldb_ctx._execution_engine.register_parquet(name=name, path=path)
+
+        for ipc_file in self.ipc_files:
+            name, path = ipc_file
+            self.swelldb_ctx._execution_engine.register_ipc(name=name, path=path)
+
+        if self._meta.get_data() is not None:
+            self.swelldb_ctx._register_data(self._meta.get_data_name(), self._meta.get_data())
+
         tables = self.swelldb_ctx._execution_engine.get_tables()
 
         return self.swelldb_ctx._create_table(
             meta=self._meta,
             child_table=self._child_table,
             tables=tables,
+            databases=self.databases,
         )
 
 
@@ -114,11 +242,16 @@ class SwellDB:
     def __init__(
         self,
         llm: AbstractLLM,
-        execution_engine: ExecutionEngine = DataFusionEngine(),
+        execution_engine: ExecutionEngine = None,
         serper_api_key: str = None,
     ):
+        # Each instance has its own engine, so that instances do not share registered tables
+        execution_engine = execution_engine or DataFusionEngine()
         self._execution_engine = execution_engine
         self._llm = llm
+
+        # The tables registered from the data of table builders, which later builders may replace
+        self._data_tables: Set[str] = set()
         
         # Load config and use environment variables as override
         self._config = Config()
@@ -134,11 +267,29 @@ class SwellDB:
         """
         return TableBuilder(self)
 
+    def _register_data(self, name: str, data: pa.Table) -> None:
+        """
+        Registers the data of a table builder. It replaces the data of a previous table builder with
+        the same name, but not a table registered otherwise, e.g. from a CSV file.
+
+        Raises:
+            ValueError: If a table that was not registered from data has the same name.
+        """
+        if name in self._execution_engine.get_catalog() and name not in self._data_tables:
+            raise ValueError(
+                f"A table named {name} is already registered. Please give the data another name "
+                f"with set_data(data, name=...)."
+            )
+
+        self._execution_engine.register_arrow(name=name, data=data, replace=True)
+        self._data_tables.add(name)
+
     def _create_table(
         self,
         meta: SwellDBMeta,
         child_table: PhysicalTable = None,
         tables: Dict[str, str] = None,
+        databases: Dict[str, DatabaseDatasource] = None,
     ) -> PhysicalTable:
         """
         Create a table using the provided metadata.
@@ -147,6 +298,7 @@ class SwellDB:
             meta (SwellDBMeta): The metadata for the table.
             child_table (PhysicalTable): Optional child table. Default is None.
             tables (Dict[str, str]): A dictionary of registered tables to be used for the table generation. Default is None.
+            databases (Dict[str, DatabaseDatasource]): The databases that the planner can read columns from. Default is None.
 
         Returns:
             PhysicalTable: The created table.
@@ -180,6 +332,9 @@ class SwellDB:
         if mode == Mode.IMAGE and not meta.get_images():
             raise ValueError("Image paths must be specified in image mode. Use add_images() to add image paths.")
 
+        if mode == Mode.DOCUMENT and not (meta.get_documents() or meta.get_links()):
+            raise ValueError("Document paths must be specified in document mode. Use add_documents() to add document paths.")
+
         if isinstance(schema, str):
             schema = SwellDBSchema.from_string(schema)
 
@@ -203,7 +358,8 @@ class SwellDB:
             table: PhysicalTable = self._planner.create_plan(
                 logical_table=logical_table,
                 base_columns=base_columns,
-                tables=tables
+                tables=tables,
+                databases=databases,
             )
         # Experimental
         elif mode == Mode.OPERATORS:
@@ -236,6 +392,14 @@ class SwellDB:
                 llm=self._llm,
                 execution_engine=self._execution_engine,
             )
+        elif mode == Mode.DOCUMENT:
+            table: PhysicalTable = DocumentTable(
+                logical_table=logical_table,
+                child_table=child_table,
+                meta=meta,
+                llm=self._llm,
+                execution_engine=self._execution_engine,
+            )
         else:
             raise ValueError(f"Unknown mode: {mode}")
 
@@ -6,6 +6,10 @@
 from typing import Union, List
 import pyarrow as pa
 
+from swelldb.common.document_cache import DocumentCache
+from swelldb.common.image_manifest import ImageManifest
+from swelldb.common.image_processing import ImagePreprocessor
+from swelldb.search.cache import SearchCache
 from swelldb.table_plan.swelldb_schema import SwellDBSchema
 from swelldb.table_plan.layout import Layout
 from swelldb.table_plan.mode import Mode
@@ -15,7 +19,9 @@ class SwellDBMeta:
     def __init__(self):
         self._links: List[str] = []
         self._images: List[str] = []
+        self._documents: List[str] = []
         self._data: pa.Table = None
+        self._data_name: str = "data"
         self._base_columns: List[str] = None
         self._schema: Union[SwellDBSchema, str] = None
         self._content: str = None
@@ -25,6 +31,17 @@ class SwellDBMeta:
         self._chunk_size: int = 20
         self._layout: Layout = Layout.ROW()
         self._serper_api_key: str = None
+        self._crawl_pages: bool = False
+        self._search_concurrency: int = 8
+        self._search_cache: SearchCache = None
+        self._context_top_k: int = 10
+        self._search_query_template: str = None
+        self._document_cache: DocumentCache = None
+        self._max_concurrency: int = 4
+        self._context_fraction: float = 0.5
+        self._image_preprocessor: ImagePreprocessor = ImagePreprocessor()
+        self._image_batch_size: int = 1
+        self._image_manifest: ImageManifest = None
 
     def set_links(self, links: List[str]) -> "SwellDBMeta":
         self._links = links
@@ -34,10 +51,18 @@ class SwellDBMeta:
         self._images = images
         return self
 
+    def set_documents(self, documents: List[str]) -> "SwellDBMeta":
+        self._documents = documents
+        return self
+
     def set_data(self, data: pa.Table) -> "SwellDBMeta":
         self._data = data
         return self
 
+    def set_data_name(self, data_name: str) -> "SwellDBMeta":
+        self._data_name = data_name
+        return self
+
     def set_base_columns(self, base_columns: List[str]) -> "SwellDBMeta":
         self._base_columns = base_columns
         return self
@@ -81,6 +106,50 @@ class SwellDBMeta:
         self._serper_api_key = serper_api_key
         return self
 
+    def set_crawl_pages(self, crawl_pages: bool) -> "SwellDBMeta":
+        self._crawl_pages = crawl_pages
+        return self
+
+    def set_search_concurrency(self, search_concurrency: int) -> "SwellDBMeta":
+        self._search_concurrency = search_concurrency
+        return self
+
+    def set_search_cache(self, search_cache: SearchCache) -> "SwellDBMeta":
+        self._search_cache = search_cache
+        return self
+
+    def set_context_top_k(self, context_top_k: int) -> "SwellDBMeta":
+        self._context_top_k = context_top_k
+        return self
+
+    def set_search_query_template(self, search_query_template: str) -> "SwellDBMeta":
+        self._search_query_template = search_query_template
+        return self
+
+    def set_document_cache(self, document_cache: DocumentCache) -> "SwellDBMeta":
+        self._document_cache = document_cache
+        return self
+
+    def set_max_concurrency(self, max_concurrency: int) -> "SwellDBMeta":
+        self._max_concurrency = max_concurrency
+        return self
+
+    def set_context_fraction(self, context_fraction: float) -> "SwellDBMeta":
+        self._context_fraction = context_fraction
+        return self
+
+    def set_image_preprocessor(self, image_preprocessor: ImagePreprocessor) -> "SwellDBMeta":
+        self._image_preprocessor = image_preprocessor
+        return self
+
+    def set_image_batch_size(self, image_batch_size: int) -> "SwellDBMeta":
+        self._image_batch_size = image_batch_size
+        return self
+
+    def set_image_manifest(self, image_manifest: ImageManifest) -> "SwellDBMeta":
+        self._image_manifest = image_manifest
+        return self
+
     # Getters
     def get_links(self) -> List[str]:
         return self._links
@@ -88,9 +157,15 @@ class SwellDBMeta:
     def get_images(self) -> List[str]:
         return self._images
 
+    def get_documents(self) -> List[str]:
+        return self._documents
+
     def get_data(self) -> pa.Table:
         return self._data
 
+    def get_data_name(self) -> str:
+        return self._data_name
+
     def get_base_columns(self) -> List[str]:
         return self._base_columns
 
@@ -118,6 +193,39 @@ class SwellDBMeta:
     def get_serper_api_key(self) -> str:
         return self._serper_api_key
 
+    def get_crawl_pages(self) -> bool:
+        return self._crawl_pages
+
+    def get_search_concurrency(self) -> int:
+        return self._search_concurrency
+
+    def get_search_cache(self) -> SearchCache:
+        return self._search_cache
+
+    def get_context_top_k(self) -> int:
+        return self._context_top_k
+
+    def get_search_query_template(self) -> str:
+        return self._search_query_template
+
+    def get_document_cache(self) -> DocumentCache:
+        return self._document_cache
+
+    def get_max_concurrency(self) -> int:
+        return self._max_concurrency
+
+    def get_context_fraction(self) -> float:
+        return self._context_fraction
+
+    def get_image_preprocessor(self) -> ImagePreprocessor:
+        return self._image_preprocessor
+
+    def get_image_batch_size(self) -> int:
+        return self._image_batch_size
+
+    def get_image_manifest(self) -> ImageManifest:
+        return self._image_manifest
+
     def add_link(self, link: str) -> "SwellDBMeta":
         if link not in self._links:
             self._links.append(link)
@@ -126,4 +234,9 @@ class SwellDBMeta:
     def add_image(self, image_path: str) -> "SwellDBMeta":
         if image_path not in self._images:
             self._images.append(image_path)
+        return self
+
+    def add_document(self, document_path: str) -> "SwellDBMeta":
+        if document_path not in self._documents:
+            self._documents.append(document_path)
         return self
\ No newline at end of file
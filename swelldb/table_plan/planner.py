@@ -6,15 +6,18 @@
 import json
 import logging
 
-from typing import List, Set, Dict
+from typing import List, Optional, Set, Dict
 
+from swelldb.datasource.database_datasource import DatabaseDatasource
 from swelldb.engine.execution_engine import ExecutionEngine
+from swelldb.engine.sql_generator import SQLGenerator
 from swelldb.llm.abstract_llm import AbstractLLM
 from swelldb.table_plan import planner_prompts
 from swelldb.table_plan.swelldb_schema import SwellDBSchema
 from swelldb.table_plan.meta import SwellDBMeta
 
 from swelldb.table_plan.table.logical.logical_table import LogicalTable
+from swelldb.table_plan.table.physical.database_table import DatabaseTable
 from swelldb.table_plan.table.physical.dataset_table import DatasetTable
 from swelldb.table_plan.table.physical.llm_table import LLMTable
 from swelldb.table_plan.table.physical.physical_table import PhysicalTable
@@ -100,6 +103,7 @@ class TableGenPlanner:
         logical_table: LogicalTable,
         base_columns: List[str],
         tables: Dict[str, str] = dict(),
+        databases: Dict[str, DatabaseDatasource] = None,
     ) -> PhysicalTable:
 
         # Root table operator
@@ -111,20 +115,52 @@ class TableGenPlanner:
         # The remaining column set — Keeps track of the columns that are not yet generated
         remaining_column_set: Set[str] = set(initial_schema.get_attribute_names())
 
-        # Get the columns that we can generate with the provided datasets
-        local_ds_columns_response: str = self._llm.call(
-            planner_prompts.get_local_tables_prompt(
-                logical_table, table_schema_dict=tables
+        # Read the columns that a database provides first, with the filters and the projection
+        # running in the database
+        if databases:
+            root_table = self._create_database_table(logical_table, base_columns, databases)
+
+            if root_table:
+                remaining_column_set.difference_update(root_table.get_columns())
+
+        if not tables or not remaining_column_set:
+            return self._create_generated_tables(
+                logical_table, base_columns, root_table, remaining_column_set
             )
-        )
 
-        # This response is a JSON string that contains the columns and the SQL query
-        local_ds_columns_meta: Dict = json.loads(local_ds_columns_response)
-        local_ds_columns = local_ds_columns_meta["columns"]
-        local_ds_sql_query = local_ds_columns_meta["query"]
+        local_logical_table: LogicalTable = logical_table
+
+        # The local tables provide the remaining columns, joined with the database rows
+        if root_table:
+            local_logical_table = LogicalTable(
+                name=logical_table.get_name(),
+                prompt=logical_table.get_prompt(),
+                schema=SwellDBSchema(
+                    attributes=[
+                        attribute
+                        for attribute in initial_schema.get_attributes()
+                        if attribute.get_name() in remaining_column_set
+                        or attribute.get_name() in base_columns
+                    ]
+                ),
+            )
 
-        # If any of the columns can be generated by the LLM
-        if local_ds_columns_meta:
+        # Get the columns that we can generate with the provided datasets, and the SQL query. A
+        # repeated prompt over the same tables is answered from the cache, without an LLM call, and the
+        # query is planned before it runs, and repaired if it is invalid
+        local_ds_prompt: str = planner_prompts.get_local_tables_prompt(
+            local_logical_table, table_schema_dict=tables
+        )
+        local_ds_columns, local_ds_sql_query = SQLGenerator(
+            self._llm,
+            self._execution_engine,
+            cache=self._execution_engine.get_sql_cache(),
+        ).generate_columns(
+            local_ds_prompt, local_logical_table.get_schema().get_attribute_names()
+        )
+
+        # If any of the columns can be generated from the datasets
+        if local_ds_columns:
             local_ds_table_schema = SwellDBSchema(
                 attributes=[
                     logical_table.get_schema().get_attribute(col)
@@ -143,7 +179,7 @@ class TableGenPlanner:
                 logical_table=local_ds_logical_table,
                 llm=self._llm,
                 base_columns=base_columns,
-                child_table=None,
+                child_table=root_table,
                 query=local_ds_sql_query,
                 execution_engine=self._execution_engine,
             )
@@ -151,6 +187,93 @@ class TableGenPlanner:
             # Remove the columns that can be generated with the provided datasets from the remaining column set
             remaining_column_set = remaining_column_set.difference(local_ds_columns)
 
+        return self._create_generated_tables(
+            logical_table, base_columns, root_table, remaining_column_set
+        )
+
+    def _create_database_table(
+        self,
+        logical_table: LogicalTable,
+        base_columns: List[str],
+        databases: Dict[str, DatabaseDatasource],
+    ) -> Optional[DatabaseTable]:
+        """
+        Asks the LLM which database table, columns and filters the table can be read from. The plan is
+        checked against the database: unknown columns and invalid filters are dropped, and the database
+        is not used if it does not provide the base columns.
+        """
+        db_tables: Dict[str, str] = {
+            f"{db_name}.{table}": schema
+            for db_name, db in databases.items()
+            for table, schema in db.get_tables().items()
+        }
+
+        if not db_tables:
+            return None
+
+        plan: Dict = json.loads(
+            self._llm.call(planner_prompts.get_database_table_prompt(logical_table, db_tables))
+        )
+
+        name: str = plan.get("table") or ""
+
+        if name not in db_tables:
+            logging.info(f"No database table provides the columns: {name or None}")
+            return None
+
+        db_name, table = name.split(".", 1)
+        db: DatabaseDatasource = databases[db_name]
+        table_columns: List[str] = db.schema()[table]
+        attribute_names: List[str] = logical_table.get_schema().get_attribute_names()
+
+        columns: Dict[str, str] = {
+            column: source
+            for column, source in (plan.get("columns") or dict()).items()
+            if column in attribute_names and source in table_columns
+        }
+
+        missing: List[str] = [column for column in base_columns if column not in columns]
+
+        if missing:
+            logging.info(f"The database table {name} does not provide the base columns {missing}")
+            return None
+
+        filters: List[str] = []
+
+        for condition in plan.get("filters") or []:
+            try:
+                db.validate(f"SELECT 1 FROM {db.quote_identifier(table)} WHERE {condition}")
+                filters.append(condition)
+            except Exception as e:
+                logging.warning(f"Dropping the invalid database filter {condition}: {e}")
+
+        database_logical_table = LogicalTable(
+            name="database_table",
+            prompt=logical_table.get_prompt(),
+            schema=SwellDBSchema(
+                attributes=[logical_table.get_schema().get_attribute(col) for col in columns]
+            ),
+        )
+
+        return DatabaseTable(
+            execution_engine=self._execution_engine,
+            logical_table=database_logical_table,
+            child_table=None,
+            base_columns=base_columns,
+            llm=self._llm,
+            database_datasource=db,
+            table=table,
+            columns=columns,
+            filters=filters,
+        )
+
+    def _create_generated_tables(
+        self,
+        logical_table: LogicalTable,
+        base_columns: List[str],
+        root_table: PhysicalTable,
+        remaining_column_set: Set[str],
+    ) -> PhysicalTable:
         # Check which columns can be generated by the LLM
         if remaining_column_set:
             tmp_logical_table = LogicalTable(
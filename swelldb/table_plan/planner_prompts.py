@@ -91,6 +91,36 @@ def get_local_tables_prompt(
         return prompt
 
 
+def get_database_table_prompt(
+    logical_table: LogicalTable, table_schema_dict: Dict[str, str]
+):
+    """
+    Generate the prompt for the database table, columns and filters that the table can be read from
+    :param logical_table: The logical table
+    :param table_schema_dict: The schema of each database table, by "database.table" name
+    :return: The prompt
+    """
+
+    # Get the directory of the current file
+    current_dir = os.path.dirname(__file__)
+
+    # Construct the relative path to the target file or directory
+    prompt_file_path = os.path.join(
+        current_dir, "prompts", "database_table_prompt.jinja"
+    )
+
+    # Read the file and render the template
+    with open(prompt_file_path, "r") as file:
+        template = Template(file.read())
+        prompt = template.render(
+            content=logical_table.get_prompt(),
+            schema=logical_table.get_schema().get_attribute_names(),
+            tables="\n".join(f"{name}: {schema}" for name, schema in table_schema_dict.items()),
+        )
+
+        return prompt
+
+
 def get_llm_columns_prompt(logical_table: LogicalTable):
     """
     Generate the prompt for the LLM columns
@@ -3,30 +3,129 @@
 # This file is part of SwellDB and is licensed under the MIT License.
 # See the LICENSE file in the project root for more information.
 
+import logging
+from typing import Any, Dict, List
+
+import pyarrow as pa
+import pyarrow.compute as pc
 from overrides import override
 from pyarrow import Table
 
 from swelldb.datasource.database_datasource import DatabaseDatasource
+from swelldb.engine.execution_engine import ExecutionEngine
+from swelldb.llm.abstract_llm import AbstractLLM
 from swelldb.table_plan.table.logical.logical_table import LogicalTable
 from swelldb.table_plan.table.physical.physical_table import PhysicalTable
 
+# The maximum number of child keys pushed into the query as an IN list
+_MAX_PUSHED_KEYS: int = 10000
+
 
 class DatabaseTable(PhysicalTable):
+    """
+    Reads the columns of a table from a database. The projection and the filters run in the database,
+    and so does the join with the child rows, as an IN list of their base column values, so that only
+    the needed rows are fetched.
+    """
+
     def __init__(
         self,
+        execution_engine: ExecutionEngine,
         logical_table: LogicalTable,
-        query: str,
+        child_table: PhysicalTable,
+        base_columns: List[str],
+        llm: AbstractLLM,
         database_datasource: DatabaseDatasource,
+        table: str = None,
+        columns: Dict[str, str] = None,
+        filters: List[str] = None,
+        query: str = None,
     ):
-        super().__init__(logical_table=logical_table, children=[])
+        """
+        Args:
+            table: The database table to read.
+            columns: The source column of each output column. Defaults to the columns of the logical
+                table, with the same names.
+            filters: SQL conditions over the columns of the database table.
+            query: A query to run instead of reading a table. Nothing is pushed into it.
+        """
+        super().__init__(
+            logical_table=logical_table,
+            child_table=child_table,
+            operator_name="database_table",
+            llm=llm,
+            base_columns=base_columns,
+            execution_engine=execution_engine,
+        )
+
+        if table is None and query is None:
+            raise ValueError("Either a table or a query must be given.")
+
+        self._db: DatabaseDatasource = database_datasource
+        self._table: str = table
+        self._columns: Dict[str, str] = columns or {
+            name: name for name in logical_table.get_schema().get_attribute_names()
+        }
+        self._filters: List[str] = filters or []
+        self._query: str = query
 
-        self._query = query
-        self._db = database_datasource
+    def get_columns(self) -> Dict[str, str]:
+        """The source column of each output column."""
+        return self._columns
+
+    @override
+    def materialize(self, partitions=1) -> Table:
+        with self.materialize_stream(partitions) as reader:
+            return reader.read_all()
+
+    @override
+    def is_streaming(self) -> bool:
+        # The child rows are needed before the query, to push their keys into it
+        return self._child_table is None
 
     @override
-    def materialize(self) -> Table:
-        return self._db.sql(self._query)
+    def materialize_stream(self, partitions=1) -> pa.RecordBatchReader:
+        if self._child_table is None:
+            if self._query is not None:
+                return self._db.sql_stream(self._query)
+
+            return self._db.scan(self._table, self._columns, self._filters)
+
+        child_result: Table = self._child_table.materialize(partitions)
+
+        if self._query is not None:
+            table: Table = self._db.sql(self._query)
+        else:
+            table = self._scan_matching(child_result)
+
+        table = self._join_child(table, child_result)
+
+        return pa.RecordBatchReader.from_batches(table.schema, table.to_batches())
+
+    def _scan_matching(self, child_result: Table) -> Table:
+        """Reads the rows whose base column value is one of the child rows, as a semi-join."""
+        filters: List[str] = list(self._filters)
+        parameters: List[Any] = []
+
+        if child_result is not None and len(self._base_columns or []) == 1:
+            base_column: str = self._base_columns[0]
+            keys: List[Any] = pc.unique(child_result.column(base_column).drop_null()).to_pylist()
+
+            if len(keys) <= _MAX_PUSHED_KEYS and base_column in self._columns:
+                source: str = self._db.quote_identifier(self._columns[base_column])
+                filters.append(f"{source} IN ({', '.join(['?'] * len(keys))})" if keys else "0")
+                parameters = keys
+            else:
+                logging.info(f"Joining {len(keys)} keys after the database scan")
+
+        with self._db.scan(self._table, self._columns, filters, parameters) as reader:
+            return reader.read_all()
 
     @override
     def __str__(self):
-        return f'DatabaseTable[schema={self._logical_table.get_schema()}, query="{self._query}"]'
+        source: str = (
+            f'query="{self._query}"'
+            if self._query is not None
+            else f"table={self._table}, columns={self._columns}, filters={self._filters}"
+        )
+        return f"DatabaseTable[schema={self._logical_table.get_schema().get_attribute_names()}, {source}]"
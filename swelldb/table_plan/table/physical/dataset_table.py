@@ -4,12 +4,14 @@
 # See the LICENSE file in the project root for more information.
 import importlib
 import os
-from typing import List, Dict
+from typing import Iterator, List, Dict
 
 from jinja2 import Template
 from overrides import override, overrides
+import pyarrow as pa
 from pyarrow import Table
 
+from swelldb.engine.sql_generator import SQLGenerator
 from swelldb.llm.abstract_llm import AbstractLLM
 from swelldb.table_plan.layout import Layout
 from swelldb.table_plan.table.logical.logical_table import LogicalTable
@@ -28,6 +30,10 @@ class DatasetTable(PhysicalTable):
         layout: Layout = Layout.ROW(),
         query: str = None,
     ):
+        # The rows of the query are joined with the rows of the child on the base columns
+        if child_table is not None and not base_columns:
+            raise ValueError("A DatasetTable with a child table requires base columns to join on.")
+
         super().__init__(
             logical_table=logical_table,
             child_table=child_table,
@@ -43,28 +49,56 @@ class DatasetTable(PhysicalTable):
 
     @override
     def materialize(self, partitions=1) -> Table:
-        tables = self._execution_engine.get_tables()
+        return self.materialize_stream(partitions).read_all()
+
+    @override
+    def is_streaming(self) -> bool:
+        # With a child, the rows are joined with the child rows before they are returned
+        return self._child_table is None
+
+    @override
+    def materialize_stream(self, partitions=1) -> pa.RecordBatchReader:
+        """
+        Runs the query with the streaming execution of the engine. The batches are produced while the
+        scan continues, so parent operators can prompt on the first rows before the query completes.
+        """
+        df = self._execution_engine.sql(self._get_sql_query())
+
+        def batches() -> Iterator[pa.RecordBatch]:
+            for batch in df.execute_stream():
+                yield batch.to_pyarrow()
+
+        reader: pa.RecordBatchReader = pa.RecordBatchReader.from_batches(df.schema(), batches())
 
+        if self._child_table is None:
+            return reader
+
+        table: Table = self._join_child(reader.read_all(), self._child_table.materialize(partitions))
+        return pa.RecordBatchReader.from_batches(table.schema, table.to_batches())
+
+    def _get_sql_query(self) -> str:
         if self._query:
-            sql_query = self._query
-        else:
-            sql_query = (
-                self._llm.call(
-                    f"""
+            return self._query
+
+        tables = self._execution_engine.get_tables()
+        target_columns: List[str] = self._logical_table.get_schema().get_attribute_names()
+
+        prompt: str = f"""
             You have access to the following table schemas:
-            f{tables}
+            {tables}
             
             Generate a SQL query to extract the data from the tables. Your target schema is the following:
-            {self._logical_table.get_schema().get_attribute_names()}
+            {target_columns}
             
             Use aliases if needed. Return only the SQL query as a python-compatibel text format.
             """
-                )
-                .replace("sql", "")
-                .replace("```", "")
-            )
 
-        return self._execution_engine.sql(sql_query).to_arrow_table()
+        # The query is planned before it runs, and cached once it is valid
+        generator = SQLGenerator(
+            self._llm, self._execution_engine, cache=self._execution_engine.get_sql_cache()
+        )
+
+        return generator.generate(prompt, target_columns)
 
     @overrides
     def get_columns_prompt(logical_table: LogicalTable, tables: Dict[str, str]) -> str:
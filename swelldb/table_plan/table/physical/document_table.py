@@ -3,25 +3,31 @@
 # This file is part of SwellDB and is licensed under the MIT License.
 # See the LICENSE file in the project root for more information.
 
+import hashlib
+import json
 import os
-from typing import List, Dict
+from typing import Iterable, Iterator, List, Dict, Optional, Set, Tuple
 import logging
 
 from jinja2 import Template
 from overrides import override, overrides
 import pyarrow as pa
 
-from swelldb.llm.abstract_llm import AbstractLLM
+from swelldb.llm.abstract_llm import AbstractLLM, DEFAULT_CONTEXT_WINDOW
 from swelldb.table_plan.meta import SwellDBMeta
 from swelldb.table_plan.table.logical.logical_table import LogicalTable
 from swelldb.table_plan.table.physical.physical_table import PhysicalTable
 from swelldb.engine.execution_engine import ExecutionEngine
-from swelldb.common.document_loader import DocumentLoader
-from swelldb.common.text import Splitter
+from swelldb.common.document_loader import DocumentLoader, ExtractedTable
+from swelldb.common.retrieval import BM25Index
+from swelldb.common.table_matching import match_table
+from swelldb.common.text import Splitter, count_tokens
 from swelldb.prompt.prompt_utils import create_table_prompt
 
 
 class DocumentTable(PhysicalTable):
+    _merge_duplicate_rows = True
+
     def __init__(
         self,
         execution_engine: ExecutionEngine,
@@ -39,52 +45,255 @@ class DocumentTable(PhysicalTable):
             base_columns=meta.get_base_columns(),
             execution_engine=execution_engine,
             chunk_size=meta.get_chunk_size(),
+            max_concurrency=meta.get_max_concurrency(),
         )
 
         self._execution_engine = execution_engine
         self._meta = meta
-        self._document_loader = DocumentLoader()
-        self._splitter = Splitter()
+        self._document_cache = meta.get_document_cache()
+        self._document_loader = DocumentLoader(cache=self._document_cache)
+        self._splitter = self._create_splitter()
+        self._extracted_table: pa.Table = None
 
     def get_prompts(self, input_table: pa.Table) -> List[str]:
         """Generate prompts from document content and input data."""
         logging.info("Processing documents for DocumentTable")
+
+        self._extracted_table = None
         
-        # Get document paths from meta or links
-        document_paths = self._meta.get_links() if self._meta.get_links() else []
+        # Get document paths from meta, falling back to links
+        document_paths = self._meta.get_documents() or self._meta.get_links() or []
         
         if not document_paths:
-            logging.warning("No document paths provided in meta.links")
+            logging.warning("No document paths provided in meta.documents")
             return []
         
-        all_document_text = ""
-        for doc_path in document_paths:
-            try:
-                doc_text = self._document_loader.load_document(doc_path)
-                all_document_text += f"\n\n--- Document: {doc_path} ---\n{doc_text}"
-            except Exception as e:
-                logging.error(f"Failed to load document {doc_path}: {e}")
-                continue
-        
-        if not all_document_text:
-            logging.warning("No document content extracted")
-            return []
-        
-        # Split document into chunks if it's too large
-        text_chunks = self._splitter.split(all_document_text)
-        
-        prompts = []
-        for chunk in text_chunks:
-            prompt = create_table_prompt(
-                table_description=self._logical_table.get_prompt(),
-                table_schema=self._logical_table.get_schema().get_attribute_names(),
-                data=f"Document content:\n{chunk}",
-                layout=self._layout,
+        extracted: Dict[str, List[pa.Table]] = dict()
+
+        chunks = self._iter_chunks(document_paths, extracted)
+
+        if input_table is not None:
+            prompts = self._create_row_prompts(input_table, list(chunks))
+        else:
+            prompts = [
+                self._create_prompt(doc_path, page_no, chunk)
+                for doc_path, page_no, chunk in chunks
+            ]
+
+        tables: List[pa.Table] = [
+            table for doc_tables in extracted.values() for table in doc_tables if table.num_rows
+        ]
+
+        if tables:
+            self._extracted_table = pa.concat_tables(tables)
+            logging.info(
+                f"Loaded {self._extracted_table.num_rows} rows from document tables without the LLM"
             )
-            prompts.append(prompt)
-        
+
+        if not prompts and not tables:
+            logging.warning("No document content extracted")
+
+        return prompts
+
+    def get_extracted_table(self) -> pa.Table:
+        return self._extracted_table
+
+    def _create_prompt(self, doc_path: str, page_no: int, chunk: str, rows: List[dict] = None) -> str:
+        data = f"Document: {doc_path} (page {page_no})\nDocument content:\n{chunk}"
+
+        if rows is not None:
+            data = f"Original data: {rows}\n{data}"
+
+        return create_table_prompt(
+            table_description=self._logical_table.get_prompt(),
+            table_schema=self._logical_table.get_schema().get_attribute_names(),
+            data=data,
+            layout=self._layout,
+        )
+
+    def _create_row_prompts(
+        self, input_table: pa.Table, chunks: List[Tuple[str, int, str]]
+    ) -> List[str]:
+        """
+        Creates prompts only for the chunks that mention the input rows. The chunks are indexed once;
+        for each partition of the input rows, every chunk that mentions the key values of a row (up to
+        context_top_k chunks per row, best first) gets one prompt with the rows it mentions.
+        """
+        if self._base_columns:
+            input_table = input_table.select(self._base_columns)
+
+        index = BM25Index([chunk for _, _, chunk in chunks])
+        top_k = self._meta.get_context_top_k()
+
+        prompts: List[str] = []
+        unmatched_rows: int = 0
+
+        for partition in self.partition_table(input_table):
+            # chunk id -> rows of the partition that the chunk mentions
+            chunk_rows: Dict[int, List[dict]] = dict()
+
+            for row in partition.to_pylist():
+                query = " ".join(str(v) for v in row.values() if v is not None)
+                hits = index.search(query, top_k=top_k, require_all_terms=True)
+
+                if not hits:
+                    unmatched_rows += 1
+
+                for chunk_id, _ in hits:
+                    chunk_rows.setdefault(chunk_id, []).append(row)
+
+            for chunk_id in sorted(chunk_rows):
+                doc_path, page_no, chunk = chunks[chunk_id]
+                prompts.append(self._create_prompt(doc_path, page_no, chunk, chunk_rows[chunk_id]))
+
+        logging.info(
+            f"Created {len(prompts)} prompts from {len(chunks)} chunks for {input_table.num_rows} rows; "
+            f"{unmatched_rows} rows are not mentioned in any chunk"
+        )
+
         return prompts
 
+    def _iter_chunks(
+        self, document_paths: List[str], extracted: Dict[str, List[pa.Table]]
+    ) -> Iterator[Tuple[str, int, str]]:
+        """
+        Yield (document, page number, chunk) records for the text that still needs the LLM, and collect
+        the rows of the document tables that match the schema in extracted, per document. The chunks and
+        rows of unchanged documents are reused from the document cache.
+        """
+        if self._document_cache is None:
+            # Pages are extracted in parallel and split as they arrive, so the documents are never
+            # held in memory as a whole
+            pages = self._document_loader.iter_page_tables(document_paths)
+            yield from self._splitter.split_pages(self._match_page_tables(pages, extracted))
+            return
+
+        chunk_size = self._splitter.chunk_size
+        chunk_overlap = self._splitter.chunk_overlap
+        variant = f"{self._schema_fingerprint()}-{self._splitter.get_signature()}"
+
+        cached: Dict[str, List[Tuple[int, str]]] = dict()
+        for doc_path in document_paths:
+            if not os.path.exists(doc_path):
+                continue
+
+            chunks = self._document_cache.get_chunks(doc_path, chunk_size, chunk_overlap, variant)
+            rows = self._document_cache.get_table(doc_path, f"rows-{variant}")
+
+            if chunks is not None and rows is not None:
+                cached[doc_path] = chunks
+                extracted[doc_path] = [rows]
+
+        # The documents whose extraction failed are not cached, so that the next run retries them
+        missing = [doc_path for doc_path in document_paths if doc_path not in cached]
+        failed: Set[str] = set()
+        pages = self._match_page_tables(
+            self._document_loader.iter_page_tables(missing, failed=failed), extracted
+        )
+
+        # The chunks of the missing documents arrive in document order, and each document is stored
+        # in the cache as soon as its last chunk is split
+        stream = self._splitter.split_pages(pages)
+        pending: Optional[Tuple[str, int, str]] = next(stream, None)
+        extracted_paths: set = set()
+
+        for doc_path in document_paths:
+            if doc_path in cached:
+                for page_no, chunk in cached[doc_path]:
+                    yield doc_path, page_no, chunk
+                continue
+
+            if doc_path in extracted_paths or not os.path.exists(doc_path):
+                continue
+
+            extracted_paths.add(doc_path)
+            chunks: List[Tuple[int, str]] = []
+            while pending is not None and pending[0] == doc_path:
+                chunks.append((pending[1], pending[2]))
+                yield pending
+                pending = next(stream, None)
+
+            if doc_path in failed:
+                logging.warning(f"Not caching document {doc_path}, as its extraction failed")
+                continue
+
+            self._cache_document(doc_path, chunks, extracted.get(doc_path), variant)
+
+        logging.info(
+            f"Loaded {len(cached)} documents from the document cache, extracted {len(extracted_paths)}"
+        )
+
+    def _cache_document(
+        self,
+        doc_path: str,
+        chunks: List[Tuple[int, str]],
+        rows: Optional[List[pa.Table]],
+        variant: str,
+    ) -> None:
+        schema = self._logical_table.get_schema().to_arrow_schema()
+
+        self._document_cache.put_chunks(
+            doc_path, self._splitter.chunk_size, self._splitter.chunk_overlap, chunks, variant
+        )
+        self._document_cache.put_table(
+            doc_path,
+            f"rows-{variant}",
+            pa.concat_tables(rows) if rows else schema.empty_table(),
+        )
+
+    def _match_page_tables(
+        self,
+        pages: Iterable[Tuple[str, int, str, List[ExtractedTable]]],
+        extracted: Dict[str, List[pa.Table]],
+    ) -> Iterator[Tuple[str, int, str]]:
+        """
+        Loads the page tables that provide every attribute of the schema straight into Arrow. The other
+        tables are kept as text, one line per row, so that the LLM still sees them.
+        """
+        schema = self._logical_table.get_schema()
+
+        for doc_path, page_no, text, tables in pages:
+            unmatched: List[str] = []
+
+            for table in tables:
+                rows = match_table(table, schema, self._base_columns, min_coverage=1.0)
+
+                if rows is not None and rows.num_rows:
+                    extracted.setdefault(doc_path, []).append(rows)
+                else:
+                    unmatched.append("\n".join(" | ".join(row) for row in table))
+
+            yield doc_path, page_no, "\n".join([text] + unmatched)
+
+    def _create_splitter(self) -> Splitter:
+        """
+        A token-based splitter whose chunks fill the configured fraction of the model context, after
+        the prompt template and the expected output.
+        """
+        prompt = create_table_prompt(
+            table_description=self._logical_table.get_prompt(),
+            table_schema=self._logical_table.get_schema().get_attribute_names(),
+            data="",
+            layout=self._layout,
+        )
+
+        return Splitter.for_model(
+            model_name=self._llm.get_model_name() if self._llm else None,
+            context_window=self._llm.get_context_window() if self._llm else DEFAULT_CONTEXT_WINDOW,
+            context_fraction=self._meta.get_context_fraction(),
+            # The document path and page number that precede each chunk
+            prompt_tokens=count_tokens(prompt) + 100,
+        )
+
+    def _schema_fingerprint(self) -> str:
+        """A short hash of the target schema, which decides how document tables are matched."""
+        schema = [
+            (attribute.get_name(), str(attribute.get_data_type()))
+            for attribute in self._logical_table.get_schema().get_attributes()
+        ]
+        key = json.dumps([schema, self._base_columns])
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
     @staticmethod 
     def get_columns_prompt(logical_table: LogicalTable, tables: Dict[str, str]) -> str:
         """Generate prompt for column planning (used by planner)."""
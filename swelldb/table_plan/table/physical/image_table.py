@@ -3,22 +3,42 @@
 # This file is part of SwellDB and is licensed under the MIT License.
 # See the LICENSE file in the project root for more information.
 
+import hashlib
 import os
-import base64
-import glob
-from typing import List, Dict
+import json
+from typing import Any, List, Dict, Optional, Tuple
 import logging
 
 from overrides import override
 import pyarrow as pa
 
+from swelldb.common.image_manifest import ImageFile, ImageManifest, scan_images
+from swelldb.common.image_processing import estimate_image_tokens
+from swelldb.common.text import count_tokens
 from swelldb.llm.abstract_llm import AbstractLLM
+from swelldb.table_plan.layout import Layout
 from swelldb.table_plan.meta import SwellDBMeta
 from swelldb.table_plan.table.logical.logical_table import LogicalTable
 from swelldb.table_plan.table.physical.physical_table import PhysicalTable
 from swelldb.engine.execution_engine import ExecutionEngine
+from swelldb.prompt.multimodal_prompt import ImageRef, MultimodalPrompt
 from swelldb.prompt.prompt_utils import create_table_prompt
 
+# The output tokens reserved for the response of a batch, and the output tokens of each of its rows
+_RESPONSE_TOKENS: int = 4096
+_ROW_TOKENS: int = 100
+
+# The size of the images that are sent without a maximum edge
+_DEFAULT_IMAGE_EDGE: int = 2048
+
+_BATCH_INSTRUCTIONS: str = """
+The images above are labelled with their file names. Generate exactly one row per image, for each of
+the following images: {names}
+
+Return a JSON object with a key named 'rows', which maps each image file name to the list of values of
+its row, e.g. {{"rows": {{"{example}": [...]}}}}. Do not include ```json.
+"""
+
 
 class ImageTable(PhysicalTable):
     def __init__(
@@ -38,12 +58,25 @@ class ImageTable(PhysicalTable):
             base_columns=meta.get_base_columns(),
             execution_engine=execution_engine,
             chunk_size=meta.get_chunk_size(),
+            max_concurrency=meta.get_max_concurrency(),
         )
 
         self._execution_engine = execution_engine
         self._meta = meta
 
-    def get_prompts(self, input_table: pa.Table) -> List[str]:
+        # The image names of each batch prompt, and the path and reference of each image, by name.
+        # Batches are only created when the batch size is greater than one.
+        self._batches: Optional[List[List[str]]] = None
+        self._images: Dict[str, Tuple[str, ImageRef]] = dict()
+
+        # The image of each single image prompt, the near-duplicates of each prompted image, and the
+        # rows of the images that were processed before
+        self._prompt_files: List[str] = []
+        self._files: Dict[str, ImageFile] = dict()
+        self._duplicates: Dict[str, List[str]] = dict()
+        self._extracted: Optional[pa.Table] = None
+
+    def get_prompts(self, input_table: pa.Table) -> List[MultimodalPrompt]:
         """Generate prompts from images in the input folder."""
         logging.info("Processing images for ImageTable")
         
@@ -54,73 +87,315 @@ class ImageTable(PhysicalTable):
             logging.warning("No image paths provided in meta.images")
             return []
         
-        prompts = []
-        for image_path in image_paths:
-            try:
-                # Check if the path is a directory and expand it
-                if os.path.isdir(image_path):
-                    # Get all image files from the directory
-                    image_extensions = ['*.jpg', '*.jpeg', '*.png', '*.gif', '*.bmp', '*.tiff', '*.webp']
-                    image_files = []
-                    for ext in image_extensions:
-                        image_files.extend(glob.glob(os.path.join(image_path, ext)))
-                        image_files.extend(glob.glob(os.path.join(image_path, ext.upper())))
-                    
-                    # Process each image file
-                    for img_file in image_files:
-                        prompt = self._create_image_prompt(img_file)
-                        if prompt:
-                            prompts.append(prompt)
-                else:
-                    # Single image file
-                    prompt = self._create_image_prompt(image_path)
-                    if prompt:
-                        prompts.append(prompt)
-                        
-            except Exception as e:
-                logging.error(f"Failed to process image path {image_path}: {e}")
-                continue
-        
+        scanned: List[ImageFile] = scan_images(image_paths)
+        self._files = {image.path: image for image in scanned}
+        self._duplicates = dict()
+        self._extracted = None
+
+        manifest: ImageManifest = self._meta.get_image_manifest()
+        if manifest:
+            image_files: List[str] = self._select_new_images(manifest, scanned)
+        else:
+            image_files = [image.path for image in scanned]
+
+        # Images are resized and re-encoded in parallel before any prompt is created
+        preprocessor = self._meta.get_image_preprocessor()
+        if preprocessor:
+            image_refs = preprocessor.process(image_files)
+        else:
+            image_refs = [ImageRef(path=image_file) for image_file in image_files]
+
+        images: List[Tuple[str, ImageRef]] = [
+            (image_file, image_ref)
+            for image_file, image_ref in zip(image_files, image_refs)
+            if image_ref is not None
+        ]
+
+        batch_size: int = self._get_batch_size()
+        self._batches = None
+        self._prompt_files = []
+
+        if batch_size > 1 and len(images) > 1:
+            prompts = self._create_batch_prompts(images, batch_size)
+        else:
+            prompts = []
+            for image_file, image_ref in images:
+                prompt = self._create_image_prompt(image_file, image_ref)
+                if prompt:
+                    prompts.append(prompt)
+                    self._prompt_files.append(image_file)
+
         if not prompts:
             logging.warning("No image prompts generated")
-        
+
         return prompts
 
-    def _create_image_prompt(self, image_path: str) -> str:
-        """Create a prompt for a single image."""
+    @override
+    def get_extracted_table(self) -> pa.Table:
+        return self._extracted
+
+    def _select_new_images(self, manifest: ImageManifest, images: List[ImageFile]) -> List[str]:
+        """
+        Returns the images to send to the LLM: one image per group of near-duplicates that has no rows
+        from a previous run. The other images reuse the rows of their group, which become the
+        extracted table.
+        """
+        table_key: str = self._get_table_key()
+        hashes: Dict[str, Optional[int]] = manifest.get_hashes(images)
+        previous: Dict[str, List[List[Any]]] = manifest.get_rows(table_key, images)
+
+        selected: List[str] = []
+        reused: Dict[ImageFile, List[List[Any]]] = dict()
+        extracted_rows: List[List[Any]] = []
+
+        for group in manifest.group_near_duplicates(hashes):
+            processed: List[str] = [path for path in group if path in previous]
+
+            if not processed:
+                selected.append(group[0])
+                self._duplicates[group[0]] = group[1:]
+                continue
+
+            for path in group:
+                if path in previous:
+                    rows: List[List[Any]] = previous[path]
+                else:
+                    rows = self._copy_rows(previous[processed[0]], processed[0], path)
+                    reused[self._files[path]] = rows
+
+                extracted_rows.extend(rows)
+
+        if reused:
+            manifest.put_rows(table_key, reused)
+
+        if extracted_rows:
+            self._extracted = self._rows_to_table(extracted_rows)
+
+        duplicates: int = sum(len(paths) for paths in self._duplicates.values())
+        logging.info(
+            f"Sending {len(selected)} of {len(images)} images to the LLM: {len(previous)} were "
+            f"processed before, {len(reused)} are near-duplicates of processed images and {duplicates} "
+            f"are near-duplicates of the selected ones"
+        )
+
+        return selected
+
+    def _get_table_key(self) -> str:
+        """Identifies the table whose rows the manifest stores: its prompt, schema and layout."""
+        schema = self._logical_table.get_schema()
+        key: str = json.dumps(
+            [
+                self._logical_table.get_prompt(),
+                [(attr.get_name(), str(attr.get_data_type())) for attr in schema.get_attributes()],
+                self._layout.get_name(),
+            ]
+        )
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _create_image_prompt(self, image_path: str, image_ref: ImageRef) -> MultimodalPrompt:
+        """Create a prompt for a single image. The image is attached by reference and read when sent."""
         try:
-            # Check if file exists and is readable
-            if not os.path.isfile(image_path):
-                logging.warning(f"Image file not found: {image_path}")
-                return None
-            
-            # Read and encode the image
-            with open(image_path, "rb") as f:
-                image_data = f.read()
-                image_base64 = base64.b64encode(image_data).decode("utf-8")
-            
-            # Determine image format from file extension
-            image_format = os.path.splitext(image_path)[1].lower().lstrip('.')
-            if image_format == 'jpg':
-                image_format = 'jpeg'
-            
-            # Create the image data URL
-            image_url = f"data:image/{image_format};base64,{image_base64}"
-            
             # Create prompt using the existing prompt utility
-            prompt = create_table_prompt(
+            text = create_table_prompt(
                 table_description=self._logical_table.get_prompt(),
                 table_schema=self._logical_table.get_schema().get_attribute_names(),
-                data=f"Image file: {os.path.basename(image_path)}\nImage path: {image_path}\nImage data: {image_url}",
+                data=f"Image file: {os.path.basename(image_path)}\nImage path: {image_path}",
                 layout=self._layout,
             )
-            
-            return prompt
-            
+
+            return MultimodalPrompt(text, [image_ref])
+
         except Exception as e:
             logging.error(f"Failed to create prompt for image {image_path}: {e}")
             return None
 
+    def _get_batch_size(self) -> int:
+        """
+        The number of images per prompt: the requested batch size, bounded by the number of images the
+        model accepts in a call and by the image tokens that fit into its context window.
+        """
+        batch_size: int = self._meta.get_image_batch_size() or 1
+
+        if batch_size <= 1:
+            return 1
+
+        preprocessor = self._meta.get_image_preprocessor()
+        edge: int = (preprocessor.get_max_edge() if preprocessor else None) or _DEFAULT_IMAGE_EDGE
+
+        # Without the actual sizes, every image is assumed to be a square of the maximum edge
+        image_tokens: int = estimate_image_tokens(edge, edge)
+        prompt_tokens: int = count_tokens(self._logical_table.get_prompt() or "")
+        available: int = self._llm.get_context_window() - prompt_tokens - _RESPONSE_TOKENS
+
+        return max(
+            1,
+            min(
+                batch_size,
+                self._llm.get_max_images_per_call(),
+                available // (image_tokens + _ROW_TOKENS),
+            ),
+        )
+
+    def _create_batch_prompts(
+        self, images: List[Tuple[str, ImageRef]], batch_size: int
+    ) -> List[MultimodalPrompt]:
+        """
+        Creates one prompt per batch of images. The images are labelled with their names, which the
+        response uses as row keys; images with the same file name are named by their full path.
+        """
+        basenames: List[str] = [os.path.basename(image_file) for image_file, _ in images]
+
+        self._images = dict()
+        for image_file, image_ref in images:
+            name: str = os.path.basename(image_file)
+            if basenames.count(name) > 1:
+                name = image_file
+            self._images[name] = (image_file, ImageRef(
+                path=image_ref.get_path(),
+                data=None if image_ref.get_path() else image_ref.get_bytes(),
+                mime_type=image_ref.get_mime_type(),
+                name=name,
+            ))
+
+        names: List[str] = list(self._images)
+        self._batches = [names[i : i + batch_size] for i in range(0, len(names), batch_size)]
+
+        logging.info(f"Batching {len(names)} images into {len(self._batches)} prompts")
+
+        prompts: List[MultimodalPrompt] = []
+        for batch in self._batches:
+            # The response maps each image to its row, so batches use the row layout, whatever the
+            # layout of the table; images retried alone use the table's layout
+            text = create_table_prompt(
+                table_description=self._logical_table.get_prompt(),
+                table_schema=self._logical_table.get_schema().get_attribute_names(),
+                data="\n".join(f"Image file: {name}" for name in batch),
+                layout=Layout.ROW(),
+            )
+            text += _BATCH_INSTRUCTIONS.format(names=", ".join(batch), example=batch[0])
+
+            prompts.append(
+                MultimodalPrompt(
+                    text, [self._images[name][1] for name in batch], label_images=True
+                )
+            )
+
+        return prompts
+
+    @override
+    def _process_response(
+        self, idx: int, n_prompts: Optional[int], resp: str, child_result: pa.Table
+    ) -> pa.Table:
+        logging.info("Processed prompt {}/{}".format(idx + 1, n_prompts))
+        logging.debug(f"Response: {resp}")
+
+        if self._batches is None:
+            image_rows: Dict[str, List[List[Any]]] = {self._prompt_files[idx]: self._parse_rows(resp)}
+        else:
+            image_rows = self._parse_batch(self._batches[idx], resp)
+
+        # Near-duplicates of the prompted images get copies of their rows
+        for image_file, values in list(image_rows.items()):
+            for duplicate in self._duplicates.get(image_file, []):
+                image_rows[duplicate] = self._copy_rows(values, image_file, duplicate)
+
+        rows: List[List[Any]] = []
+        for values in image_rows.values():
+            rows.extend(values)
+
+        manifest: ImageManifest = self._meta.get_image_manifest()
+        if manifest and image_rows:
+            manifest.put_rows(
+                self._get_table_key(),
+                {self._files[image_file]: values for image_file, values in image_rows.items()},
+            )
+
+        return self._join_child(self._rows_to_table(rows), child_result)
+
+    @staticmethod
+    def _copy_rows(rows: List[List[Any]], source: str, target: str) -> List[List[Any]]:
+        """
+        Copies the rows of an image for a near-duplicate of it. Values that name the source image, by
+        path or file name, name the near-duplicate instead, so that each row identifies its own file.
+        """
+        names: Dict[str, str] = {
+            source: target,
+            os.path.basename(source): os.path.basename(target),
+        }
+        return [[names.get(v, v) if isinstance(v, str) else v for v in row] for row in rows]
+
+    def _parse_batch(self, batch: List[str], resp: str) -> Dict[str, List[List[Any]]]:
+        """
+        Maps the images of a batch to their rows. Rows for images outside the batch are dropped, and
+        images that the response missed are prompted once more on their own.
+        """
+        rows: Dict[str, List] = self._parse_batch_response(resp)
+
+        extra: List[str] = [name for name in rows if name not in batch]
+        if extra:
+            logging.warning(f"Ignoring rows for images that are not in the batch: {extra}")
+
+        n_attributes: int = len(self._logical_table.get_schema().get_attributes())
+        image_rows: Dict[str, List[List[Any]]] = dict()
+
+        for name in batch:
+            row: Optional[List] = rows.get(name)
+
+            if not isinstance(row, list) or len(row) != n_attributes:
+                logging.warning(f"No valid row for image {name} in the batch response, retrying it alone")
+                row = self._retry_image(name)
+
+            if row is not None:
+                image_rows[self._images[name][0]] = [row]
+
+        return image_rows
+
+    def _parse_rows(self, resp: str) -> List[List[Any]]:
+        data: Dict = json.loads(resp)
+
+        if self._layout == Layout.COLUMN():
+            names: List[str] = self._logical_table.get_schema().get_attribute_names()
+            return [list(row) for row in zip(*[data["columns"][name] for name in names])]
+
+        return data["rows"]
+
+    def _rows_to_table(self, rows: List[List[Any]]) -> pa.Table:
+        attributes = self._logical_table.get_schema().get_attributes()
+        column_data: Dict[str, List] = {
+            attr.get_name(): [row[idx] for row in rows] for idx, attr in enumerate(attributes)
+        }
+
+        return pa.table(column_data, schema=self._logical_table.get_schema().to_arrow_schema())
+
+    @staticmethod
+    def _parse_batch_response(resp: str) -> Dict[str, List]:
+        try:
+            rows = json.loads(resp)["rows"]
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            logging.error(f"Failed to parse the batch response: {e}")
+            return dict()
+
+        if not isinstance(rows, dict):
+            logging.error("The batch response does not map image file names to rows")
+            return dict()
+
+        return rows
+
+    def _retry_image(self, name: str) -> Optional[List]:
+        image_file, image_ref = self._images[name]
+        prompt: MultimodalPrompt = self._create_image_prompt(image_file, image_ref)
+
+        if prompt is None:
+            return None
+
+        try:
+            row: List = self._parse_rows(self._llm.call(prompt))[0]
+        except Exception as e:
+            logging.error(f"Failed to extract a row for image {image_file}: {e}")
+            return None
+
+        return row if len(row) == len(self._logical_table.get_schema().get_attributes()) else None
+
     @override
     def __str__(self):
         return f'ImageTable[schema={self._logical_table.get_schema().get_attribute_names()}]'
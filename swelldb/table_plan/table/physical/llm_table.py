@@ -22,6 +22,8 @@ import logging
 
 
 class LLMTable(PhysicalTable):
+    _prompts_per_chunk = True
+
     def __init__(
         self,
         execution_engine: ExecutionEngine,
@@ -39,6 +41,7 @@ class LLMTable(PhysicalTable):
             llm=llm,
             base_columns=meta.get_base_columns(),
             chunk_size=meta.get_chunk_size(),
+            max_concurrency=meta.get_max_concurrency(),
         )
 
         # Set up Jinja environment
@@ -52,27 +55,33 @@ class LLMTable(PhysicalTable):
         self._meta = meta
 
     def get_prompts(self, input_table: pa.Table) -> List[str]:
+        """
+        One prompt per chunk of chunk_size input rows, whether the input is materialized or streamed,
+        or a single prompt without input rows.
+        """
         logging.info("Generating LLM Table")
 
-        data: List = list()
+        if input_table is None:
+            return [self._create_prompt(list())]
+
+        if self._base_columns:
+            input_table = input_table.select(self._base_columns)
 
-        if input_table:
-            if self._base_columns:
-                data = input_table.select(self._base_columns).to_pylist()
-            else:
-                data = input_table.to_pylist()
+        return [
+            self._create_prompt(partition.to_pylist())
+            for partition in self.partition_table(input_table)
+        ]
 
+    def _create_prompt(self, data: List) -> str:
         schema: SwellDBSchema = self._logical_table.get_schema()
 
-        prompt: str = create_table_prompt(
+        return create_table_prompt(
             table_description=self._logical_table.get_prompt(),
             table_schema=schema.get_attribute_names(),
             data=data,
             layout=self._layout,
         )
 
-        return [prompt]
-
     @staticmethod
     def get_columns_prompt(logical_table: LogicalTable, tables: Dict[str, str]) -> str:
         # Get the directory of the current file
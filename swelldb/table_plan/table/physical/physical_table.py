@@ -4,17 +4,21 @@
 # See the LICENSE file in the project root for more information.
 
 import asyncio
+import functools
 import json
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 
 import math
-from typing import List, Dict
+from typing import Deque, Iterator, List, Dict, Optional, Tuple, Union
 
 import pyarrow as pa
+import pyarrow.compute as pc
 from pyarrow import Table
 
 from swelldb.engine.execution_engine import ExecutionEngine
 from swelldb.llm.abstract_llm import AbstractLLM
+from swelldb.prompt.multimodal_prompt import MultimodalPrompt
 from swelldb.table_plan.layout import Layout
 from swelldb.table_plan.table.logical.logical_table import LogicalTable
 
@@ -22,6 +26,15 @@ import logging
 
 
 class PhysicalTable:
+    # Whether get_prompts only depends on the rows it is given, so that the rows of a streaming child
+    # can be prompted chunk by chunk, while the child is still producing them
+    _prompts_per_chunk: bool = False
+
+    # Whether rows sharing the base column values describe the same entity, e.g. an entity extracted
+    # from two overlapping chunks, and are merged into one. Other operators may return several rows
+    # per entity
+    _merge_duplicate_rows: bool = False
+
     def __init__(
         self,
         execution_engine: ExecutionEngine,
@@ -32,9 +45,11 @@ class PhysicalTable:
         layout: Layout = Layout.ROW(),
         base_columns: List[str] = None,
         chunk_size: int = 10,
+        max_concurrency: int = 4,
     ):
         self._logical_table = logical_table
         self._chunk_size = chunk_size
+        self._max_concurrency: int = max(1, max_concurrency)
         self._child_table = child_table
         self._layout: Layout = layout
         self._base_columns: str = base_columns
@@ -42,9 +57,38 @@ class PhysicalTable:
         self._llm = llm
         self._execution_engine = execution_engine
 
-    def get_prompts(self, input_table: pa.Table) -> List[str]:
+    def get_prompts(self, input_table: pa.Table) -> List[Union[str, MultimodalPrompt]]:
+        """
+        The prompts for the LLM. Prompts with images are MultimodalPrompt objects, which reach the
+        chat model as message parts without being serialized into the prompt text.
+        """
         raise NotImplementedError()
 
+    def get_extracted_table(self) -> pa.Table:
+        """
+        Rows that the last get_prompts call filled directly from the source, without an LLM call.
+        """
+        return None
+
+    def is_streaming(self) -> bool:
+        """
+        Whether materialize_stream produces the rows incrementally, instead of materializing the
+        whole table first.
+        """
+        return False
+
+    def materialize_stream(self, partitions: int = 1) -> pa.RecordBatchReader:
+        """
+        The rows of the table as a stream of record batches. Tables that do not stream materialize
+        the whole table first.
+        """
+        table: Optional[Table] = self.materialize(partitions)
+
+        if table is None:
+            return None
+
+        return pa.RecordBatchReader.from_batches(table.schema, table.to_batches())
+
     def get_operator_name(self) -> str:
         return self._operator_name
 
@@ -69,59 +113,224 @@ class PhysicalTable:
         return partitions
 
     def materialize(self, partitions: int = 1) -> pa.Table:
-        final_result: Table = None
+        if self._prompts_per_chunk and self._child_table and self._child_table.is_streaming():
+            return self._materialize_streaming(partitions)
+
+        results: List[Table] = []
 
         child_result: Table = (
             self._child_table.materialize(partitions) if self._child_table else None
         )
 
-        prompts: List[str] = self.get_prompts(child_result)
+        prompts: List[Union[str, MultimodalPrompt]] = self.get_prompts(child_result)
         n_prompts: int = len(prompts)
 
-        for idx, prompt in enumerate(prompts):
-            logging.info("Processing prompt {}/{}".format(idx + 1, n_prompts))
+        extracted_table: Table = self.get_extracted_table()
+
+        if extracted_table is not None:
+            results.append(self._join_child(extracted_table, child_result))
+
+        logging.info(
+            f"Processing {n_prompts} prompts with up to {self._max_concurrency} concurrent LLM calls"
+        )
+
+        # The prompts are independent, so they are issued concurrently; the responses keep the
+        # order of the prompts
+        if self._max_concurrency > 1 and n_prompts > 1:
+            with ThreadPoolExecutor(max_workers=self._max_concurrency) as pool:
+                responses = pool.map(self._llm.call, prompts)
+                for idx, resp in enumerate(responses):
+                    results.append(self._process_response(idx, n_prompts, resp, child_result))
+        else:
+            for idx, prompt in enumerate(prompts):
+                resp: str = self._llm.call(prompt)
+                results.append(self._process_response(idx, n_prompts, resp, child_result))
+
+        if not results:
+            return self._empty_result(child_result.schema) if child_result is not None else None
+
+        final_result: Table = pa.concat_tables(
+            [result.cast(results[0].schema) for result in results]
+        )
+
+        return self._merge_rows(final_result)
+
+    def _materialize_streaming(self, partitions: int) -> Optional[Table]:
+        """
+        Prompts on each chunk of the child rows as soon as the child stream produces it. At most twice
+        as many prompts as the concurrent LLM calls are in flight, which bounds the buffered child rows.
+        """
+        reader: pa.RecordBatchReader = self._child_table.materialize_stream(partitions)
+
+        if reader is None:
+            return None
+
+        results: List[Table] = []
+        pending: Deque[Tuple[Future, Table]] = deque()
+        n_prompts: int = 0
+        n_processed: int = 0
+
+        def process_next() -> None:
+            nonlocal n_processed
+            future, chunk = pending.popleft()
+            results.append(self._process_response(n_processed, None, future.result(), chunk))
+            n_processed += 1
+
+        # The reader is closed even if a prompt fails midway, as an unread stream may hold resources,
+        # e.g. a pooled database connection
+        with reader, ThreadPoolExecutor(max_workers=self._max_concurrency) as pool:
+            for chunk in self._iter_chunks(reader):
+                prompts: List[Union[str, MultimodalPrompt]] = self.get_prompts(chunk)
+                extracted_table: Table = self.get_extracted_table()
+
+                if extracted_table is not None:
+                    results.append(self._join_child(extracted_table, chunk))
+
+                for prompt in prompts:
+                    pending.append((pool.submit(self._llm.call, prompt), chunk))
+                    n_prompts += 1
+
+                    while len(pending) > 2 * self._max_concurrency:
+                        process_next()
+
+            while pending:
+                process_next()
+
+        logging.info(f"Processed {n_prompts} prompts over the streamed input")
 
-            resp: str = self._llm.call(prompt)
+        if not results:
+            return self._empty_result(reader.schema)
 
-            logging.info(f"Issuing LLM call with prompt: {prompt}")
-            logging.info(f"Response: {resp}")
+        final_result: Table = pa.concat_tables(
+            [result.cast(results[0].schema) for result in results]
+        )
 
-            # TODO: Create a method for that
-            if self._layout == Layout.COLUMN():
-                column_data: Dict = json.loads(resp)["columns"]
-            elif self._layout == Layout.ROW():
-                row_data: Dict = json.loads(resp)["rows"]
-                column_data = defaultdict(list)
-                for row in row_data:
-                    for idx, attr in enumerate(
-                        self._logical_table.get_schema().get_attributes()
-                    ):
-                        column_data[attr.get_name()].append(row[idx])
+        return self._merge_rows(final_result)
 
-            # TODO Add sanity checks for the data schema
+    def _empty_result(self, child_schema: pa.Schema) -> Table:
+        """
+        The result when no rows were generated for the child rows, e.g. when the child has no rows: an
+        empty table with the columns of the result joined with the child.
+        """
+        schema: pa.Schema = self._logical_table.get_schema().to_arrow_schema()
 
-            # Cast the output to the correct schema
-            output_tbl: pa.Table = pa.table(
-                column_data, schema=self._logical_table.get_schema().to_arrow_schema()
+        if self._base_columns:
+            schema = pa.schema(
+                list(schema) + [f for f in child_schema if f.name not in self._base_columns]
             )
 
-            result = output_tbl
+        return schema.empty_table()
+
+    def _iter_chunks(self, reader: pa.RecordBatchReader) -> Iterator[Table]:
+        """Regroups a stream of record batches into tables of chunk_size rows."""
+        buffered: List[pa.RecordBatch] = []
+        n_rows: int = 0
+
+        for batch in reader:
+            buffered.append(batch)
+            n_rows += batch.num_rows
+
+            while n_rows >= self._chunk_size:
+                table: Table = pa.Table.from_batches(buffered, schema=reader.schema)
+                yield table.slice(0, self._chunk_size)
+
+                buffered = table.slice(self._chunk_size).to_batches()
+                n_rows -= self._chunk_size
+
+        if n_rows:
+            yield pa.Table.from_batches(buffered, schema=reader.schema)
+
+    def _process_response(
+        self, idx: int, n_prompts: Optional[int], resp: str, child_result: Table
+    ) -> Table:
+        logging.info("Processed prompt {}/{}".format(idx + 1, n_prompts or "?"))
+        logging.debug(f"Response: {resp}")
 
-            if child_result:
-                result = result.join(
-                    right_table=child_result,
-                    keys=self._base_columns,
-                    join_type="inner",
-                )
+        # TODO: Create a method for that
+        if self._layout == Layout.COLUMN():
+            column_data: Dict = json.loads(resp)["columns"]
+        elif self._layout == Layout.ROW():
+            row_data: Dict = json.loads(resp)["rows"]
+            column_data = defaultdict(list)
+            for row in row_data:
+                for idx, attr in enumerate(
+                    self._logical_table.get_schema().get_attributes()
+                ):
+                    column_data[attr.get_name()].append(row[idx])
+
+        # TODO Add sanity checks for the data schema
+
+        # Cast the output to the correct schema
+        output_tbl: pa.Table = pa.table(
+            column_data, schema=self._logical_table.get_schema().to_arrow_schema()
+        )
+
+        return self._join_child(output_tbl, child_result)
+
+    def _join_child(self, table: Table, child_result: Table) -> Table:
+        if not child_result:
+            return table
+
+        return table.join(
+            right_table=child_result,
+            keys=self._base_columns,
+            join_type="inner",
+        )
 
-            if not final_result:
-                final_result = result
-            else:
-                final_result = pa.concat_tables(
-                    [final_result, result.cast(final_result.schema)]
-                )
+    def _merge_rows(self, table: Table) -> Table:
+        """
+        Merges the rows that share the same base column values, e.g. the same entity extracted from two
+        overlapping chunks, into a single row holding the first non-null value of each column. Rows
+        with a null base column are kept as they are.
+        """
+        if not self._merge_duplicate_rows or not self._base_columns or table.num_rows == 0:
+            return table
+
+        keyed_mask = functools.reduce(
+            pc.and_, [pc.is_valid(table.column(c)) for c in self._base_columns]
+        )
+
+        keyed: Table = table.filter(keyed_mask)
+        unkeyed: Table = table.filter(pc.invert(keyed_mask))
+
+        value_columns: List[str] = [
+            c for c in table.column_names if c not in self._base_columns
+        ]
+
+        # There is no "first" kernel for nested types: the first row index with a value is taken
+        # instead, and the values are looked up by it
+        nested_columns: List[str] = [
+            c for c in value_columns if pa.types.is_nested(table.schema.field(c).type)
+        ]
+        row_ids: pa.Array = pa.array(range(keyed.num_rows), type=pa.int64())
+        grouped: Table = keyed
+
+        for idx, c in enumerate(nested_columns):
+            grouped = grouped.append_column(
+                f"__row_{idx}", pc.if_else(pc.is_valid(keyed.column(c)), row_ids, None)
+            )
+
+        # Single-threaded grouping keeps the groups in the order of their first row
+        merged: Table = grouped.group_by(self._base_columns, use_threads=False).aggregate(
+            [(c, "first") for c in value_columns if c not in nested_columns]
+            + [(f"__row_{idx}", "min") for idx in range(len(nested_columns))]
+        )
+
+        def merged_column(c: str) -> pa.ChunkedArray:
+            if c in self._base_columns:
+                return merged.column(c)
+            if c in nested_columns:
+                return keyed.column(c).take(merged.column(f"__row_{nested_columns.index(c)}_min"))
+            return merged.column(f"{c}_first")
+
+        merged = pa.table([merged_column(c) for c in table.column_names], schema=table.schema)
+
+        if merged.num_rows < keyed.num_rows:
+            logging.info(
+                f"Merged {keyed.num_rows} rows into {merged.num_rows} by {self._base_columns}"
+            )
 
-        return final_result
+        return pa.concat_tables([merged, unkeyed]) if unkeyed.num_rows else merged
 
     def explain(self, space="") -> None:
         logging.info("{}{}".format(space, self.__str__()))
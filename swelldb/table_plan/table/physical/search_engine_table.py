@@ -3,17 +3,24 @@
 # This file is part of SwellDB and is licensed under the MIT License.
 # See the LICENSE file in the project root for more information.
 
-from typing import List
+from typing import Dict, List, Optional
 import os
 import pyarrow as pa
+import pyarrow.compute as pc
 from langchain_community.utilities import GoogleSerperAPIWrapper
 from overrides import override
 from jinja2 import Environment, FileSystemLoader
 
+from swelldb.common.retrieval import BM25Index
+from swelldb.common.table_matching import match_table
 from swelldb.common.text import Splitter
 from swelldb.llm.abstract_llm import AbstractLLM
 from swelldb.prompt.prompt_utils import create_table_prompt
-from swelldb.search.utils import crawl
+from swelldb.search.crawler import Crawler
+from swelldb.search.dedup import DedupStats, Deduplicator
+from swelldb.search.extraction import PageExtraction, extract_pages
+from swelldb.search.utils import search_all
+from swelldb.table_plan.swelldb_schema import SwellDBSchema
 from swelldb.table_plan.table.logical.logical_table import LogicalTable
 from swelldb.table_plan.table.physical.physical_table import PhysicalTable
 from swelldb.engine.execution_engine import ExecutionEngine
@@ -23,6 +30,9 @@ from swelldb.table_plan.meta import SwellDBMeta
 
 import logging
 
+# The maximum number of search result characters included in a single prompt
+MAX_CONTEXT_CHARS: int = 16000
+
 
 class SearchEngineTable(PhysicalTable):
     def __init__(
@@ -42,12 +52,18 @@ class SearchEngineTable(PhysicalTable):
             layout=meta.get_layout(),
             base_columns=meta.get_base_columns(),
             chunk_size=meta.get_chunk_size(),
+            max_concurrency=meta.get_max_concurrency(),
         )
 
         self._execution_engine = execution_engine
         self._meta = meta
         self._llm = llm
 
+        self._extracted_table: pa.Table = None
+        self._partial_rows: pa.Table = None
+        self._filled_keys: set = set()
+        self._splitter: Splitter = Splitter()
+
         # Set up Jinja environment
         current_dir = os.path.dirname(os.path.abspath(__file__))
         prompts_dir = os.path.join(
@@ -71,6 +87,11 @@ class SearchEngineTable(PhysicalTable):
     def get_prompts(self, input_table: pa.Table) -> List[str]:
         logging.info("Searching on the internet")
 
+        # Rows filled directly from the tables of the crawled pages
+        self._extracted_table = None
+        self._partial_rows = None
+        self._filled_keys = set()
+
         data: List = list()
 
         if input_table:
@@ -79,7 +100,19 @@ class SearchEngineTable(PhysicalTable):
             else:
                 data = input_table.to_pylist()
 
-        links: List[str] = self._meta.get_links()
+        links: List[str] = list(self._meta.get_links())
+
+        if not links and input_table and self._meta.get_search_query_template():
+            prompts: List[str] = self._get_entity_prompts(input_table)
+            logging.info(f"Generated {len(prompts)} table prompts")
+            return prompts
+
+        # The search snippets and crawled page chunks the prompts are built from
+        passages: List[str] = []
+
+        # Repeated links and near-duplicate texts reach the prompts only once
+        dedup: Deduplicator = Deduplicator()
+        links = [link for link in links if dedup.add_link(link)]
 
         if not links:
             template = self._env.get_template("search_engine_prompt.jinja")
@@ -91,62 +124,441 @@ class SearchEngineTable(PhysicalTable):
                 data=data,
             )
 
-            search_queries: list[str] = self._llm.call(search_query_prompt).split("\n")
+            search_queries: list[str] = [
+                query.strip()
+                for query in self._llm.call(search_query_prompt).split("\n")
+                if query.strip()
+            ]
 
             logging.info(f"Search queries: {search_queries}")
 
-            search: GoogleSerperAPIWrapper = GoogleSerperAPIWrapper(
-                serper_api_key=self._serper_api_key
+            for results in self._search(search_queries):
+                self._add_results(results, dedup, passages, links)
+
+        if self._meta.get_crawl_pages():
+            extractions: List[PageExtraction] = self._crawl(links)
+            self._match_page_tables(extractions, input_table)
+
+            for chunks in self._split(extractions):
+                passages.extend(dedup.filter_texts(chunks))
+
+        logging.info(f"Duplicate elimination: {dedup.get_stats()}")
+
+        if self._meta.get_search_cache():
+            logging.info(f"Search cache stats: {self._meta.get_search_cache().get_stats()}")
+
+        prompts = self._create_prompts(input_table, passages)
+
+        logging.info(f"Generated {len(prompts)} table prompts")
+
+        return prompts
+
+    def _get_entity_prompts(self, input_table: pa.Table) -> List[str]:
+        """
+        Entity-level search: a query is generated from the search query template for every input row,
+        without an LLM call, and each partition of rows gets its own prompts, built only from the
+        results of its own queries.
+        """
+        query_template: str = self._meta.get_search_query_template()
+
+        if self._base_columns:
+            input_table = input_table.select(self._base_columns)
+
+        partitions: List[pa.Table] = self.partition_table(input_table)
+
+        partition_queries: List[List[str]] = []
+        for partition in partitions:
+            try:
+                partition_queries.append(
+                    [query_template.format(**row) for row in partition.to_pylist()]
+                )
+            except KeyError as e:
+                raise ValueError(
+                    f"Search query template '{query_template}' references unknown column {e}"
+                )
+
+        # All the queries of all the partitions are issued concurrently
+        all_results: List[dict] = self._search(
+            [query for queries in partition_queries for query in queries]
+        )
+
+        partition_passages: List[List[str]] = []
+        partition_links: List[List[str]] = []
+
+        # Duplicates are eliminated within each partition: two entities may share a page
+        partition_dedups: List[Deduplicator] = []
+
+        offset: int = 0
+        for queries in partition_queries:
+            passages: List[str] = []
+            links: List[str] = []
+            dedup: Deduplicator = Deduplicator()
+
+            for results in all_results[offset : offset + len(queries)]:
+                self._add_results(results, dedup, passages, links)
+
+            partition_passages.append(passages)
+            partition_links.append(links)
+            partition_dedups.append(dedup)
+            offset += len(queries)
+
+        if self._meta.get_crawl_pages():
+            # Crawl the pages of all the partitions at once, then hand each partition its own chunks
+            extractions: List[PageExtraction] = self._crawl(
+                [link for links in partition_links for link in links]
             )
+            self._match_page_tables(extractions, input_table)
+            all_chunks: List[List[str]] = self._split(extractions)
+
+            offset = 0
+            for passages, links, dedup in zip(
+                partition_passages, partition_links, partition_dedups
+            ):
+                for chunks in all_chunks[offset : offset + len(links)]:
+                    passages.extend(dedup.filter_texts(chunks))
+                offset += len(links)
+
+        stats: DedupStats = DedupStats()
+        for dedup in partition_dedups:
+            stats.update(dedup.get_stats())
+
+        logging.info(f"Duplicate elimination: {stats}")
 
-            search_results: str = ""
-
-            for query in search_queries:
-                logging.info(f"Issuing query: {query}")
-                results: dict = search.results(query)
-                parsed_results: str = str(results["organic"])
-                search_results = search_results + "\n" + parsed_results
-
-                for result in results["organic"]:
-                    link = result["link"]
-                    links.append(link)
-
-        crawl_pages: bool = False
-
-        if crawl_pages:
-            clean_results = ""
-
-            for link in links:
-                logging.info(f"Crawling link: {link}")
-                content = crawl(link)
-                if content:
-                    clean_results += "\n" + content
-
-            splitter: Splitter = Splitter()
-            prompts = []
-            for chunk in splitter.split(clean_results):
-                prompt: str = create_table_prompt(
-                    table_description=self._logical_table.get_prompt(),
-                    table_schema=self._logical_table.get_schema().get_attribute_names(),
-                    data=f"Original data: {data}\nSearch results: {chunk}",
-                    layout=self._layout,
+        if self._meta.get_search_cache():
+            logging.info(f"Search cache stats: {self._meta.get_search_cache().get_stats()}")
+
+        prompts: List[str] = []
+        for partition, passages in zip(partitions, partition_passages):
+            prompts.extend(
+                self._create_prompts(
+                    partition,
+                    passages,
+                    top_k=self._meta.get_context_top_k() * partition.num_rows,
                 )
+            )
+
+        return prompts
+
+    def _search(self, queries: List[str]) -> List[dict]:
+        """
+        Issues the queries concurrently. The results follow the order of the queries.
+        """
+        search: GoogleSerperAPIWrapper = GoogleSerperAPIWrapper(
+            serper_api_key=self._serper_api_key
+        )
+
+        return search_all(
+            search,
+            queries,
+            max_workers=self._meta.get_search_concurrency(),
+            cache=self._meta.get_search_cache(),
+        )
+
+    def _crawl(self, links: List[str]) -> List[PageExtraction]:
+        """
+        Crawls the links concurrently and extracts the text and tables of each page. The result follows
+        the order of the links; pages that could not be fetched are None.
+        """
+        logging.info(f"Crawling {len(links)} links")
+
+        crawler: Crawler = Crawler(
+            max_workers=self._meta.get_search_concurrency(),
+            cache=self._meta.get_search_cache(),
+        )
+        try:
+            pages: List[str] = crawler.fetch_all(links)
+        finally:
+            crawler.close()
+
+        # Strip the markup and boilerplate before the pages reach the prompts
+        return extract_pages(pages)
+
+    def _split(self, extractions: List[PageExtraction]) -> List[List[str]]:
+        """
+        Splits the text of each page into chunks. Pages that could not be fetched have no chunks.
+        """
+        return [
+            self._splitter.split(extraction.text) if extraction and extraction.text else []
+            for extraction in extractions
+        ]
+
+    def _match_page_tables(
+        self, extractions: List[PageExtraction], input_table: pa.Table
+    ) -> None:
+        """
+        Loads the HTML tables of the crawled pages that match the schema straight into Arrow. Rows that
+        fill every column need no LLM call; rows with missing values are completed by the LLM.
+        """
+        schema: SwellDBSchema = self._logical_table.get_schema()
+
+        tables: List[pa.Table] = []
+        for extraction in extractions:
+            if not extraction:
+                continue
+
+            for html_table in extraction.tables:
+                table = match_table(html_table, schema, self._base_columns)
+                if table is not None and table.num_rows:
+                    tables.append(table)
+
+        if not tables:
+            return
+
+        extracted: pa.Table = pa.concat_tables(tables)
+
+        # With input rows, only the rows of the input entities are kept
+        if input_table and self._base_columns:
+            extracted = self._align_keys(extracted, input_table)
+
+        complete_mask = pa.array(
+            [all(v is not None for v in row.values()) for row in extracted.to_pylist()],
+            type=pa.bool_(),
+        )
+
+        complete: pa.Table = extracted.filter(complete_mask)
+        partial: pa.Table = extracted.filter(pc.invert(complete_mask))
+
+        if self._base_columns:
+            # Aligned rows carry the exact input values, one row per spelling of an entity
+            complete = self._drop_duplicate_keys(complete, exact=bool(input_table))
+            self._filled_keys = set(self._keys(complete))
 
-                prompts.append(prompt)
+            # Entities with a complete row need no partial one
+            partial = self._drop_duplicate_keys(
+                partial.filter(
+                    pa.array(
+                        [key not in self._filled_keys for key in self._keys(partial)],
+                        type=pa.bool_(),
+                    )
+                ),
+                exact=bool(input_table),
+            )
+
+        if complete.num_rows:
+            self._extracted_table = complete
+        if partial.num_rows:
+            self._partial_rows = partial
+
+        logging.info(
+            f"Loaded {complete.num_rows} complete and {partial.num_rows} partial rows "
+            f"from {len(tables)} HTML tables"
+        )
+
+    def _keys(self, table: pa.Table) -> List[tuple]:
+        columns: List[list] = [table.column(c).to_pylist() for c in self._base_columns]
+        return [tuple(str(v).strip().lower() for v in key) for key in zip(*columns)]
+
+    def _align_keys(self, extracted: pa.Table, input_table: pa.Table) -> pa.Table:
+        """
+        Keeps the extracted rows of the input entities, and rewrites their base columns to the exact
+        values of the input rows, e.g. "athens" to "Athens ", so that they join with the child rows.
+        A row matching several spellings of an entity is repeated for each of them.
+        """
+        input_rows: Dict[tuple, List[dict]] = dict()
+        for key, row in zip(
+            self._keys(input_table), input_table.select(self._base_columns).to_pylist()
+        ):
+            if row not in input_rows.setdefault(key, []):
+                input_rows[key].append(row)
+
+        indices: List[int] = []
+        matched: List[dict] = []
+        for idx, key in enumerate(self._keys(extracted)):
+            for row in input_rows.get(key, []):
+                indices.append(idx)
+                matched.append(row)
+
+        extracted = extracted.take(pa.array(indices, type=pa.int64()))
+
+        for column in self._base_columns:
+            idx: int = extracted.schema.get_field_index(column)
+            values: pa.Array = pa.array(
+                [row[column] for row in matched], type=input_table.schema.field(column).type
+            )
+            extracted = extracted.set_column(
+                idx, extracted.schema.field(idx), values.cast(extracted.schema.field(idx).type)
+            )
+
+        return extracted
+
+    def _drop_duplicate_keys(self, table: pa.Table, exact: bool = False) -> pa.Table:
+        seen: set = set()
+        mask: List[bool] = []
+
+        if exact:
+            keys: List[tuple] = list(
+                zip(*[table.column(c).to_pylist() for c in self._base_columns])
+            )
+        else:
+            keys = self._keys(table)
+
+        for key in keys:
+            mask.append(key not in seen)
+            seen.add(key)
+
+        return table.filter(pa.array(mask, type=pa.bool_()))
+
+    def get_extracted_table(self) -> pa.Table:
+        return self._extracted_table
+
+    def _add_results(
+        self, results: dict, dedup: Deduplicator, passages: List[str], links: List[str]
+    ) -> None:
+        """
+        Adds the organic results of a search to the passages and links, skipping repeated links and
+        near-duplicate snippets.
+        """
+        for result in results.get("organic", []):
+            if not dedup.add_link(result["link"]):
+                continue
+
+            links.append(result["link"])
+
+            if dedup.add_text(f"{result.get('title', '')} {result.get('snippet', '')}"):
+                passages.append(self._format_result(result))
+
+    @staticmethod
+    def _format_result(result: dict) -> str:
+        """
+        A compact rendering of an organic search result.
+        """
+        return f"{result.get('title', '')}: {result.get('snippet', '')} ({result.get('link', '')})"
+
+    def _create_prompts(
+        self, input_table: pa.Table, passages: List[str], top_k: int = None
+    ) -> List[str]:
+        """
+        Indexes the passages and creates the prompts for each partition of the input rows, using only
+        the top_k passages that are most relevant to the rows of the partition.
+        """
+        index: BM25Index = BM25Index(passages)
+        top_k = top_k or self._meta.get_context_top_k()
+        schema: List[str] = self._logical_table.get_schema().get_attribute_names()
+
+        if input_table:
+            if self._base_columns:
+                input_table = input_table.select(self._base_columns)
+
+                # Entities already filled from the HTML tables need no prompt
+                if self._filled_keys:
+                    input_table = input_table.filter(
+                        pa.array(
+                            [key not in self._filled_keys for key in self._keys(input_table)],
+                            type=pa.bool_(),
+                        )
+                    )
+
+                input_table = self._with_partial_values(input_table)
+
+            if not input_table.num_rows:
+                return []
+
+            partitions: List[Optional[pa.Table]] = self.partition_table(input_table)
         else:
-            prompt: str = create_table_prompt(
-                table_description=self._logical_table.get_prompt(),
-                table_schema=self._logical_table.get_schema().get_attribute_names(),
-                data=f"Original data: {data}\nSearch results: {search_results}",
-                layout=self._layout,
+            # The rows that the HTML tables left incomplete are completed, and the entities that they
+            # do not cover are asked for
+            partitions = (
+                self.partition_table(self._partial_rows) if self._partial_rows is not None else []
             )
+            partitions.append(None)
+
+        prompts: List[str] = []
+        selected_chars: int = 0
+
+        for partition in partitions:
+            known: str = ""
+
+            if partition is None:
+                data: List = list()
+                query: str = f"{self._logical_table.get_prompt()} {' '.join(schema)}"
 
-            prompts = [prompt]
+                if self._extracted_table is not None:
+                    known_rows: pa.Table = self._extracted_table
+                    if self._base_columns:
+                        known_rows = known_rows.select(self._base_columns)
+                    known = f"Known rows, which must not be repeated: {known_rows.to_pylist()}\n"
+            else:
+                data = partition.to_pylist()
+                query = " ".join(str(v) for row in data for v in row.values() if v is not None)
+
+            context: List[str] = index.top_passages(query, top_k)
+            selected_chars += sum(len(passage) for passage in context)
 
-        logging.info(f"Table prompt: {prompt}")
+            for group in self._pack(context):
+                prompts.append(
+                    create_table_prompt(
+                        table_description=self._logical_table.get_prompt(),
+                        table_schema=schema,
+                        data=f"{known}Original data: {data}\nSearch results: {group}",
+                        layout=self._layout,
+                    )
+                )
+
+        logging.info(
+            f"Selected {selected_chars} of {sum(len(p) for p in passages)} characters "
+            f"from {len(index)} passages for {len(partitions)} partitions"
+        )
 
         return prompts
 
+    def _with_partial_values(self, input_table: pa.Table) -> pa.Table:
+        """
+        Adds the values that the HTML tables filled in for the input entities, so that the LLM only
+        completes the missing ones. The partial rows carry the exact base column values of the input.
+        """
+        if self._partial_rows is None:
+            return input_table
+
+        partial: Dict[tuple, dict] = dict()
+        for row in self._partial_rows.to_pylist():
+            partial.setdefault(tuple(row[c] for c in self._base_columns), row)
+
+        empty: dict = {name: None for name in self._partial_rows.column_names}
+        rows: List[dict] = [
+            partial.get(tuple(row[c] for c in self._base_columns), {**empty, **row})
+            for row in input_table.to_pylist()
+        ]
+
+        return pa.Table.from_pylist(rows, schema=self._partial_rows.schema)
+
+    @override
+    def _process_response(
+        self, idx: int, n_prompts: Optional[int], resp: str, child_result: pa.Table
+    ) -> pa.Table:
+        table: pa.Table = super()._process_response(idx, n_prompts, resp, child_result)
+
+        # Without input rows, the entities filled from the HTML tables keep their extracted rows
+        if child_result is None and self._filled_keys and table.num_rows:
+            table = table.filter(
+                pa.array(
+                    [key not in self._filled_keys for key in self._keys(table)], type=pa.bool_()
+                )
+            )
+
+        return table
+
+    @staticmethod
+    def _pack(passages: List[str], max_chars: int = MAX_CONTEXT_CHARS) -> List[str]:
+        """
+        Packs the passages into as few groups as possible, each of them up to max_chars long.
+        A partition without any passages still gets a single, empty group.
+        """
+        groups: List[str] = []
+        current: List[str] = []
+        current_chars: int = 0
+
+        for passage in passages:
+            if current and current_chars + len(passage) > max_chars:
+                groups.append("\n".join(current))
+                current, current_chars = [], 0
+
+            current.append(passage)
+            current_chars += len(passage)
+
+        groups.append("\n".join(current))
+
+        return groups
+
     @override
     def __str__(self):
         return f"SearchEngineTable[schema={self._logical_table.get_schema().get_attribute_names()}"
\ No newline at end of file
@@ -0,0 +1,76 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+from typing import List
+
+import pyarrow as pa
+
+from swelldb.table_plan.table.physical.physical_table import PhysicalTable
+
+
+class ScriptedLLM:
+    """Answers the prompts with the given responses, in order."""
+
+    def __init__(self, responses: List[str]):
+        self._responses: List[str] = list(responses)
+        self.prompts: List[str] = []
+
+    def call(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        return self._responses.pop(0)
+
+
+class InputTable(PhysicalTable):
+    """A child table that materializes the given rows."""
+
+    def __init__(self, table: pa.Table):
+        super().__init__(
+            execution_engine=None,
+            llm=None,
+            logical_table=None,
+            child_table=None,
+            operator_name="input_table",
+        )
+        self._table = table
+
+    def materialize(self, partitions: int = 1) -> pa.Table:
+        return self._table
+
+
+def write_pdf(path: str, contents: List[str]) -> None:
+    """
+    Writes a PDF with a page per content stream. The content streams can use Helvetica as font /F1.
+    """
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids: List[str] = []
+
+    for content in contents:
+        stream: bytes = content.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        kids.append(f"{len(objects)} 0 R")
+
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(contents)} >>".encode()
+
+    data: bytes = b"%PDF-1.4\n"
+    offsets: List[int] = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+
+    xref: int = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    data += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    data += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+
+    with open(path, "wb") as f:
+        f.write(data)
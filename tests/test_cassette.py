@@ -0,0 +1,45 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import os
+import tempfile
+import unittest
+
+from swelldb.common.cassette import Cassette, intercept
+
+
+class TestCassette(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._dir.name, "run.cassette")
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_record_replay(self):
+        responses = iter(["first", "second"])
+
+        with Cassette(self._path, mode=Cassette.RECORD):
+            self.assertEqual(intercept("llm", "prompt", lambda: next(responses)), "first")
+            self.assertEqual(intercept("llm", "prompt", lambda: next(responses)), "second")
+            self.assertEqual(
+                intercept("search", "query", lambda: {"organic": [{"link": "a"}]}),
+                {"organic": [{"link": "a"}]},
+            )
+
+        def fail():
+            raise AssertionError("Live call in replay mode")
+
+        with Cassette(self._path, mode=Cassette.REPLAY):
+            self.assertEqual(intercept("llm", "prompt", fail), "first")
+            # Lazy requests are built when a cassette is active
+            self.assertEqual(intercept("llm", lambda: "prompt", fail), "second")
+            self.assertEqual(intercept("search", "query", fail), {"organic": [{"link": "a"}]})
+
+            with self.assertRaises(KeyError):
+                intercept("crawl", "http://unknown", fail)
+
+    def test_no_active_cassette(self):
+        self.assertEqual(intercept("llm", "prompt", lambda: "live"), "live")
@@ -0,0 +1,130 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import threading
+import time
+import unittest
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+from swelldb.search.crawler import Crawler
+from swelldb.search.utils import search_all
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/missing":
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        body = f"page {self.path}".encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class InFlightRecorder:
+    """Records the maximum number of in-flight requests, in total and per key."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = defaultdict(int)
+        self.max_in_flight = defaultdict(int)
+
+    @contextmanager
+    def track(self, key: str):
+        with self._lock:
+            for k in (key, "*"):
+                self._in_flight[k] += 1
+                self.max_in_flight[k] = max(self.max_in_flight[k], self._in_flight[k])
+        try:
+            yield
+        finally:
+            with self._lock:
+                for k in (key, "*"):
+                    self._in_flight[k] -= 1
+
+
+class FakeSession:
+    """Answers each request after a short delay, while recording the requests in flight per domain."""
+
+    def __init__(self, recorder: InFlightRecorder):
+        self._recorder = recorder
+
+    def get(self, link: str, headers: dict, timeout: float):
+        with self._recorder.track(urlparse(link).netloc):
+            time.sleep(0.02)
+        return SimpleNamespace(status_code=200, text=f"page {link}", headers={})
+
+    def close(self):
+        pass
+
+
+class FakeSearchEngine:
+    """Answers later queries faster, so that their results complete out of order."""
+
+    def __init__(self, queries, recorder: InFlightRecorder):
+        self._delays = {query: 0.01 * (len(queries) - idx) for idx, query in enumerate(queries)}
+        self._recorder = recorder
+
+    def results(self, query: str) -> dict:
+        with self._recorder.track("search"):
+            time.sleep(self._delays[query])
+        return {"query": query}
+
+
+class TestCrawler(unittest.TestCase):
+    def setUp(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        self._base = f"http://127.0.0.1:{self._server.server_port}"
+
+    def tearDown(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def test_fetch_all_keeps_order(self):
+        crawler = Crawler(max_workers=4, max_per_domain=2, timeout=5)
+        links = [f"{self._base}/{i}" for i in range(10)] + [f"{self._base}/missing"]
+
+        pages = crawler.fetch_all(links)
+        crawler.close()
+
+        self.assertEqual(pages[:10], [f"page /{i}" for i in range(10)])
+        self.assertIsNone(pages[10])
+
+    def test_per_domain_limit(self):
+        recorder = InFlightRecorder()
+        crawler = Crawler(max_workers=8, max_per_domain=2)
+        crawler._session = FakeSession(recorder)
+
+        links = [f"https://{domain}/{i}" for i in range(10) for domain in ("a.com", "b.com")]
+        pages = crawler.fetch_all(links)
+
+        self.assertEqual(pages, [f"page {link}" for link in links])
+        # Each domain is limited, while the two domains are fetched concurrently
+        self.assertEqual(recorder.max_in_flight["a.com"], 2)
+        self.assertEqual(recorder.max_in_flight["b.com"], 2)
+        self.assertGreater(recorder.max_in_flight["*"], 2)
+
+    def test_search_all(self):
+        recorder = InFlightRecorder()
+        queries = [f"query {i}" for i in range(6)]
+
+        results = search_all(FakeSearchEngine(queries, recorder), queries, max_workers=3)
+
+        # The results follow the order of the queries, although the later ones complete first
+        self.assertEqual(results, [{"query": query} for query in queries])
+        self.assertEqual(recorder.max_in_flight["search"], 3)
+        self.assertEqual(search_all(FakeSearchEngine([], recorder), []), [])
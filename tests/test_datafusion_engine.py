@@ -0,0 +1,167 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import os
+import tempfile
+import unittest
+
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from swelldb.engine.datafusion_processor import DataFusionEngine, discover_partitions
+
+
+class TestDataFusionEngine(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def _path(self, *parts: str) -> str:
+        path = os.path.join(self._dir.name, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def test_register_partitioned_parquet(self):
+        for year, region, amount in [(2023, "eu", 1), (2024, "eu", 2), (2024, "us", 3)]:
+            pq.write_table(
+                pa.table({"amount": [amount]}),
+                self._path("sales", f"year={year}", f"region={region}", "part-0.parquet"),
+            )
+
+        self.assertEqual(
+            discover_partitions(self._path("sales", "")), [("year", "int"), ("region", "string")]
+        )
+
+        engine = DataFusionEngine()
+        engine.register_file("sales", self._path("sales", ""))
+
+        result = engine.sql(
+            "SELECT region, SUM(amount) AS total FROM sales WHERE year = 2024 "
+            "GROUP BY region ORDER BY region"
+        ).to_arrow_table()
+
+        self.assertEqual(
+            result.to_pylist(), [{"region": "eu", "total": 2}, {"region": "us", "total": 3}]
+        )
+
+    def test_register_ipc(self):
+        feather.write_feather(pa.table({"k": ["a", "b"], "v": [1, 2]}), self._path("t.arrow"))
+
+        engine = DataFusionEngine()
+        engine.register_file("t", self._path("t.arrow"))
+
+        result = engine.sql("SELECT k FROM t WHERE v > 1").to_arrow_table()
+        self.assertEqual(result.to_pylist(), [{"k": "b"}])
+
+    def test_convert_csv_to_parquet_once(self):
+        with open(self._path("people.csv"), "w") as f:
+            f.write("name,age\nalice,30\nbob,40\n")
+
+        parquet_dir = self._path("parquet", "")
+
+        for name in ("people", "people_again"):
+            engine = DataFusionEngine(csv_parquet_dir=parquet_dir)
+            engine.register_csv(name, self._path("people.csv"))
+
+            result = engine.sql(f"SELECT name FROM {name} WHERE age > 35").to_arrow_table()
+            self.assertEqual(result.to_pylist(), [{"name": "bob"}])
+
+        self.assertEqual(len(os.listdir(parquet_dir)), 1)
+
+        # A new version of the file replaces the previous conversion
+        with open(self._path("people.csv"), "a") as f:
+            f.write("carol,50\n")
+
+        engine = DataFusionEngine(csv_parquet_dir=parquet_dir)
+        engine.register_csv("people", self._path("people.csv"))
+
+        result = engine.sql("SELECT COUNT(*) AS n FROM people").to_arrow_table()
+        self.assertEqual(result.to_pylist(), [{"n": 3}])
+        self.assertEqual(len(os.listdir(parquet_dir)), 1)
+
+    def test_schema_catalog(self):
+        pq.write_table(
+            pa.table({"city": ["Athens", "Paris", None], "population": [3, 2, 11]}),
+            self._path("cities.parquet"),
+        )
+
+        engine = DataFusionEngine(collect_statistics=True)
+        engine.register_file("cities", self._path("cities.parquet"))
+
+        info = engine.get_catalog().get("cities")
+        self.assertEqual(info.get_schema().names, ["city", "population"])
+        self.assertEqual(info.get_num_rows(), 3)
+        self.assertAlmostEqual(info.get_column_stats()["city"].get_null_fraction(), 1 / 3)
+        self.assertEqual(
+            engine.get_tables(),
+            {
+                "cities": "city: string (e.g. 'Athens', 'Paris'), "
+                "population: int64 (e.g. 3, 2, 11); 3 rows"
+            },
+        )
+
+        # Views created through SQL are picked up, and deregistered tables are dropped
+        engine.sql(
+            "CREATE VIEW big_cities AS SELECT city FROM cities WHERE population > 2"
+        ).collect()
+        engine.deregister_table("cities")
+
+        self.assertEqual(list(engine.get_tables()), ["big_cities"])
+
+    def test_register_arrow(self):
+        table = pa.table({"k": [f"k{i}" for i in range(10)], "v": list(range(10))})
+        batches = table.to_batches(max_chunksize=3)
+        engine = DataFusionEngine()
+
+        engine.register_arrow("from_table", table)
+        engine.register_arrow("from_batches", batches)
+        engine.register_arrow(
+            "from_reader", pa.RecordBatchReader.from_batches(table.schema, batches)
+        )
+        engine.register_arrow("empty", [], schema=table.schema)
+
+        for name in ("from_table", "from_batches", "from_reader"):
+            result = engine.sql(f"SELECT SUM(v) AS total FROM {name} WHERE k <> 'k0'")
+            self.assertEqual(result.to_arrow_table().to_pylist(), [{"total": 45}])
+
+        self.assertEqual(engine.sql("SELECT * FROM empty").to_arrow_table().num_rows, 0)
+
+        engine.register_arrow("from_table", table.slice(0, 2), replace=True)
+        scanned = engine.sql("SELECT v FROM from_table").to_arrow_table()
+        self.assertEqual(scanned.num_rows, 2)
+        self.assertEqual(engine.get_catalog().get("from_table").get_schema(), table.schema)
+
+    def test_session_config(self):
+        engine = DataFusionEngine(
+            target_partitions=3,
+            batch_size=1024,
+            memory_limit=64 << 20,
+            spill_dir=self._path("spill", ""),
+            config={"datafusion.optimizer.max_passes": 5},
+        )
+
+        for name, value in [
+            ("datafusion.execution.target_partitions", "3"),
+            ("datafusion.execution.batch_size", "1024"),
+            ("datafusion.optimizer.max_passes", "5"),
+        ]:
+            result = engine.sql(f"SHOW {name}").to_arrow_table().to_pylist()
+            self.assertEqual(result[0]["value"], value)
+
+        # Queries run within the memory limit
+        table = pa.table({"k": [i % 100 for i in range(100_000)], "v": list(range(100_000))})
+        engine.register_arrow("data", table)
+        result = engine.sql("SELECT k, SUM(v) AS total FROM data GROUP BY k ORDER BY k")
+        self.assertEqual(result.to_arrow_table().num_rows, 100)
+
+        with self.assertRaises(ValueError):
+            DataFusionEngine(memory_pool="unbounded")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import unittest
+
+from swelldb.search.dedup import Deduplicator, canonical_url
+
+ARTICLE = (
+    "Walmart remained the largest company in the world by revenue in 2024, reporting "
+    "revenue of 648 billion dollars, ahead of Amazon, State Grid and Saudi Aramco, "
+    "according to the annual ranking published this week by the magazine."
+)
+
+
+class TestDedup(unittest.TestCase):
+    def test_canonical_url(self):
+        self.assertEqual(
+            canonical_url("https://www.Example.com/a/?utm_source=x&id=1#top"),
+            canonical_url("http://example.com/a?id=1"),
+        )
+        self.assertEqual(
+            canonical_url("https://example.com/a?fbclid=x&gclid=y&ref_src=twsrc"),
+            canonical_url("https://example.com/a"),
+        )
+
+        # Generic parameters may select the content, so they are kept
+        for query in ("ref=main", "source=archive", "spm=a2g0o"):
+            self.assertNotEqual(
+                canonical_url(f"https://example.com/a?{query}"), canonical_url("https://example.com/a")
+            )
+
+    def test_links(self):
+        dedup = Deduplicator()
+
+        self.assertTrue(dedup.add_link("https://example.com/a"))
+        self.assertFalse(dedup.add_link("https://www.example.com/a/?utm_medium=email"))
+        self.assertTrue(dedup.add_link("https://example.com/b"))
+        self.assertEqual(dedup.get_stats().dropped_links, 1)
+
+    def test_near_duplicate_texts(self):
+        dedup = Deduplicator()
+        syndicated = ARTICLE.replace("this week", "this  week") + " Read more."
+
+        kept = dedup.filter_texts([ARTICLE, syndicated, "Netflix streams movies and series."])
+
+        self.assertEqual(kept, [ARTICLE, "Netflix streams movies and series."])
+        self.assertEqual(dedup.get_stats().dropped_texts, 1)
+        self.assertEqual(dedup.get_stats().dropped_bytes, len(syndicated))
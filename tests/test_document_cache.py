@@ -0,0 +1,75 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import os
+import tempfile
+import unittest
+
+from swelldb.common.document_cache import DocumentCache
+from swelldb.common.document_loader import DocumentLoader
+
+
+class TestDocumentCache(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._cache = DocumentCache(os.path.join(self._dir.name, "cache"))
+
+    def tearDown(self):
+        self._cache.close()
+        self._dir.cleanup()
+
+    def _write(self, name: str, text: str) -> str:
+        path = os.path.join(self._dir.name, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_pages_and_chunks(self):
+        path = self._write("a.txt", "The first document")
+
+        self.assertIsNone(self._cache.get_pages(path))
+
+        self._cache.put_pages(path, ["page one", "page two"])
+        self._cache.put_chunks(path, 100, 10, [(1, "page one"), (2, "page two")])
+
+        self.assertEqual(self._cache.get_pages(path), ["page one", "page two"])
+        self.assertEqual(self._cache.get_chunks(path, 100, 10), [(1, "page one"), (2, "page two")])
+        self.assertIsNone(self._cache.get_chunks(path, 200, 10))
+
+        # A copy with the same content shares the entries, a modified file does not
+        copy = self._write("copy.txt", "The first document")
+        self.assertEqual(self._cache.get_pages(copy), ["page one", "page two"])
+
+        self._write("a.txt", "The modified document")
+        self.assertIsNone(self._cache.get_pages(path))
+
+    def test_eviction(self):
+        cache = DocumentCache(os.path.join(self._dir.name, "small"), max_bytes=3000)
+        paths = [self._write(f"doc_{idx}.txt", f"Document {idx}") for idx in range(3)]
+
+        for path in paths:
+            cache.put_pages(path, ["x" * 1000])
+
+        self.assertIsNone(cache.get_pages(paths[0]))
+        self.assertIsNotNone(cache.get_pages(paths[2]))
+        self.assertGreater(cache.get_stats()["evictions"], 0)
+        self.assertLessEqual(cache.get_stats()["bytes"], 3000)
+        cache.close()
+
+    def test_loader_uses_cache(self):
+        path = self._write("doc.txt", "Some document text")
+        loader = DocumentLoader(cache=self._cache)
+
+        self.assertEqual(
+            list(loader.iter_pages([path], max_workers=1)), [(path, 1, "Some document text")]
+        )
+        self.assertEqual(self._cache.get_pages(path), ["Some document text"])
+
+        self._cache.put_pages(path, ["Cached text"])
+        self.assertEqual(list(loader.iter_pages([path])), [(path, 1, "Cached text")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+from swelldb.common.document_loader import DocumentLoader
+from swelldb.common.text import Splitter
+from tests.helpers import write_pdf
+
+
+class TestDocumentLoader(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._paths = []
+
+        for idx in range(5):
+            path = os.path.join(self._dir.name, f"doc_{idx}.txt")
+            with open(path, "w") as f:
+                f.write(f"Document {idx}\n" + "word " * 300)
+            self._paths.append(path)
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_iter_pages_in_order(self):
+        paths = self._paths + [os.path.join(self._dir.name, "missing.txt")]
+
+        for max_workers in (1, 2):
+            pages = list(DocumentLoader().iter_pages(paths, max_workers=max_workers))
+
+            self.assertEqual([doc for doc, _, _ in pages], self._paths)
+            self.assertTrue(all(page_no == 1 for _, page_no, _ in pages))
+            self.assertTrue(pages[3][2].startswith("Document 3"))
+
+    def test_single_document_inline(self):
+        with mock.patch("swelldb.common.document_loader.ProcessPoolExecutor") as pool:
+            pages = list(DocumentLoader().iter_pages(self._paths[:1]))
+
+        pool.assert_not_called()
+        self.assertEqual([doc for doc, _, _ in pages], self._paths[:1])
+
+    def test_single_pdf_across_workers(self):
+        path = os.path.join(self._dir.name, "report.pdf")
+        write_pdf(path, [f"BT /F1 12 Tf 72 720 Td (Page {page_no}) Tj ET" for page_no in range(1, 21)])
+
+        with mock.patch(
+            "swelldb.common.document_loader.ProcessPoolExecutor", wraps=ProcessPoolExecutor
+        ) as pool:
+            pages = list(DocumentLoader().iter_pages([path], max_workers=2))
+
+        # The pages of the document are extracted in several tasks, in a process pool
+        pool.assert_called_once()
+        self.assertEqual([page_no for _, page_no, _ in pages], list(range(1, 21)))
+        self.assertEqual([text.strip() for _, _, text in pages][-1], "Page 20")
+
+    def test_split_pages(self):
+        pages = [
+            ("a.pdf", page_no, f"Page {page_no} " + "text " * 100)
+            for page_no in range(1, 11)
+        ] + [("b.pdf", 1, "Other document")]
+
+        chunks = list(Splitter(chunk_size=1000, chunk_overlap=0).split_pages(pages))
+
+        self.assertTrue(all(len(chunk) <= 1000 for _, _, chunk in chunks))
+        self.assertEqual(chunks[-1], ("b.pdf", 1, "Other document"))
+        self.assertTrue(all(doc == "a.pdf" for doc, _, _ in chunks[:-1]))
+        self.assertEqual(
+            "".join(chunk for _, _, chunk in chunks[:-1]).count("text"), 1000
+        )
+
+    def test_token_splitter(self):
+        splitter = Splitter.for_model(
+            "gpt-4o", context_window=8192, context_fraction=0.5, prompt_tokens=1000, output_tokens=1000
+        )
+        self.assertEqual(splitter.chunk_size, 3096)
+
+        pages = [("a.pdf", page_no, f"Page {page_no} " + "text " * 500) for page_no in range(1, 9)]
+        chunks = list(splitter.split_pages(pages))
+
+        self.assertTrue(all(splitter.length(chunk) <= splitter.chunk_size for _, _, chunk in chunks))
+        # Chunks start at page breaks whenever a page fits in the remaining room
+        self.assertTrue(all(chunk.startswith("Page") for _, _, chunk in chunks))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pyarrow as pa
+
+from swelldb.common.document_cache import DocumentCache
+from swelldb.common.document_loader import DocumentLoader
+from swelldb.table_plan.meta import SwellDBMeta
+from swelldb.table_plan.swelldb_schema import SwellDBSchemaBuilder
+from swelldb.table_plan.table.logical.logical_table import LogicalTable
+from swelldb.table_plan.table.physical.document_table import DocumentTable
+from tests.helpers import write_pdf
+
+
+def _make_pdf(path, text_lines, table):
+    """Writes a single-page PDF with some lines of text followed by a ruled table."""
+    ops = ["BT /F1 12 Tf"]
+    y = 750
+    for line in text_lines:
+        ops.append(f"1 0 0 1 72 {y} Tm ({line}) Tj")
+        y -= 20
+    ops.append("ET")
+
+    top, row_h, col_w = y - 20, 20, 120
+    n_rows, n_cols = len(table), len(table[0])
+    for r in range(n_rows + 1):
+        ops.append(f"72 {top - r * row_h} m {72 + n_cols * col_w} {top - r * row_h} l S")
+    for c in range(n_cols + 1):
+        ops.append(f"{72 + c * col_w} {top} m {72 + c * col_w} {top - n_rows * row_h} l S")
+
+    ops.append("BT /F1 10 Tf")
+    for r, row in enumerate(table):
+        for c, cell in enumerate(row):
+            ops.append(f"1 0 0 1 {76 + c * col_w} {top - (r + 1) * row_h + 6} Tm ({cell}) Tj")
+    ops.append("ET")
+
+    write_pdf(path, ["\n".join(ops)])
+
+
+class TestDocumentTable(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._pdf = os.path.join(self._dir.name, "report.pdf")
+        _make_pdf(
+            self._pdf,
+            ["Annual report", "Initech opened a new office."],
+            [["Company", "Revenue"], ["Acme", "1,200"], ["Globex", "950"]],
+        )
+
+        schema = (
+            SwellDBSchemaBuilder()
+            .add_attribute("company", pa.string(), description=None)
+            .add_attribute("revenue", pa.int64(), description=None)
+            .build()
+        )
+        self._logical_table = LogicalTable("companies", "companies and revenues", schema)
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def _table(self, meta: SwellDBMeta) -> DocumentTable:
+        return DocumentTable(
+            execution_engine=None,
+            logical_table=self._logical_table,
+            child_table=None,
+            meta=meta.set_links([self._pdf]),
+            llm=None,
+        )
+
+    def test_iter_page_tables(self):
+        pages = list(DocumentLoader().iter_page_tables([self._pdf], max_workers=1))
+
+        self.assertEqual(len(pages), 1)
+        doc, page_no, text, tables = pages[0]
+        self.assertEqual((doc, page_no), (self._pdf, 1))
+        self.assertNotIn("Globex", text)
+        self.assertEqual(tables, [[["Company", "Revenue"], ["Acme", "1,200"], ["Globex", "950"]]])
+
+    def test_matching_tables_skip_the_llm(self):
+        cache = DocumentCache(os.path.join(self._dir.name, "cache"))
+
+        # The second run reads the chunks and rows from the cache
+        for _ in range(2):
+            table = self._table(SwellDBMeta().set_document_cache(cache))
+            prompts = table.get_prompts(None)
+
+            self.assertEqual(
+                table.get_extracted_table().to_pylist(),
+                [{"company": "Acme", "revenue": 1200}, {"company": "Globex", "revenue": 950}],
+            )
+            self.assertEqual(len(prompts), 1)
+            self.assertIn("Initech", prompts[0])
+            self.assertNotIn("Globex", prompts[0])
+
+        self.assertGreater(cache.get_stats()["hits"], 0)
+        cache.close()
+
+    def test_cache_each_document_as_it_is_chunked(self):
+        cache = DocumentCache(os.path.join(self._dir.name, "cache"))
+        table = self._table(SwellDBMeta().set_document_cache(cache))
+        splitter = table._splitter
+        variant = f"{table._schema_fingerprint()}-{splitter.get_signature()}"
+
+        paths = []
+        for idx in range(2):
+            path = os.path.join(self._dir.name, f"notes_{idx}.txt")
+            with open(path, "w") as f:
+                f.write(f"Notes {idx} about Acme")
+            paths.append(path)
+
+        chunks = table._iter_chunks(paths, dict())
+        self.assertEqual(next(chunks)[0], paths[0])
+        self.assertIsNone(
+            cache.get_chunks(paths[0], splitter.chunk_size, splitter.chunk_overlap, variant)
+        )
+
+        # The first document is cached before the chunks of the second one are returned
+        self.assertEqual(next(chunks)[0], paths[1])
+        self.assertEqual(
+            cache.get_chunks(paths[0], splitter.chunk_size, splitter.chunk_overlap, variant),
+            [(1, "Notes 0 about Acme")],
+        )
+
+    def test_retry_failed_extraction(self):
+        cache = DocumentCache(os.path.join(self._dir.name, "cache"))
+        path = os.path.join(self._dir.name, "notes.txt")
+        with open(path, "w") as f:
+            f.write("Notes about Acme")
+
+        with mock.patch.object(DocumentLoader, "load_txt", side_effect=OSError("unreadable")):
+            table = self._table(SwellDBMeta().set_document_cache(cache))
+            self.assertEqual(list(table._iter_chunks([path], dict())), [])
+
+        # The failure was not cached: the next run extracts the document
+        table = self._table(SwellDBMeta().set_document_cache(cache))
+        self.assertEqual(list(table._iter_chunks([path], dict())), [(path, 1, "Notes about Acme")])
+        cache.close()
+
+    def test_prompts_only_for_chunks_that_mention_the_rows(self):
+        paths = []
+        for idx, text in enumerate(
+            ["Acme reported record revenue.", "Globex opened an office.", "Weather was mild."]
+        ):
+            paths.append(os.path.join(self._dir.name, f"note_{idx}.txt"))
+            with open(paths[-1], "w") as f:
+                f.write(text)
+
+        table = DocumentTable(
+            execution_engine=None,
+            logical_table=self._logical_table,
+            child_table=None,
+            meta=SwellDBMeta().add_document(paths[0]).add_document(paths[1]).add_document(paths[2]),
+            llm=None,
+        )
+        prompts = table.get_prompts(pa.table({"company": ["Acme", "Initech"]}))
+
+        self.assertEqual(len(prompts), 1)
+        self.assertIn("Acme reported record revenue", prompts[0])
+        self.assertIn("{'company': 'Acme'}", prompts[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import unittest
+
+from swelldb.search.extraction import extract_pages, extract_text
+
+PAGE = """
+<html>
+  <head><title>Companies</title><style>.a { color: red; }</style></head>
+  <body>
+    <nav><a href="/">Home</a></nav>
+    <div id="cookie-banner">Accept cookies</div>
+    <main>
+      <h1>Largest   companies</h1>
+      <p>Ranked by revenue.</p>
+      <table>
+        <tr><th>Rank</th><th>Company</th></tr>
+        <tr><td>1</td><td>Walmart</td></tr>
+      </table>
+    </main>
+    <footer>Copyright</footer>
+    <script>var x = 1;</script>
+  </body>
+</html>
+"""
+
+
+class TestExtraction(unittest.TestCase):
+    def test_extract_text(self):
+        self.assertEqual(
+            extract_text(PAGE),
+            "Largest companies\nRanked by revenue.\nRank | Company\n1 | Walmart",
+        )
+
+    def test_extract_pages(self):
+        extractions = extract_pages([PAGE, None, ""], max_workers=1)
+
+        self.assertIn("1 | Walmart", extractions[0].text)
+        self.assertGreater(extractions[0].tokens, 0)
+        self.assertIsNone(extractions[1])
+        self.assertIsNone(extractions[2])
+
+    def test_empty_xml_document(self):
+        page = '<?xml version="1.0" encoding="utf-8"?>\n<!-- nothing here -->'
+
+        self.assertEqual(extract_text(page), "")
+        self.assertEqual(extract_pages([page], max_workers=1)[0].text, "")
@@ -0,0 +1,88 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from PIL import Image
+
+from swelldb.common.image_processing import ImagePreprocessor
+
+
+class TestImagePreprocessor(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._paths = []
+
+        for idx, color in enumerate([(200, 30, 30, 255), (30, 200, 30, 128)]):
+            path = os.path.join(self._dir.name, f"image_{idx}.png")
+            Image.new("RGBA", (3000, 2000), color).save(path)
+            self._paths.append(path)
+
+        # A copy of the first image under another name
+        self._paths.append(os.path.join(self._dir.name, "copy.png"))
+        shutil.copy(self._paths[0], self._paths[2])
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_resize_and_reencode(self):
+        refs = ImagePreprocessor(max_edge=600, image_format="JPEG", max_workers=1).process(
+            self._paths + [os.path.join(self._dir.name, "missing.png")]
+        )
+
+        self.assertIsNone(refs[3])
+
+        for path, ref in zip(self._paths, refs):
+            self.assertEqual(ref.get_name(), os.path.basename(path))
+            self.assertEqual(ref.get_mime_type(), "image/jpeg")
+
+            with Image.open(io.BytesIO(ref.get_bytes())) as image:
+                self.assertEqual(image.format, "JPEG")
+                self.assertEqual(image.size, (600, 400))
+
+            # Without a cache directory, the images are still read from disk on demand
+            self.assertIsNotNone(ref.get_path())
+
+    def test_keep_or_reencode_originals(self):
+        small_png = os.path.join(self._dir.name, "small.png")
+        Image.new("RGB", (4, 4), (0, 0, 0)).save(small_png)
+
+        small_tiff = os.path.join(self._dir.name, "small.tiff")
+        Image.new("RGB", (4, 4), (0, 0, 0)).save(small_tiff, compression="tiff_lzw")
+
+        png_ref, tiff_ref = ImagePreprocessor(max_workers=1).process([small_png, small_tiff])
+
+        # A small PNG is smaller than its JPEG and is sent unchanged
+        self.assertEqual(png_ref.get_mime_type(), "image/png")
+
+        # A TIFF cannot be sent, so it is re-encoded even when that makes it larger
+        self.assertEqual(tiff_ref.get_mime_type(), "image/jpeg")
+        self.assertTrue(tiff_ref.get_bytes().startswith(b"\xff\xd8"))
+
+    def test_cache(self):
+        cache_dir = os.path.join(self._dir.name, "cache")
+        preprocessor = ImagePreprocessor(max_edge=800, image_format="WEBP", cache_dir=cache_dir)
+
+        refs = preprocessor.process(self._paths)
+        # Duplicates share the cached file
+        self.assertEqual(refs[0].get_path(), refs[2].get_path())
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+        self.assertEqual(refs[1].get_mime_type(), "image/webp")
+
+        mtime = os.path.getmtime(refs[0].get_path())
+        self.assertEqual(preprocessor.process(self._paths[:1])[0].get_path(), refs[0].get_path())
+        self.assertEqual(os.path.getmtime(refs[0].get_path()), mtime)
+
+        # Other parameters are cached separately
+        ImagePreprocessor(max_edge=400, image_format="WEBP", cache_dir=cache_dir).process(self._paths[:1])
+        self.assertEqual(len(os.listdir(cache_dir)), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,233 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import json
+import os
+import random
+import tempfile
+import unittest
+from typing import List
+
+from PIL import Image
+
+from swelldb.common.image_manifest import ImageManifest, group_near_duplicates, scan_images
+from swelldb.common.image_processing import estimate_image_tokens
+from swelldb.prompt.multimodal_prompt import MultimodalPrompt
+from swelldb.table_plan.layout import Layout
+from swelldb.table_plan.meta import SwellDBMeta
+from swelldb.table_plan.swelldb_schema import SwellDBSchema
+from swelldb.table_plan.table.logical.logical_table import LogicalTable
+from swelldb.table_plan.table.physical.image_table import ImageTable
+
+
+class BatchLLM:
+    """
+    Answers batch prompts with a row for every image but the last one, plus a row for an image that is
+    not in the batch, and single image prompts with a regular row.
+    """
+
+    def __init__(self, max_images_per_call: int = 50, layout: Layout = Layout.ROW()):
+        self._max_images_per_call = max_images_per_call
+        self._layout = layout
+        self.prompts: List[MultimodalPrompt] = []
+
+    def get_context_window(self) -> int:
+        return 128000
+
+    def get_max_images_per_call(self) -> int:
+        return self._max_images_per_call
+
+    def call(self, prompt: MultimodalPrompt) -> str:
+        self.prompts.append(prompt)
+        names = [image.get_name() for image in prompt.get_images()]
+
+        if len(names) == 1:
+            if self._layout == Layout.COLUMN():
+                return json.dumps({"columns": {"file": [names[0]], "source": ["single"]}})
+            return json.dumps({"rows": [[names[0], "single"]]})
+
+        rows = {name: [name, "batch"] for name in names[:-1]}
+        rows["unknown.png"] = ["unknown.png", "batch"]
+        return json.dumps({"rows": rows})
+
+
+def _create_image(seed: int) -> Image.Image:
+    """A smooth image made of random gray levels, which its perceptual hash tells apart from others."""
+    rng = random.Random(seed)
+    image = Image.new("L", (9, 8))
+    image.putdata([rng.randrange(0, 256, 32) for _ in range(72)])
+    return image.resize((288, 256), Image.Resampling.BICUBIC).convert("RGB")
+
+
+class TestImageTable(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+
+        for idx in range(5):
+            with open(os.path.join(self._dir.name, f"image_{idx}.png"), "wb") as f:
+                f.write(b"\x89PNG" + bytes([idx]))
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def _create_table(
+        self, llm: BatchLLM, batch_size: int, layout: Layout = Layout.ROW()
+    ) -> ImageTable:
+        meta = (
+            SwellDBMeta()
+            .set_layout(layout)
+            .set_images([self._dir.name])
+            .set_image_preprocessor(None)
+            .set_image_batch_size(batch_size)
+            .set_max_concurrency(1)
+        )
+
+        return ImageTable(
+            execution_engine=None,
+            logical_table=LogicalTable(
+                "images", "the images", SwellDBSchema.from_string("file str, source str")
+            ),
+            child_table=None,
+            meta=meta,
+            llm=llm,
+        )
+
+    def test_batches_with_missing_and_extra_rows(self):
+        llm = BatchLLM()
+        result = self._create_table(llm, batch_size=3).materialize()
+
+        # Two batches, and one retry for the last image of each
+        self.assertEqual([len(prompt.get_images()) for prompt in llm.prompts], [3, 1, 2, 1])
+        self.assertEqual(
+            sorted(result.to_pylist(), key=lambda row: row["file"]),
+            [
+                {"file": "image_0.png", "source": "batch"},
+                {"file": "image_1.png", "source": "batch"},
+                {"file": "image_2.png", "source": "single"},
+                {"file": "image_3.png", "source": "batch"},
+                {"file": "image_4.png", "source": "single"},
+            ],
+        )
+        self.assertIn("Image file: image_0.png", json.dumps(llm.prompts[0].to_content()))
+
+    def test_batches_in_column_layout(self):
+        llm = BatchLLM(layout=Layout.COLUMN())
+        result = self._create_table(llm, batch_size=3, layout=Layout.COLUMN()).materialize()
+
+        # Batches ask for keyed rows only, and the retried images for columns
+        batch_text, single_text = llm.prompts[0].get_text(), llm.prompts[1].get_text()
+        self.assertNotIn('"columns"', batch_text)
+        self.assertIn("'rows'", batch_text)
+        self.assertIn('"columns"', single_text)
+
+        self.assertEqual(len(result), 5)
+        self.assertEqual(result.column("source").to_pylist().count("single"), 2)
+
+    def test_batch_size_bounded_by_model(self):
+        llm = BatchLLM(max_images_per_call=1)
+        result = self._create_table(llm, batch_size=3).materialize()
+
+        self.assertEqual([len(prompt.get_images()) for prompt in llm.prompts], [1] * 5)
+        self.assertEqual(set(result.column("source").to_pylist()), {"single"})
+
+    def test_estimate_image_tokens(self):
+        self.assertEqual(estimate_image_tokens(512, 512), 85 + 170)
+        self.assertEqual(estimate_image_tokens(1024, 1024), 85 + 170 * 4)
+        self.assertEqual(estimate_image_tokens(4096, 2048), 85 + 170 * 6)
+
+
+class TestImageManifest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._images = os.path.join(self._dir.name, "images")
+        os.makedirs(self._images)
+
+        # An image, a resized and re-encoded copy of it, and a different image
+        image = _create_image(1)
+        image.save(os.path.join(self._images, "a.PNG"))
+        image.resize((100, 100)).save(os.path.join(self._images, "b.jpg"), quality=70)
+        _create_image(2).save(os.path.join(self._images, "c.png"))
+
+        with open(os.path.join(self._images, "notes.txt"), "w") as f:
+            f.write("not an image")
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def _materialize(self, manifest: ImageManifest) -> (BatchLLM, List[dict]):
+        llm = BatchLLM()
+        meta = (
+            SwellDBMeta()
+            .set_images([self._images])
+            .set_image_preprocessor(None)
+            .set_image_manifest(manifest)
+            .set_max_concurrency(1)
+        )
+        table = ImageTable(
+            execution_engine=None,
+            logical_table=LogicalTable(
+                "images", "the images", SwellDBSchema.from_string("file str, source str")
+            ),
+            child_table=None,
+            meta=meta,
+            llm=llm,
+        )
+
+        result = table.materialize()
+        return llm, sorted(result.to_pylist(), key=lambda row: row["source"]) if result else []
+
+    def test_scan_and_group(self):
+        images = scan_images([self._images])
+        self.assertEqual(
+            [os.path.basename(image.path) for image in images], ["a.PNG", "b.jpg", "c.png"]
+        )
+
+        manifest = ImageManifest(os.path.join(self._dir.name, "manifest.sqlite"), max_workers=1)
+        hashes = manifest.get_hashes(images)
+        groups = group_near_duplicates(hashes, max_distance=4)
+
+        self.assertEqual(
+            [[os.path.basename(path) for path in group] for group in groups],
+            [["a.PNG", "b.jpg"], ["c.png"]],
+        )
+
+    def test_incremental_runs(self):
+        path = os.path.join(self._dir.name, "manifest.sqlite")
+
+        llm, rows = self._materialize(ImageManifest(path, max_workers=1))
+        self.assertEqual(
+            [prompt.get_images()[0].get_name() for prompt in llm.prompts], ["a.PNG", "c.png"]
+        )
+
+        # The near-duplicate b.jpg gets a copy of the row of a.PNG, which names its own file
+        self.assertEqual(
+            sorted(rows, key=lambda row: row["file"]),
+            [
+                {"file": "a.PNG", "source": "single"},
+                {"file": "b.jpg", "source": "single"},
+                {"file": "c.png", "source": "single"},
+            ],
+        )
+
+        # Nothing changed: every row comes from the manifest
+        llm, rows_again = self._materialize(ImageManifest(path, max_workers=1))
+        self.assertEqual(llm.prompts, [])
+        self.assertEqual(sorted(map(str, rows_again)), sorted(map(str, rows)))
+
+        # Only the new image is sent
+        _create_image(3).save(os.path.join(self._images, "d.png"))
+        llm, rows = self._materialize(ImageManifest(path, max_workers=1))
+        self.assertEqual([prompt.get_images()[0].get_name() for prompt in llm.prompts], ["d.png"])
+        self.assertEqual(len(rows), 4)
+
+        # The near-duplicate was recorded with its own rows
+        os.remove(os.path.join(self._images, "a.PNG"))
+        llm, rows = self._materialize(ImageManifest(path, max_workers=1))
+        self.assertEqual(llm.prompts, [])
+        self.assertEqual(sorted(row["file"] for row in rows), ["b.jpg", "c.png", "d.png"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import base64
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from langchain_core.messages import AIMessage
+
+from swelldb.llm.abstract_llm import AbstractLLM
+from swelldb.prompt.multimodal_prompt import ImageRef, MultimodalPrompt
+
+
+class RecordingChatModel:
+    def __init__(self):
+        self.inputs = []
+
+    def invoke(self, messages):
+        self.inputs.append(messages)
+        return AIMessage(content='```json{"rows": []}```')
+
+
+class TestMultimodalPrompt(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._image = os.path.join(self._dir.name, "cat.png")
+        with open(self._image, "wb") as f:
+            f.write(b"\x89PNG fake image")
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_images_become_message_parts(self):
+        model = RecordingChatModel()
+        llm = AbstractLLM(model)
+        prompt = MultimodalPrompt("Describe the image", [ImageRef(path=self._image)])
+
+        self.assertEqual(llm.call(prompt), '{"rows": []}')
+
+        content = model.inputs[0][0].content
+        self.assertEqual(content[0], {"type": "text", "text": "Describe the image"})
+        self.assertEqual(
+            content[1]["image_url"]["url"],
+            "data:image/png;base64," + base64.b64encode(b"\x89PNG fake image").decode(),
+        )
+        self.assertNotIn("base64", str(prompt))
+
+    def test_no_cache_key_without_cassette(self):
+        llm = AbstractLLM(RecordingChatModel())
+        prompt = MultimodalPrompt("Describe the image", [ImageRef(path=self._image)])
+
+        # The images are only read to build the message, not to hash them
+        with mock.patch.object(MultimodalPrompt, "get_cache_key") as get_cache_key:
+            llm.call(prompt)
+
+        get_cache_key.assert_not_called()
+
+    def test_from_string(self):
+        data = base64.b64encode(b"jpeg bytes").decode()
+        prompt = MultimodalPrompt.from_string(
+            f"Extract rows\nImage file: a.jpg\nImage data: data:image/jpeg;base64,{data}\nDone"
+        )
+
+        self.assertEqual(prompt.get_text(), "Extract rows\nImage file: a.jpg\n\nDone")
+        self.assertEqual(prompt.get_images()[0].get_bytes(), b"jpeg bytes")
+        self.assertEqual(prompt.get_images()[0].get_mime_type(), "image/jpeg")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,231 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import json
+import unittest
+from typing import List
+
+import pyarrow as pa
+
+from swelldb.engine.datafusion_processor import DataFusionEngine
+from swelldb.table_plan.meta import SwellDBMeta
+from swelldb.table_plan.swelldb_schema import SwellDBSchema
+from swelldb.table_plan.table.logical.logical_table import LogicalTable
+from swelldb.table_plan.table.physical.dataset_table import DatasetTable
+from swelldb.table_plan.table.physical.llm_table import LLMTable
+from swelldb.table_plan.table.physical.physical_table import PhysicalTable
+from tests.helpers import InputTable
+
+
+class EchoLLM:
+    """Answers each prompt, a JSON list of rows, with the same rows."""
+
+    def call(self, prompt: str) -> str:
+        return json.dumps({"rows": json.loads(prompt)})
+
+
+class ChunkTable(PhysicalTable):
+    _merge_duplicate_rows = True
+
+    def __init__(self, chunks: List[list], **kwargs):
+        super().__init__(
+            execution_engine=None,
+            llm=EchoLLM(),
+            logical_table=LogicalTable("t", "t", SwellDBSchema.from_string("k str, v str, n int")),
+            child_table=None,
+            operator_name="chunk_table",
+            base_columns=["k"],
+            **kwargs,
+        )
+        self._chunks = chunks
+
+    def get_prompts(self, input_table: pa.Table) -> List[str]:
+        return [json.dumps(chunk) for chunk in self._chunks]
+
+
+class RowTable(PhysicalTable):
+    """Prompts with the rows of each chunk of its streamed input, with a doubled value."""
+
+    _prompts_per_chunk = True
+
+    def __init__(self, child_table: PhysicalTable, chunk_size: int):
+        super().__init__(
+            execution_engine=None,
+            llm=EchoLLM(),
+            logical_table=LogicalTable("t", "t", SwellDBSchema.from_string("k str, doubled int")),
+            child_table=child_table,
+            operator_name="row_table",
+            base_columns=["k"],
+            chunk_size=chunk_size,
+            max_concurrency=2,
+        )
+        self.chunk_sizes: List[int] = []
+
+    def get_prompts(self, input_table: pa.Table) -> List[str]:
+        self.chunk_sizes.append(input_table.num_rows)
+        return [json.dumps([[row["k"], row["v"] * 2] for row in input_table.to_pylist()])]
+
+
+class CountingLLM:
+    """Answers each prompt with the same row, and counts the prompts."""
+
+    def __init__(self):
+        self.prompts: List[str] = []
+
+    @property
+    def n_calls(self) -> int:
+        return len(self.prompts)
+
+    def call(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        return json.dumps({"rows": [["k0", "x"]]})
+
+
+class TestPhysicalTable(unittest.TestCase):
+    def test_merge_rows_from_overlapping_chunks(self):
+        chunks = [
+            [["a", None, 1]],
+            [["a", "x", 2], [None, "y", 3]],
+            [["b", "z", None]],
+        ]
+
+        for max_concurrency in (1, 3):
+            result = ChunkTable(chunks, max_concurrency=max_concurrency).materialize()
+
+            self.assertEqual(
+                result.to_pylist(),
+                [
+                    {"k": "a", "v": "x", "n": 1},
+                    {"k": "b", "v": "z", "n": None},
+                    {"k": None, "v": "y", "n": 3},
+                ],
+            )
+
+    def test_keep_rows_of_one_to_many_tables(self):
+        class ListingTable(ChunkTable):
+            _merge_duplicate_rows = False
+
+        chunks = [[["athens", "acropolis", 1], ["athens", "plaka", 2]]]
+
+        self.assertEqual(ListingTable(chunks).materialize().num_rows, 2)
+
+    def test_merge_nested_columns(self):
+        table = pa.table(
+            {
+                "k": ["a", "a", "b"],
+                "tags": pa.array([None, ["x", "y"], ["z"]], type=pa.list_(pa.string())),
+                "n": [1, 2, None],
+            }
+        )
+
+        self.assertEqual(
+            ChunkTable([])._merge_rows(table).to_pylist(),
+            [{"k": "a", "tags": ["x", "y"], "n": 1}, {"k": "b", "tags": ["z"], "n": None}],
+        )
+
+    def test_prompt_on_streamed_chunks(self):
+        engine = DataFusionEngine()
+        engine.register_arrow(
+            "input", pa.table({"k": [f"k{i}" for i in range(25)], "v": list(range(25))})
+        )
+
+        dataset_table = DatasetTable(
+            execution_engine=engine,
+            logical_table=LogicalTable("input", "input", SwellDBSchema.from_string("k str, v int")),
+            child_table=None,
+            base_columns=["k"],
+            llm=None,
+            query="SELECT k, v FROM input ORDER BY v",
+        )
+        self.assertEqual(dataset_table.materialize().num_rows, 25)
+
+        table = RowTable(dataset_table, chunk_size=10)
+        result = table.materialize()
+
+        self.assertEqual(table.chunk_sizes, [10, 10, 5])
+        self.assertEqual(
+            sorted(result.select(["k", "doubled", "v"]).to_pylist(), key=lambda row: row["v"]),
+            [{"k": f"k{i}", "doubled": 2 * i, "v": i} for i in range(25)],
+        )
+
+    def test_llm_table_streamed_and_materialized_input(self):
+        engine = DataFusionEngine()
+        data = pa.table({"k": [f"k{i}" for i in range(25)], "v": list(range(25))})
+        engine.register_arrow("input", data)
+
+        def dataset_table(query: str) -> DatasetTable:
+            return DatasetTable(
+                execution_engine=engine,
+                logical_table=LogicalTable("input", "input", SwellDBSchema.from_string("k str, v int")),
+                child_table=None,
+                base_columns=["k"],
+                llm=None,
+                query=query,
+            )
+
+        def llm_table(child_table: PhysicalTable) -> (LLMTable, CountingLLM):
+            llm = CountingLLM()
+            table = LLMTable(
+                execution_engine=engine,
+                logical_table=LogicalTable("t", "t", SwellDBSchema.from_string("k str, label str")),
+                child_table=child_table,
+                meta=SwellDBMeta().set_base_columns(["k"]).set_chunk_size(10),
+                llm=llm,
+            )
+            return table, llm
+
+        # Both inputs are prompted in chunks of chunk_size rows
+        for child_table in (dataset_table("SELECT k, v FROM input"), InputTable(data)):
+            table, llm = llm_table(child_table)
+            result = table.materialize()
+
+            self.assertEqual(llm.n_calls, 3)
+            self.assertEqual(result.column_names, ["k", "label", "v"])
+
+        # An input without rows gives an empty result, without prompts
+        for child_table in (
+            dataset_table("SELECT k, v FROM input WHERE v < 0"),
+            InputTable(data.slice(0, 0)),
+        ):
+            table, llm = llm_table(child_table)
+            result = table.materialize()
+
+            self.assertEqual(llm.n_calls, 0)
+            self.assertEqual(result.num_rows, 0)
+            self.assertEqual(result.column_names, ["k", "label", "v"])
+
+    def test_llm_table_prompts_per_chunk(self):
+        data = pa.table({"k": [f"k{i}" for i in range(25)], "v": list(range(25))})
+        llm = CountingLLM()
+
+        LLMTable(
+            execution_engine=None,
+            logical_table=LogicalTable("t", "t", SwellDBSchema.from_string("k str, label str")),
+            child_table=InputTable(data),
+            meta=SwellDBMeta().set_base_columns(["k"]).set_chunk_size(10).set_max_concurrency(1),
+            llm=llm,
+        ).materialize()
+
+        # A materialized input is prompted in chunks too, each with only its own rows
+        self.assertEqual(llm.n_calls, 3)
+        self.assertIn("'k9'", llm.prompts[0])
+        self.assertNotIn("'k10'", llm.prompts[0])
+        self.assertIn("'k10'", llm.prompts[1])
+        self.assertIn("'k24'", llm.prompts[2])
+
+    def test_dataset_table_with_child_requires_base_columns(self):
+        with self.assertRaises(ValueError):
+            DatasetTable(
+                execution_engine=None,
+                logical_table=LogicalTable("t", "t", SwellDBSchema.from_string("k str")),
+                child_table=InputTable(pa.table({"k": ["a"]})),
+                base_columns=None,
+                llm=None,
+                query="SELECT k FROM input",
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
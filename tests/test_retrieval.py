@@ -0,0 +1,39 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import unittest
+
+from swelldb.common.retrieval import BM25Index
+
+
+class TestBM25Index(unittest.TestCase):
+    def test_search(self):
+        index = BM25Index(
+            [
+                "Apple is headquartered in Cupertino, California",
+                "Microsoft is headquartered in Redmond, Washington",
+                "Redmond is a city in King County",
+                "Netflix streams movies",
+            ]
+        )
+
+        ids = [passage_id for passage_id, _ in index.search("Microsoft Redmond", top_k=2)]
+        self.assertEqual(ids, [1, 2])
+
+        self.assertEqual(index.search("Oracle", top_k=5), [])
+        self.assertEqual(
+            index.top_passages("netflix apple", top_k=2),
+            ["Apple is headquartered in Cupertino, California", "Netflix streams movies"],
+        )
+
+        ids = [
+            passage_id
+            for passage_id, _ in index.search("Redmond Washington", require_all_terms=True)
+        ]
+        self.assertEqual(ids, [1])
+        self.assertEqual(index.search("Redmond Oracle", require_all_terms=True), [])
+
+    def test_empty_index(self):
+        self.assertEqual(BM25Index([]).search("anything"), [])
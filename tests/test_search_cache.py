@@ -0,0 +1,53 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import os
+import tempfile
+import unittest
+
+from swelldb.search.cache import SearchCache
+
+
+class TestSearchCache(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._dir.name, "search.cache")
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_search_normalized_query(self):
+        cache = SearchCache(self._path)
+        cache.put_search("Largest  Companies ", {"organic": []})
+
+        self.assertEqual(cache.get_search("largest companies"), {"organic": []})
+        self.assertIsNone(cache.get_search("smallest companies"))
+
+        stats = cache.get_stats()
+        self.assertEqual(stats["search_hits"], 1)
+        self.assertEqual(stats["search_misses"], 1)
+        cache.close()
+
+    def test_stale_page_and_dedup(self):
+        cache = SearchCache(self._path, ttl=-1)
+        cache.put_page("https://Example.com/a/#top", "body", etag='"v1"')
+        cache.put_page("https://mirror.example.com/a", "body")
+
+        page = cache.get_page("https://example.com/a")
+        self.assertEqual(page.body, "body")
+        self.assertEqual(page.etag, '"v1"')
+        self.assertFalse(page.fresh)
+
+        blobs = cache._conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+        self.assertEqual(blobs, 1)
+        cache.close()
+
+    def test_page_key_matches_dedup(self):
+        cache = SearchCache(self._path)
+        cache.put_page("https://www.Example.com/path/?b=2&a=1&utm_source=x#frag", "body")
+
+        # The links that duplicate detection treats as one page share a cache entry
+        self.assertEqual(cache.get_page("http://example.com/path?a=1&b=2").body, "body")
+        cache.close()
@@ -0,0 +1,156 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import unittest
+from typing import List
+
+import pyarrow as pa
+
+from swelldb.search.extraction import PageExtraction, extract_pages
+from swelldb.table_plan.meta import SwellDBMeta
+from swelldb.table_plan.swelldb_schema import SwellDBSchema
+from swelldb.table_plan.table.logical.logical_table import LogicalTable
+from swelldb.table_plan.table.physical.search_engine_table import SearchEngineTable
+from tests.helpers import InputTable
+
+CITIES_PAGE = """
+<html><body><table>
+  <tr><th>City</th><th>Country</th></tr>
+  <tr><td>athens</td><td>Greece</td></tr>
+  <tr><td>PARIS</td><td>France</td></tr>
+  <tr><td>Madrid</td><td>Spain</td></tr>
+</table></body></html>
+"""
+
+POPULATIONS_PAGE = """
+<html><body><table>
+  <tr><th>City</th><th>Country</th><th>Population</th></tr>
+  <tr><td>Athens</td><td>Greece</td><td>3000000</td></tr>
+  <tr><td>Rome</td><td>Italy</td><td></td></tr>
+</table></body></html>
+"""
+
+
+class OfflineSearchTable(SearchEngineTable):
+    """Answers each search query with a single result about the query, and records the queries."""
+
+    def __init__(
+        self, meta: SwellDBMeta, schema: str = "city str, country str", page: str = CITIES_PAGE
+    ):
+        super().__init__(
+            execution_engine=None,
+            logical_table=LogicalTable("cities", "Cities", SwellDBSchema.from_string(schema)),
+            child_table=None,
+            meta=meta,
+            llm=None,
+        )
+        self.queries: List[str] = []
+        self._page: str = page
+
+    def _search(self, queries: List[str]) -> List[dict]:
+        offset: int = len(self.queries)
+        self.queries.extend(queries)
+
+        return [
+            {
+                "organic": [
+                    {
+                        "link": f"https://example.com/{idx}",
+                        "title": query,
+                        "snippet": f"All about {query}",
+                    }
+                ]
+            }
+            for idx, query in enumerate(queries, start=offset)
+        ]
+
+    def _crawl(self, links: List[str]) -> List[PageExtraction]:
+        # Every link leads to the same page of cities
+        return extract_pages([self._page] * len(links), max_workers=1)
+
+
+def _meta(**settings) -> SwellDBMeta:
+    meta: SwellDBMeta = SwellDBMeta().set_serper_api_key("test").set_base_columns(["city"])
+
+    for name, value in settings.items():
+        getattr(meta, f"set_{name}")(value)
+
+    return meta
+
+
+class TestSearchEngineTable(unittest.TestCase):
+    def test_entity_queries_per_partition(self):
+        table = OfflineSearchTable(
+            _meta(search_query_template="{city} country", chunk_size=2)
+        )
+        input_table = pa.table({"city": ["Athens", "Paris", "Rome"]})
+
+        prompts = table.get_prompts(input_table)
+
+        self.assertEqual(table.queries, ["Athens country", "Paris country", "Rome country"])
+        self.assertEqual(len(prompts), 2)
+
+        # Each partition is prompted with the results of its own queries only
+        self.assertIn("All about Athens country", prompts[0])
+        self.assertIn("All about Paris country", prompts[0])
+        self.assertNotIn("Rome country", prompts[0])
+        self.assertIn("All about Rome country", prompts[1])
+        self.assertNotIn("Athens country", prompts[1])
+
+    def test_entity_query_unknown_column(self):
+        table = OfflineSearchTable(_meta(search_query_template="{town} country"))
+
+        with self.assertRaises(ValueError):
+            table.get_prompts(pa.table({"city": ["Athens"]}))
+
+        self.assertEqual(table.queries, [])
+
+    def test_html_rows_join_input_rows_by_exact_value(self):
+        table = OfflineSearchTable(_meta(search_query_template="{city}", crawl_pages=True))
+        table._child_table = InputTable(pa.table({"city": ["Athens ", "Paris", "ATHENS"]}))
+
+        # Both entities are filled from the HTML table, so no LLM call is made
+        result = table.materialize()
+
+        self.assertEqual(
+            sorted(result.to_pylist(), key=lambda row: row["city"]),
+            [
+                {"city": "ATHENS", "country": "Greece"},
+                {"city": "Athens ", "country": "Greece"},
+                {"city": "Paris", "country": "France"},
+            ],
+        )
+
+    def test_partial_rows_in_prompts(self):
+        table = OfflineSearchTable(
+            _meta(search_query_template="{city}", crawl_pages=True),
+            schema="city str, country str, population int",
+            page=POPULATIONS_PAGE,
+        )
+
+        prompts = table.get_prompts(pa.table({"city": ["Athens", "Rome"]}))
+
+        # Athens is filled from the table, and Rome is completed with its known country
+        self.assertEqual(table.get_extracted_table().column("city").to_pylist(), ["Athens"])
+        self.assertEqual(len(prompts), 1)
+        self.assertIn("'city': 'Rome', 'country': 'Italy', 'population': None", prompts[0])
+
+    def test_entities_beyond_the_tables(self):
+        table = OfflineSearchTable(
+            _meta(crawl_pages=True, links=["https://example.com/cities"]),
+            schema="city str, country str, population int",
+            page=POPULATIONS_PAGE,
+        )
+
+        prompts = table.get_prompts(None)
+
+        # Rome is completed, and the LLM is asked for the entities that the table does not cover
+        self.assertEqual(len(prompts), 2)
+        self.assertIn("'city': 'Rome', 'country': 'Italy'", prompts[0])
+        self.assertIn("Known rows, which must not be repeated: [{'city': 'Athens'}]", prompts[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import json
+import unittest
+
+import pyarrow as pa
+
+from swelldb.engine.datafusion_processor import DataFusionEngine
+from swelldb.engine.sql_cache import SQLCache
+from swelldb.engine.sql_generator import SQLGenerator, extract_sql
+from swelldb.table_plan.planner import TableGenPlanner
+from swelldb.table_plan.swelldb_schema import SwellDBSchema
+from swelldb.table_plan.table.logical.logical_table import LogicalTable
+from swelldb.table_plan.table.physical.dataset_table import DatasetTable
+from tests.helpers import ScriptedLLM
+
+
+class TestSQLGenerator(unittest.TestCase):
+    def setUp(self):
+        self._engine = DataFusionEngine()
+        self._engine.register_arrow(
+            "mysql_servers", pa.table({"host": ["a", "b"], "port": [3306, 3307]})
+        )
+
+    def test_extract_sql(self):
+        self.assertEqual(
+            extract_sql("Here is the query:\n```sql\nSELECT host FROM mysql_servers;\n```"),
+            "SELECT host FROM mysql_servers",
+        )
+        self.assertEqual(
+            extract_sql("Sure, with aliases:\nSELECT host AS h FROM mysql_servers"),
+            "SELECT host AS h FROM mysql_servers",
+        )
+
+    def test_repair_and_cache(self):
+        llm = ScriptedLLM(
+            [
+                "SELECT hostname FROM mysql_servers",
+                "SELECT host FROM mysql_servers",
+                "```sql\nSELECT host, port FROM mysql_servers\n```",
+            ]
+        )
+        cache = SQLCache()
+
+        query = SQLGenerator(llm, self._engine, cache=cache).generate(
+            "Generate a query", ["host", "port"]
+        )
+
+        self.assertEqual(query, "SELECT host, port FROM mysql_servers")
+        self.assertEqual(len(llm.prompts), 3)
+        self.assertIn("hostname", llm.prompts[1])
+        self.assertIn("does not return the columns ['port']", llm.prompts[2])
+
+        # The validated query is reused without calling the LLM
+        cached_llm = ScriptedLLM([])
+        self.assertEqual(
+            SQLGenerator(cached_llm, self._engine, cache=cache).generate(
+                "Generate a query", ["host", "port"]
+            ),
+            query,
+        )
+        self.assertEqual(cached_llm.prompts, [])
+
+    def test_mixed_case_columns(self):
+        llm = ScriptedLLM(["SELECT host AS HostName, port AS Port FROM mysql_servers"])
+        query = SQLGenerator(llm, self._engine).generate(
+            "Generate a query", ["HostName", "Port"]
+        )
+
+        # The lowercased aliases are renamed without a repair
+        self.assertEqual(len(llm.prompts), 1)
+        self.assertEqual(
+            self._engine.sql(query).to_arrow_table().column_names, ["HostName", "Port"]
+        )
+
+    def test_reject_statements(self):
+        llm = ScriptedLLM(["DROP TABLE mysql_servers", "CREATE VIEW v AS SELECT 1"])
+
+        with self.assertRaises(ValueError):
+            SQLGenerator(llm, self._engine, max_repairs=1).generate("Generate a query", ["host"])
+
+        self.assertIn("mysql_servers", self._engine.get_tables())
+
+    def test_plan_from_cache(self):
+        logical_table = LogicalTable(
+            "servers", "MySQL servers", SwellDBSchema.from_string("host str, port int")
+        )
+        answer = json.dumps(
+            {"columns": ["host", "port"], "query": "SELECT host, port FROM mysql_servers"}
+        )
+
+        for responses in ([answer], []):
+            llm = ScriptedLLM(responses)
+            planner = TableGenPlanner(llm=llm, execution_engine=self._engine, serper_api_key=None)
+
+            plan = planner.create_plan(
+                logical_table, base_columns=["host"], tables=self._engine.get_tables()
+            )
+
+            self.assertIsInstance(plan, DatasetTable)
+            self.assertEqual(plan.materialize().num_rows, 2)
+
+        # The second plan makes no LLM call
+        self.assertEqual(llm.prompts, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,239 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import pyarrow as pa
+
+from swelldb.datasource.sqlite_datasource import SQLiteDatasource
+from swelldb.engine.datafusion_processor import DataFusionEngine
+from swelldb.table_plan.meta import SwellDBMeta
+from swelldb.table_plan.planner import TableGenPlanner
+from swelldb.table_plan.swelldb_schema import SwellDBSchema
+from swelldb.table_plan.table.logical.logical_table import LogicalTable
+from swelldb.table_plan.table.physical.database_table import DatabaseTable
+from swelldb.table_plan.table.physical.dataset_table import DatasetTable
+from swelldb.table_plan.table.physical.llm_table import LLMTable
+from tests.helpers import ScriptedLLM
+
+
+class TestSQLiteDatasource(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._dir.name, "cities.sqlite")
+
+        conn = sqlite3.connect(self._path)
+        conn.execute(
+            "CREATE TABLE cities (name TEXT, country VARCHAR(2), pop INTEGER, area REAL, misc)"
+        )
+        conn.executemany(
+            "INSERT INTO cities VALUES (?, ?, ?, ?, ?)",
+            [
+                (f"city{i}", "GR" if i % 2 else "FR", i * 1000, i * 1.5, i if i % 3 else "n/a")
+                for i in range(10)
+            ],
+        )
+        conn.commit()
+        conn.close()
+
+        self._db = SQLiteDatasource(self._path, pool_size=2, batch_size=3, read_only=True)
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def _logical_table(self, schema: str) -> LogicalTable:
+        return LogicalTable("cities", "Cities of Greece", SwellDBSchema.from_string(schema))
+
+    def test_typed_batches(self):
+        schema = self._db.get_arrow_schema("cities")
+
+        self.assertEqual(
+            [(field.name, field.type) for field in schema],
+            [
+                ("name", pa.string()),
+                ("country", pa.string()),
+                ("pop", pa.int64()),
+                ("area", pa.float64()),
+                ("misc", pa.string()),
+            ],
+        )
+
+        reader = self._db.sql_stream("SELECT name, misc FROM cities")
+        batches = list(reader)
+        self.assertEqual([batch.num_rows for batch in batches], [3, 3, 3, 1])
+        self.assertEqual(
+            pa.Table.from_batches(batches).column("misc").to_pylist()[:4], ["n/a", "1", "2", "n/a"]
+        )
+
+    def test_values_of_other_types(self):
+        conn = sqlite3.connect(self._path)
+        conn.execute("CREATE TABLE readings (id INTEGER, value INTEGER, unit REAL)")
+        conn.executemany(
+            "INSERT INTO readings VALUES (?, ?, ?)",
+            [(1, 10, 1.0), (2, 20, 2.0), (3, 30, 3.0), (4, 40.5, 4.0), (5, 50, "n/a")],
+        )
+        conn.commit()
+        conn.close()
+
+        # The values that do not match the declared types come after the first batch
+        table = self._db.scan(
+            "readings", {"id": "id", "value": "value", "unit": "unit"}
+        ).read_all()
+
+        self.assertEqual(
+            [field.type for field in table.schema], [pa.int64(), pa.float64(), pa.string()]
+        )
+        self.assertEqual(table.column("value").to_pylist(), [10.0, 20.0, 30.0, 40.5, 50.0])
+        self.assertEqual(table.column("unit").to_pylist()[-2:], ["4.0", "n/a"])
+
+    def test_open_paths(self):
+        # An in-memory database, shared by the connections of the pool
+        self.assertEqual(SQLiteDatasource(":memory:").sql("SELECT 1 AS n").num_rows, 1)
+
+        # A new database file, unless the database is read-only
+        path = os.path.join(self._dir.name, "new.sqlite")
+        with self.assertRaises(sqlite3.OperationalError):
+            SQLiteDatasource(path, read_only=True)
+
+        self.assertEqual(SQLiteDatasource(path).schema(), {})
+        self.assertTrue(os.path.exists(path))
+
+    def test_scan_pushdown(self):
+        table = self._db.scan(
+            "cities",
+            {"city": "name", "population": "pop"},
+            filters=["country = ?", "pop > 3000"],
+            parameters=["GR"],
+        ).read_all()
+
+        self.assertEqual(table.schema.names, ["city", "population"])
+        self.assertEqual(table.column("city").to_pylist(), ["city5", "city7", "city9"])
+
+    def test_connection_pool(self):
+        def count(i: int) -> int:
+            query = f"SELECT COUNT(*) AS n FROM cities WHERE pop > {i * 1000}"
+            return self._db.sql(query).column(0)[0].as_py()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            self.assertEqual(list(pool.map(count, range(8))), [9, 8, 7, 6, 5, 4, 3, 2])
+
+        # Unread streams give their connection back once closed
+        self._db.sql_stream("SELECT * FROM cities").close()
+
+        self.assertLessEqual(self._db._n_connections, 2)
+        self.assertEqual(self._db._pool.qsize(), self._db._n_connections)
+
+    def test_connection_timeout(self):
+        db = SQLiteDatasource(self._path, pool_size=1, batch_size=3, timeout=0.1)
+        reader = db.sql_stream("SELECT * FROM cities")
+
+        # The unread stream holds the only connection
+        with self.assertRaises(TimeoutError):
+            db.sql("SELECT 1")
+
+        reader.close()
+        self.assertEqual(db.sql("SELECT 1 AS n").column("n").to_pylist(), [1])
+
+        # A parent that fails midway through the stream closes it
+        table = LLMTable(
+            execution_engine=None,
+            logical_table=self._logical_table("city str, mayor str"),
+            child_table=DatabaseTable(
+                execution_engine=None,
+                logical_table=self._logical_table("city str"),
+                child_table=None,
+                base_columns=["city"],
+                llm=None,
+                database_datasource=db,
+                table="cities",
+                columns={"city": "name"},
+            ),
+            meta=SwellDBMeta().set_base_columns(["city"]).set_chunk_size(2),
+            llm=ScriptedLLM([]),
+        )
+
+        with self.assertRaises(IndexError):
+            table.materialize()
+
+        self.assertEqual(db.sql("SELECT 1 AS n").column("n").to_pylist(), [1])
+
+    def test_close(self):
+        with SQLiteDatasource(self._path, pool_size=2, batch_size=3) as db:
+            db.sql("SELECT 1")
+            reader = db.sql_stream("SELECT * FROM cities")
+
+        # The idle connections are closed, and the connection of the open stream once it is closed
+        self.assertEqual(db._pool.qsize(), 0)
+        self.assertEqual(db._n_connections, 1)
+
+        reader.close()
+        self.assertEqual(db._n_connections, 0)
+
+        with self.assertRaises(ValueError):
+            db.sql("SELECT 1")
+
+    def test_database_table_semi_join(self):
+        engine = DataFusionEngine()
+        engine.register_arrow("wanted", pa.table({"city": ["city1", "city4", "unknown"]}))
+
+        child = DatasetTable(
+            execution_engine=engine,
+            logical_table=self._logical_table("city str"),
+            child_table=None,
+            base_columns=["city"],
+            llm=None,
+            query="SELECT city FROM wanted",
+        )
+
+        table = DatabaseTable(
+            execution_engine=engine,
+            logical_table=self._logical_table("city str, population int"),
+            child_table=child,
+            base_columns=["city"],
+            llm=None,
+            database_datasource=self._db,
+            table="cities",
+            columns={"city": "name", "population": "pop"},
+        )
+
+        result = table.materialize().sort_by("city")
+        self.assertEqual(result.column("population").to_pylist(), [1000, 4000])
+
+    def test_plan_database_table(self):
+        llm = ScriptedLLM(
+            [
+                json.dumps(
+                    {
+                        "table": "geo.cities",
+                        "columns": {"city": "name", "population": "pop", "mayor": "mayor"},
+                        "filters": ["country = 'GR'", "continent = 'Europe'"],
+                    }
+                )
+            ]
+        )
+        planner = TableGenPlanner(llm=llm, execution_engine=DataFusionEngine(), serper_api_key=None)
+
+        plan = planner.create_plan(
+            logical_table=self._logical_table("city str, population int"),
+            base_columns=["city"],
+            databases={"geo": self._db},
+        )
+
+        self.assertIsInstance(plan, DatabaseTable)
+        self.assertIn("geo.cities: name: string", llm.prompts[0])
+        self.assertEqual(len(llm.prompts), 1)
+
+        # The unknown column and the invalid filter are dropped
+        self.assertEqual(plan.get_columns(), {"city": "name", "population": "pop"})
+        self.assertEqual(plan.materialize().num_rows, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import os
+import tempfile
+import unittest
+
+import pyarrow as pa
+import pyarrow.csv as csv
+
+from swelldb.swelldb import SwellDB, TableBuilder
+from swelldb.table_plan.mode import Mode
+
+
+class TestTableBuilder(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._csv = os.path.join(self._dir.name, "data.csv")
+        csv.write_csv(pa.table({"city": ["Athens", "Paris"]}), self._csv)
+
+        self._swelldb = SwellDB(llm=None, serper_api_key="test")
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def _builder(self, data: pa.Table) -> TableBuilder:
+        return (
+            self._swelldb.table_builder()
+            .set_table_name("cities")
+            .set_content("Cities")
+            .set_schema("city str, country str")
+            .set_table_gen_mode(Mode.LLM)
+            .set_data(data)
+        )
+
+    def test_data_replaces_previous_data(self):
+        self._builder(pa.table({"city": ["Athens"]})).build()
+        self._builder(pa.table({"city": ["Rome", "Madrid"]})).build()
+
+        result = self._swelldb._execution_engine.sql("SELECT * FROM data").to_arrow_table()
+        self.assertEqual(result.column("city").to_pylist(), ["Rome", "Madrid"])
+
+    def test_data_name_clash(self):
+        builder = self._builder(pa.table({"city": ["Rome"]})).add_csv_file("data", self._csv)
+
+        with self.assertRaises(ValueError):
+            builder.build()
+
+        # The CSV table is kept
+        result = self._swelldb._execution_engine.sql("SELECT * FROM data").to_arrow_table()
+        self.assertEqual(result.column("city").to_pylist(), ["Athens", "Paris"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+# Copyright (c) 2025 Victor Giannakouris
+#
+# This file is part of SwellDB and is licensed under the MIT License.
+# See the LICENSE file in the project root for more information.
+
+import unittest
+
+from swelldb.common.table_matching import match_columns, match_table
+from swelldb.table_plan.swelldb_schema import SwellDBSchema
+
+TABLE = [
+    ["Rank", "Company", "Country", "Revenue (USD millions)"],
+    ["1", "Walmart", "United States", "648,125"],
+    ["2", "Saudi Aramco", "Saudi Arabia", "-"],
+]
+
+
+class TestTableMatching(unittest.TestCase):
+    def test_match_columns(self):
+        schema = SwellDBSchema.from_string("company_name str, revenue float, founded int")
+
+        mapping = match_columns(TABLE[0], TABLE[1:], schema)
+
+        self.assertEqual(mapping, {"company_name": 1, "revenue": 3})
+
+    def test_match_table(self):
+        schema = SwellDBSchema.from_string("company str, revenue float, rank int")
+
+        table = match_table(TABLE, schema, base_columns=["company"])
+
+        self.assertEqual(
+            table.to_pylist(),
+            [
+                {"company": "Walmart", "revenue": 648125.0, "rank": 1},
+                {"company": "Saudi Aramco", "revenue": None, "rank": 2},
+            ],
+        )
+
+    def test_reject_unmatched_table(self):
+        schema = SwellDBSchema.from_string("city str, population int, mayor str")
+
+        self.assertIsNone(match_table(TABLE, schema, base_columns=["city"]))